@@ -37,6 +37,20 @@ def get_readme_generation_prompt(analysis_context: dict, project_name: str = Non
     project_structure = enhanced_analysis.get('project_structure', {})
     environment = enhanced_analysis.get('environment', {})
     metrics = enhanced_analysis.get('metrics', {})
+    coverage = enhanced_analysis.get('coverage', {})
+    
+    # Metrics of huge repositories are extrapolated from a sample of their source files
+    sample = metrics.get('sample', {})
+    sample_note = ""
+    if metrics.get('estimated'):
+        sample_note = (f" (estimated ±{sample.get('total_files_margin', 0)} from {sample.get('files', 0)} "
+                       f"of {sample.get('population', 0)} source files)")
+    
+    # Flag budget-limited analyses so missing details are not read as absent features
+    coverage_note = ""
+    if coverage and not coverage.get('complete', True):
+        coverage_note = (f"- Coverage: PARTIAL analysis ({coverage.get('files_analyzed', 0)} source files analyzed, "
+                         f"{coverage.get('files_skipped', 0)} skipped to stay within the analysis budget)")
     
     # Create detailed analysis summary for AI
     enhanced_summary = f"""
@@ -84,15 +98,17 @@ Based on file names and structure, this appears to be a README generation tool t
 - Entry Points: {', '.join(project_structure.get('entry_points', [])) or 'None detected'}
 - Config Files: {', '.join(project_structure.get('config_files', [])) or 'None detected'}
 - Available Scripts: {', '.join(project_structure.get('scripts', [])) or 'None detected'}
+- Workspace Packages: {', '.join(f"{package['name']} ({package['path']}, {package['ecosystem']})" for package in project_structure.get('packages', [])) or 'Single package'}
 
 🌍 **ENVIRONMENT & SETUP (REAL REQUIREMENTS):**
 - Package Managers: {', '.join(environment.get('package_managers', [])) or 'None detected'}
 - Required Environment Variables: {', '.join(environment.get('required_variables', [])) or 'None detected'}
 
 📈 **CODE METRICS:**
-- Total Files: {metrics.get('total_files', 0)}
+- Total Files: {metrics.get('total_files', 0)}{sample_note}
 - Total Lines: {metrics.get('total_lines', 0)}
 - Languages: {', '.join(metrics.get('languages', [])) or 'Unknown'}
+{coverage_note}
 """
 
     # Enhanced demo section - only if demo is enabled AND has content
@@ -3,9 +3,10 @@ import json
 import base64
 from datetime import datetime
 from typing import List, Dict, Optional
-import requests
 from dotenv import load_dotenv
 
+from .github_client import GITHUB_API_URL, get_github_client
+
 load_dotenv()
 
 # GitHub Database configuration
@@ -39,10 +40,10 @@ def get_file_from_github(file_path: str) -> Optional[Dict]:
         return None
     
     try:
-        url = f"https://api.github.com/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}/contents/{file_path}"
+        url = f"{GITHUB_API_URL}/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}/contents/{file_path}"
         print(f"🌐 GitHub API URL: {url}")
         
-        response = requests.get(url, headers=get_github_headers())
+        response = get_github_client().get(url, headers=get_github_headers())
         print(f"📡 GitHub API response: {response.status_code}")
         
         if response.status_code == 200:
@@ -85,7 +86,7 @@ def save_file_to_github(file_path: str, content: str, sha: Optional[str] = None,
         return False
     
     try:
-        url = f"https://api.github.com/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}/contents/{file_path}"
+        url = f"{GITHUB_API_URL}/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}/contents/{file_path}"
         print(f"🌐 Saving to GitHub URL: {url}")
         
         data = {
@@ -99,7 +100,7 @@ def save_file_to_github(file_path: str, content: str, sha: Optional[str] = None,
         else:
             print("📝 Creating new file (no SHA)")
         
-        response = requests.put(url, headers=get_github_headers(), json=data)
+        response = get_github_client().put(url, headers=get_github_headers(), json=data)
         print(f"📡 GitHub save response: {response.status_code}")
         
         if response.status_code in [200, 201]:
@@ -121,8 +122,8 @@ def create_history_repository():
     
     try:
         # Test repository access
-        url = f"https://api.github.com/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}"
-        response = requests.get(url, headers=get_github_headers())
+        url = f"{GITHUB_API_URL}/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}"
+        response = get_github_client().get(url, headers=get_github_headers())
         
         if response.status_code == 200:
             print("✅ GitHub repository is accessible")
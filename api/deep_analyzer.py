@@ -4,45 +4,204 @@ Provides comprehensive project understanding for 100% accurate documentation
 """
 
 import os
-import ast
 import json
-import re
 import subprocess
-from typing import Dict, List, Any, Optional, Tuple
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
 
+from .repo_archive import as_repository, LocalRepository, MemoryRepository, ZipRepository
+from .detection_rules import NPM_DETECTOR, PYPI_DETECTOR, PYTHON_IMPORT_DETECTOR, normalize_requirement
+from .file_cache import get_file_cache, git_blob_sha
+from .file_records import FileRecord, RawAnalysisView
+from .incremental import AnalysisBaseline
+from .js_scan import import_package, scan_script
+from .lockfiles import resolve_versions
+from .notebooks import MAX_SOURCE_CHARS, parseable_cells, python_cell, read_notebook
+from .python_extract import extract_python_symbols
+from .repo_index import get_repo_index, RepoIndex
+from .route_extract import extract_js_routes
+from .sampling import StratifiedSample
+from .source_loader import SourceFile, load_source, read_source_text
+from .workspaces import WorkspacePackage, discover_packages, package_name
+
+# Bump whenever analysis output changes so cached analyses and READMEs are invalidated
+ANALYZER_VERSION = "15"
+
+# Dependency manifests (at the root and in each workspace package) and the method that analyzes each
+DEPENDENCY_FILE_ANALYZERS = {
+    'package.json': '_analyze_package_json',
+    # After package.json: they resolve the versions of the packages it declares
+    'package-lock.json': '_analyze_lockfile',
+    'npm-shrinkwrap.json': '_analyze_lockfile',
+    'yarn.lock': '_analyze_lockfile',
+    'pnpm-lock.yaml': '_analyze_lockfile',
+    'requirements.txt': '_analyze_requirements_txt',
+    'Pipfile': '_analyze_pipfile',
+    'pyproject.toml': '_analyze_pyproject_toml',
+    'Cargo.toml': '_analyze_cargo_toml',
+    'go.mod': '_analyze_go_mod',
+    'composer.json': '_analyze_composer_json',
+    'Gemfile': '_analyze_gemfile',
+    'pom.xml': '_analyze_pom_xml',
+    'build.gradle': '_analyze_gradle',
+    'CMakeLists.txt': '_analyze_cmake'
+}
+
+# Source extensions and the per-file analyzer each is dispatched to
+CODE_FILE_ANALYZERS = {
+    '.py': '_analyze_python_file',
+    '.js': '_analyze_javascript_file',
+    '.ts': '_analyze_typescript_file',
+    '.jsx': '_analyze_react_file',
+    '.tsx': '_analyze_react_file',
+    '.java': '_analyze_java_file',
+    '.cpp': '_analyze_cpp_file',
+    '.c': '_analyze_c_file',
+    '.rs': '_analyze_rust_file',
+    '.go': '_analyze_go_file',
+    '.php': '_analyze_php_file',
+    '.rb': '_analyze_ruby_file',
+    '.swift': '_analyze_swift_file',
+    '.kt': '_analyze_kotlin_file',
+    '.ipynb': '_analyze_notebook_file'
+}
+
+# Source types read as a stream in this process: never loaded whole, hashed for the
+# file cache or shipped to a worker. Their budget cost is what they can contribute.
+STREAMED_EXTENSIONS = {'.ipynb': MAX_SOURCE_CHARS}
+
+# Worker processes for per-file analysis: 0 picks one per CPU, 1 keeps it serial
+ANALYZER_JOBS = int(os.getenv("ANALYZER_JOBS", "0"))
+
+# With automatic worker counts, smaller repositories are analyzed serially (pool startup dominates)
+PARALLEL_MIN_FILES = int(os.getenv("ANALYZER_PARALLEL_MIN_FILES", "200"))
+
+# Target source bytes per task sent to a worker
+PARALLEL_CHUNK_BYTES = 512 * 1024
+
+# Per-file analyzers only add these values when they are not present yet (see _add_detected)
+UNIQUE_FIELDS = {'frameworks', 'main_technologies', 'databases', 'testing_frameworks', 'build_tools'}
+
+# Wall-clock seconds one analysis may spend on source files (0: unbounded); past it the rest are skipped
+ANALYSIS_TIME_BUDGET_SECONDS = float(os.getenv("ANALYSIS_TIME_BUDGET_SECONDS", "20"))
+
+# Source bytes one analysis may read (0: unbounded); files that no longer fit are skipped
+ANALYSIS_BYTE_BUDGET = int(os.getenv("ANALYSIS_BYTE_BUDGET", str(64 * 1024 * 1024)))
+
+# Beyond this many source files only a stratified sample is analyzed (0: always analyze all)
+ANALYSIS_SAMPLE_THRESHOLD = int(os.getenv("ANALYSIS_SAMPLE_THRESHOLD", "2000"))
+
+# Source files analyzed in sampling mode; code metrics are extrapolated from them
+ANALYSIS_SAMPLE_SIZE = int(os.getenv("ANALYSIS_SAMPLE_SIZE", "500"))
+
+# Source files analyzed first, so a budget-limited analysis still sees what matters most
+ENTRY_POINT_FILES = {
+    'main.py', 'app.py', 'server.py', 'manage.py', 'wsgi.py', 'asgi.py', '__main__.py',
+    'index.js', 'index.ts', 'main.js', 'main.ts', 'app.js', 'app.ts', 'server.js', 'server.ts'
+}
+ROUTE_DIRS = {'api', 'routes', 'controllers', 'endpoints', 'views', 'pages', 'app'}
+
+# Workspace packages whose manifests are analyzed concurrently
+WORKSPACE_WORKERS = int(os.getenv("WORKSPACE_WORKERS", "8"))
+
+# Manifest analysis fields kept in each workspace package's breakdown entry
+PACKAGE_FIELDS = ['main_technologies', 'frameworks', 'databases', 'testing_frameworks', 'build_tools',
+                  'package_managers', 'entry_points', 'scripts', 'dependency_analysis']
+
+# Of those, the ones also merged into the repository-wide analysis
+PACKAGE_MERGED_FIELDS = ['main_technologies', 'frameworks', 'databases', 'testing_frameworks', 'build_tools',
+                         'package_managers']
+
+# Package manager implied by each lockfile
+LOCKFILE_MANAGERS = {'package-lock.json': 'npm', 'npm-shrinkwrap.json': 'npm', 'yarn.lock': 'yarn', 'pnpm-lock.yaml': 'pnpm'}
+
+# Root-level configuration files looked for by _analyze_configuration
+CONFIG_FILES = [
+    'docker-compose.yml', 'Dockerfile', '.env', '.env.example',
+    'vercel.json', 'netlify.toml', 'next.config.js', 'nuxt.config.js',
+    'webpack.config.js', 'vite.config.js', 'tailwind.config.js',
+    'tsconfig.json', 'babel.config.js', '.eslintrc', 'prettier.config.js'
+]
+
+
+def _empty_analysis() -> Dict[str, Any]:
+    """Analysis fields before anything is known; per-file analyzers add to them"""
+    return {
+        'project_type': None,
+        'main_technologies': [],
+        'frameworks': [],
+        'databases': [],
+        'apis_used': [],
+        'deployment_targets': [],
+        'testing_frameworks': [],
+        'build_tools': [],
+        'package_managers': [],
+        'environment_variables': [],
+        'entry_points': [],
+        'key_features': [],
+        'architecture_patterns': [],
+        'external_services': [],
+        'file_analysis': {},
+        'dependency_analysis': {},
+        'code_metrics': {},
+        'documentation_files': [],
+        'config_files': [],
+        'scripts': [],
+        'actual_functionality': [],
+        'data_models': [],
+        'api_endpoints': [],
+        'ui_components': [],
+        'business_logic': [],
+        'workspace_packages': []
+    }
+
+
 class DeepProjectAnalyzer:
     """Advanced project analyzer that provides deep insights into codebase structure and functionality"""
     
-    def __init__(self, repo_path: str):
-        self.repo_path = repo_path
-        self.analysis = {
-            'project_type': None,
-            'main_technologies': [],
-            'frameworks': [],
-            'databases': [],
-            'apis_used': [],
-            'deployment_targets': [],
-            'testing_frameworks': [],
-            'build_tools': [],
-            'package_managers': [],
-            'environment_variables': [],
-            'entry_points': [],
-            'key_features': [],
-            'architecture_patterns': [],
-            'external_services': [],
-            'file_analysis': {},
-            'dependency_analysis': {},
-            'code_metrics': {},
-            'documentation_files': [],
-            'config_files': [],
-            'scripts': [],
-            'actual_functionality': [],
-            'data_models': [],
-            'api_endpoints': [],
-            'ui_components': [],
-            'business_logic': []
-        }
+    def __init__(self, repo: Union[str, LocalRepository, ZipRepository], jobs: Optional[int] = None,
+                 time_budget: Optional[float] = None, byte_budget: Optional[int] = None, use_file_cache: bool = True,
+                 baseline: Optional[AnalysisBaseline] = None):
+        # Accept a directory path or a virtual view (e.g. a zipball read in place)
+        self.repo = as_repository(repo)
+        # Records of an earlier commit for the files it shares with this one (see incremental)
+        self.baseline = baseline
+        self.reused_files = 0
+        # Per-file results by git blob SHA, shared across commits, forks and branches
+        self.file_cache = get_file_cache() if use_file_cache else None
+        self.cached_files = 0
+        # The file being analyzed, loaded once for hashing and analysis (see _read_text)
+        self._source: Optional[SourceFile] = None
+        # Worker processes for per-file analysis (None: ANALYZER_JOBS)
+        self.jobs = jobs
+        # Budgets for per-file analysis (None: the ANALYSIS_* defaults, 0: unbounded)
+        time_budget = ANALYSIS_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+        self.deadline = time.monotonic() + time_budget if time_budget > 0 else None
+        self.byte_budget = ANALYSIS_BYTE_BUDGET if byte_budget is None else byte_budget
+        self.bytes_analyzed = 0
+        # Source files left out because a budget ran out, with the reason
+        self.skipped_files: Dict[str, str] = {}
+        # Set when only a stratified sample of a huge repository's source files is analyzed
+        self.sample: Optional[StratifiedSample] = None
+        self.analysis = _empty_analysis()
+        # Dependencies declared in the root package.json (name -> range), for the lockfile pass
+        self.npm_dependencies: Dict[str, str] = {}
+        # Source files already analyzed
+        self.analyzed_files = set()
+        # Files analyzed while the archive was still streaming in, held back until the whole
+        # tree is known: path -> (record or None, (bytes, cached, reused) counted for it)
+        self.held_files: Dict[str, Tuple[Optional[Dict[str, Any]], Tuple[int, int, int]]] = {}
+        self._holding: Optional[Dict[str, Dict[str, Any]]] = None
+        # Each analyzed file's contributions to self.analysis, in merge order (see save_snapshot)
+        self.file_records: Dict[str, Dict[str, Any]] = {}
+    
+    @property
+    def index(self) -> RepoIndex:
+        """Shared one-pass index of the repository, built on first use"""
+        return get_repo_index(self.repo)
     
     def analyze_project(self) -> Dict[str, Any]:
         """Perform comprehensive project analysis"""
@@ -52,7 +211,9 @@ class DeepProjectAnalyzer:
             # Core analysis steps with error handling
             self._analyze_file_structure()
             self._analyze_dependencies()
+            self._analyze_workspace_packages()
             self._analyze_code_files()
+            self._record_coverage()
             self._analyze_configuration()
             self._analyze_documentation()
             self._detect_project_type()
@@ -65,6 +226,12 @@ class DeepProjectAnalyzer:
             print(f"⚠️ Error during analysis: {e}")
             # Continue with partial analysis
         
+        if self.file_cache:
+            self.file_cache.flush()
+            if self.cached_files:
+                print(f"🗃️ Reused cached analysis for {self.cached_files} of {len(self.analyzed_files)} source files")
+        if self.reused_files:
+            print(f"♻️ Reused {self.reused_files} unchanged files from the analysis of {self.baseline.commit_sha[:7]}")
         return self.analysis
     
     def _analyze_file_structure(self):
@@ -80,10 +247,7 @@ class DeepProjectAnalyzer:
             'microservice': ['services/', 'docker/', 'k8s/', 'helm/']
         }
         
-        found_dirs = []
-        for root, dirs, files in os.walk(self.repo_path):
-            for dir_name in dirs:
-                found_dirs.append(dir_name.lower())
+        found_dirs = self.index.dir_names
         
         # Detect project type based on directory structure
         for project_type, indicators in structure_indicators.items():
@@ -94,105 +258,67 @@ class DeepProjectAnalyzer:
     
     def _analyze_dependencies(self):
         """Deep analysis of all dependency files"""
-        dependency_files = {
-            'package.json': self._analyze_package_json,
-            'requirements.txt': self._analyze_requirements_txt,
-            'Pipfile': self._analyze_pipfile,
-            'pyproject.toml': self._analyze_pyproject_toml,
-            'Cargo.toml': self._analyze_cargo_toml,
-            'go.mod': self._analyze_go_mod,
-            'composer.json': self._analyze_composer_json,
-            'Gemfile': self._analyze_gemfile,
-            'pom.xml': self._analyze_pom_xml,
-            'build.gradle': self._analyze_gradle,
-            'CMakeLists.txt': self._analyze_cmake
-        }
-        
-        for filename, analyzer in dependency_files.items():
-            file_path = os.path.join(self.repo_path, filename)
-            if os.path.exists(file_path):
+        self._analyze_manifests('')
+    
+    def _analyze_manifests(self, directory: str):
+        """Run the manifest analyzers for the dependency files in one directory ('' for the root)"""
+        for filename, method in DEPENDENCY_FILE_ANALYZERS.items():
+            file_path = f"{directory}/{filename}" if directory else filename
+            if self.index.exists(file_path):
                 try:
-                    analyzer(file_path)
+                    getattr(self, method)(file_path)
                 except Exception as e:
-                    print(f"⚠️ Error analyzing {filename}: {e}")
+                    print(f"⚠️ Error analyzing {file_path}: {e}")
+    
+    def _analyze_workspace_packages(self):
+        """
+        Discover monorepo packages (see workspaces) and analyze each one's manifests on
+        its own, concurrently. Every package gets a breakdown entry; what they detect is
+        merged into the repository-wide fields.
+        """
+        packages = discover_packages(self.index, self._read_text)
+        if not packages:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(WORKSPACE_WORKERS, len(packages)))) as pool:
+            entries = list(pool.map(self._analyze_workspace_package, packages))
+        for entry in entries:
+            self._add_detected({field: entry.get(field, []) for field in PACKAGE_MERGED_FIELDS})
+        self.analysis['workspace_packages'] = entries
+        ecosystems = sorted({package.ecosystem for package in packages})
+        print(f"📦 Analyzed {len(packages)} workspace packages ({', '.join(ecosystems)})")
+    
+    def _analyze_workspace_package(self, package: WorkspacePackage) -> Dict[str, Any]:
+        """Breakdown entry for one package, from an analyzer of its own (no shared state to lock)"""
+        analyzer = DeepProjectAnalyzer(self.repo, jobs=1, time_budget=0, byte_budget=0, use_file_cache=False)
+        analyzer._analyze_manifests(package.path)
+        entry = {
+            'path': package.path,
+            'name': package_name(package, self._read_text) or package.path.rpartition('/')[2],
+            'ecosystem': package.ecosystem
+        }
+        entry.update((field, analyzer.analysis[field]) for field in PACKAGE_FIELDS if analyzer.analysis[field])
+        return entry
+    
+    def _add_detected(self, detected: Dict[str, List[str]]):
+        """Record detection_rules matches, keeping each analysis list free of duplicates"""
+        for field, names in detected.items():
+            for name in names:
+                if name not in self.analysis[field]:
+                    self.analysis[field].append(name)
     
     def _analyze_package_json(self, file_path: str):
         """Analyze Node.js package.json for detailed insights"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = json.loads(self._read_text(file_path))
             
             self.analysis['package_managers'].append('npm')
             
             # Analyze dependencies
             deps = {**data.get('dependencies', {}), **data.get('devDependencies', {})}
+            self.npm_dependencies = deps
             
-            # Framework detection
-            frameworks = {
-                'react': ['react', '@types/react'],
-                'vue': ['vue', '@vue/'],
-                'angular': ['@angular/', 'angular'],
-                'svelte': ['svelte'],
-                'next.js': ['next'],
-                'nuxt': ['nuxt'],
-                'express': ['express'],
-                'fastify': ['fastify'],
-                'koa': ['koa'],
-                'nest': ['@nestjs/'],
-                'electron': ['electron'],
-                'react-native': ['react-native']
-            }
-            
-            for framework, indicators in frameworks.items():
-                if any(any(indicator in dep for indicator in indicators) for dep in deps.keys()):
-                    if framework not in self.analysis['frameworks']:
-                        self.analysis['frameworks'].append(framework)
-            
-            # Database detection
-            db_indicators = {
-                'mongodb': ['mongoose', 'mongodb'],
-                'postgresql': ['pg', 'postgres', 'sequelize'],
-                'mysql': ['mysql', 'mysql2'],
-                'sqlite': ['sqlite3', 'better-sqlite3'],
-                'redis': ['redis', 'ioredis'],
-                'firebase': ['firebase', '@firebase/']
-            }
-            
-            for db, indicators in db_indicators.items():
-                if any(any(indicator in dep for indicator in indicators) for dep in deps.keys()):
-                    if db not in self.analysis['databases']:
-                        self.analysis['databases'].append(db)
-            
-            # Testing frameworks
-            test_frameworks = {
-                'jest': ['jest', '@jest/'],
-                'mocha': ['mocha'],
-                'chai': ['chai'],
-                'cypress': ['cypress'],
-                'playwright': ['playwright', '@playwright/'],
-                'vitest': ['vitest']
-            }
-            
-            for framework, indicators in test_frameworks.items():
-                if any(any(indicator in dep for indicator in indicators) for dep in deps.keys()):
-                    if framework not in self.analysis['testing_frameworks']:
-                        self.analysis['testing_frameworks'].append(framework)
-            
-            # Build tools
-            build_tools = {
-                'webpack': ['webpack'],
-                'vite': ['vite'],
-                'rollup': ['rollup'],
-                'parcel': ['parcel'],
-                'esbuild': ['esbuild'],
-                'turbo': ['turbo'],
-                'lerna': ['lerna']
-            }
-            
-            for tool, indicators in build_tools.items():
-                if any(any(indicator in dep for indicator in indicators) for dep in deps.keys()):
-                    if tool not in self.analysis['build_tools']:
-                        self.analysis['build_tools'].append(tool)
+            # Frameworks, databases, test runners and build tools
+            self._add_detected(NPM_DETECTOR.match(deps))
             
             # Scripts analysis
             scripts = data.get('scripts', {})
@@ -212,20 +338,43 @@ class DeepProjectAnalyzer:
         except Exception as e:
             print(f"Error analyzing package.json: {e}")
     
+    def _analyze_lockfile(self, file_path: str):
+        """Resolve the exact versions of detected npm packages from a lockfile, streamed line by line"""
+        manager = LOCKFILE_MANAGERS[os.path.basename(file_path)]
+        if manager not in self.analysis['package_managers']:
+            self.analysis['package_managers'].append(manager)
+        
+        # Only the direct dependencies the detection rules match are looked up, so
+        # the pass usually ends long before the end of the file
+        declared = {name: spec for name, spec in self.npm_dependencies.items() if NPM_DETECTOR.match([name])}
+        if not declared:
+            return
+        try:
+            with self.repo.open(file_path) as stream:
+                resolved, scanned = resolve_versions(stream, os.path.basename(file_path), declared)
+        except Exception as e:
+            print(f"Error analyzing {file_path}: {e}")
+            return
+        
+        # Versions per detected name (e.g. `next.js` from the `next` package); type
+        # packages (`@types/react`) are versioned apart from what they describe
+        detected_versions = {}
+        for package, version in resolved.items():
+            if package.startswith('@types/'):
+                continue
+            for names in NPM_DETECTOR.match([package]).values():
+                for name in names:
+                    detected_versions.setdefault(name, version)
+        self.analysis['dependency_analysis'][file_path] = {
+            'entries_scanned': scanned,
+            'resolved_versions': resolved,
+            'detected_versions': detected_versions
+        }
+    
     def _analyze_requirements_txt(self, file_path: str):
         """Analyze Python requirements.txt"""
         try:
-            # Try different encodings to handle various file formats
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            lines = []
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        lines = f.readlines()
-                    break
-                except UnicodeDecodeError:
-                    continue
+            lines = self._read_text(file_path).splitlines(keepends=True)
             
             if not lines:
                 print(f"⚠️ Could not decode {file_path} with any encoding")
@@ -233,41 +382,10 @@ class DeepProjectAnalyzer:
             
             self.analysis['package_managers'].append('pip')
             
-            # Framework detection
-            frameworks = {
-                'django': ['django', 'Django'],
-                'flask': ['flask', 'Flask'],
-                'fastapi': ['fastapi', 'FastAPI'],
-                'streamlit': ['streamlit'],
-                'gradio': ['gradio'],
-                'pytorch': ['torch', 'pytorch'],
-                'tensorflow': ['tensorflow', 'tf'],
-                'scikit-learn': ['sklearn', 'scikit-learn'],
-                'pandas': ['pandas'],
-                'numpy': ['numpy'],
-                'opencv': ['opencv', 'cv2']
-            }
-            
             deps = [line.strip().split('==')[0].split('>=')[0].split('<=')[0].lower() for line in lines if line.strip() and not line.startswith('#')]
             
-            for framework, indicators in frameworks.items():
-                if any(any(indicator.lower() in dep for indicator in indicators) for dep in deps):
-                    if framework not in self.analysis['frameworks']:
-                        self.analysis['frameworks'].append(framework)
-            
-            # Database detection
-            db_indicators = {
-                'postgresql': ['psycopg2', 'asyncpg'],
-                'mysql': ['pymysql', 'mysql-connector'],
-                'sqlite': ['sqlite3'],
-                'mongodb': ['pymongo', 'motor'],
-                'redis': ['redis', 'aioredis']
-            }
-            
-            for db, indicators in db_indicators.items():
-                if any(any(indicator.lower() in dep for indicator in indicators) for dep in deps):
-                    if db not in self.analysis['databases']:
-                        self.analysis['databases'].append(db)
+            # Frameworks and database drivers, matched on normalized project names
+            self._add_detected(PYPI_DETECTOR.match(normalize_requirement(line) for line in lines if not line.startswith('#')))
             
             self.analysis['dependency_analysis']['requirements.txt'] = {
                 'total_dependencies': len(deps),
@@ -281,8 +399,7 @@ class DeepProjectAnalyzer:
         """Analyze Python pyproject.toml"""
         try:
             import toml
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = toml.load(f)
+            data = toml.loads(self._read_text(file_path))
             
             # Build system detection
             build_system = data.get('build-system', {})
@@ -333,171 +450,493 @@ class DeepProjectAnalyzer:
         self.analysis['main_technologies'].append('c++')
         self.analysis['build_tools'].append('cmake')
     
+    def analyze_file(self, file_path: str, size: Optional[int] = None) -> bool:
+        """
+        Run the per-file analyzer for one source file; returns False for unsupported
+        types and for files skipped because the time or byte budget is spent
+        """
+        method = CODE_FILE_ANALYZERS.get(os.path.splitext(file_path)[1].lower())
+        if not method or file_path in self.analyzed_files or file_path in self.skipped_files:
+            return False
+        if size is None:
+            size = self.repo.stat(file_path).size
+        record = self.baseline.record(file_path) if self.baseline else None
+        if record is not None:
+            # Unchanged since the baseline commit: nothing is read, no budget is spent
+            self.bytes_analyzed += size
+            self.analyzed_files.add(file_path)
+            self.reused_files += 1
+            self._merge_file_record(file_path, record)
+            return True
+        if not self.file_cache or os.path.splitext(file_path)[1].lower() in STREAMED_EXTENSIONS:
+            if not self._reserve_budget(file_path, size):
+                return False
+            self.analyzed_files.add(file_path)
+            try:
+                record = self._collect_file_record(method, file_path)
+            except Exception as e:
+                print(f"⚠️ Error analyzing {file_path}: {e}")
+                return True
+            self._merge_file_record(file_path, record)
+            return True
+        
+        # A blob SHA the view lists (sparse fetch) is looked up without reading anything
+        blob_sha = self._listed_blob_sha(file_path)
+        record = self.file_cache.get(blob_sha, file_path) if blob_sha else None
+        if record is not None:
+            # A cache hit costs no budget, but counts as analyzed bytes like the original did
+            self.bytes_analyzed += size
+            self.analyzed_files.add(file_path)
+            self.cached_files += 1
+            self._merge_file_record(file_path, record)
+            return True
+        # Otherwise the file has to be read, so the budgets are checked first
+        if not self._reserve_budget(file_path, size):
+            return False
+        self.analyzed_files.add(file_path)
+        blob_sha, record, source = self._load_cached_file_record(file_path, blob_sha)
+        if record is not None:
+            self.cached_files += 1
+            self._merge_file_record(file_path, record)
+            return True
+        try:
+            self._source = source
+            try:
+                record = self._collect_file_record(method, file_path)
+            except Exception as e:
+                print(f"⚠️ Error analyzing {file_path}: {e}")
+                return True
+            # Only records computed from content actually read are cached
+            if source is not None:
+                self.file_cache.put(blob_sha, file_path, record)
+            self._merge_file_record(file_path, record)
+            return True
+        finally:
+            self._source = None
+            if source is not None:
+                source.close()
+    
+    def analyze_arriving_file(self, file_path: str) -> bool:
+        """
+        analyze_file for a file of an archive still streaming in. Its record is held back
+        rather than merged: a huge tree is sampled once it is complete, and the sample
+        may leave the file out (see _analyze_code_files).
+        """
+        before = (self.bytes_analyzed, self.cached_files, self.reused_files)
+        self._holding = {}
+        try:
+            analyzed = self.analyze_file(file_path)
+        finally:
+            held, self._holding = self._holding, None
+        if analyzed:
+            counted = (self.bytes_analyzed - before[0], self.cached_files - before[1], self.reused_files - before[2])
+            self.held_files[file_path] = (held.get(file_path), counted)
+        return analyzed
+    
+    def _listed_blob_sha(self, file_path: str) -> Optional[str]:
+        """The file's blob SHA when the view knows it without reading (sparse fetch lists it)"""
+        return getattr(self.repo, 'blob_shas', {}).get(file_path)
+    
+    def _load_cached_file_record(self, file_path: str, blob_sha: Optional[str]) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[SourceFile]]:
+        """
+        (blob SHA, cached record or None, loaded source or None) for one file. The file
+        is loaded, and hashed and looked up unless its SHA was listed (and already
+        missed); on a miss it stays loaded for the analysis.
+        """
+        try:
+            source = load_source(self.repo, file_path)
+        except Exception:
+            return blob_sha, None, None
+        if not blob_sha:
+            blob_sha = git_blob_sha(source.data)
+            record = self.file_cache.get(blob_sha, file_path)
+            if record is not None:
+                source.close()
+                return blob_sha, record, None
+        return blob_sha, None, source
+    
+    def _collect_file_record(self, method: str, file_path: str) -> Dict[str, Any]:
+        """Run one per-file analyzer against empty analysis fields and return its non-empty contributions"""
+        analysis = self.analysis
+        self.analysis = _empty_analysis()
+        try:
+            getattr(self, method)(file_path)
+            return {key: value for key, value in self.analysis.items() if value}
+        finally:
+            self.analysis = analysis
+    
+    def _reserve_budget(self, file_path: str, size: int) -> bool:
+        """Account for one file against the budgets, recording it as skipped when it does not fit"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.skipped_files[file_path] = 'deadline'
+            return False
+        size = min(size, STREAMED_EXTENSIONS.get(os.path.splitext(file_path)[1].lower(), size))
+        if self.byte_budget and self.bytes_analyzed + size > self.byte_budget:
+            self.skipped_files[file_path] = 'byte_budget'
+            return False
+        self.bytes_analyzed += size
+        return True
+    
     def _analyze_code_files(self):
-        """Analyze actual code files for deep insights"""
-        code_extensions = {
-            '.py': self._analyze_python_file,
-            '.js': self._analyze_javascript_file,
-            '.ts': self._analyze_typescript_file,
-            '.jsx': self._analyze_react_file,
-            '.tsx': self._analyze_react_file,
-            '.java': self._analyze_java_file,
-            '.cpp': self._analyze_cpp_file,
-            '.c': self._analyze_c_file,
-            '.rs': self._analyze_rust_file,
-            '.go': self._analyze_go_file,
-            '.php': self._analyze_php_file,
-            '.rb': self._analyze_ruby_file,
-            '.swift': self._analyze_swift_file,
-            '.kt': self._analyze_kotlin_file
+        """Analyze actual code files for deep insights, highest-value files first"""
+        # Files held back while streaming rejoin the pending ones, so that a sample is drawn
+        # from the whole tree and does not count them as certain
+        held, self.held_files = self.held_files, {}
+        for file_path, (_, (size, cached, reused)) in held.items():
+            self.analyzed_files.discard(file_path)
+            self.bytes_analyzed -= size
+            self.cached_files -= cached
+            self.reused_files -= reused
+        
+        pending = sorted((entry for entry in self.index.files
+                          if entry.ext in CODE_FILE_ANALYZERS
+                          and entry.path not in self.analyzed_files and entry.path not in self.skipped_files),
+                         key=_file_priority)
+        
+        population = len(self.analyzed_files) + len(pending)
+        if ANALYSIS_SAMPLE_THRESHOLD and population > ANALYSIS_SAMPLE_THRESHOLD:
+            pending = self._sample_files(pending)
+        
+        # Held records of the files still pending are merged without analyzing them again
+        remaining = []
+        for entry in pending:
+            if entry.path not in held:
+                remaining.append(entry)
+                continue
+            record, (size, cached, reused) = held[entry.path]
+            self.analyzed_files.add(entry.path)
+            self.bytes_analyzed += size
+            self.cached_files += cached
+            self.reused_files += reused
+            if record is not None:
+                self._merge_file_record(entry.path, record)
+        pending = remaining
+        
+        jobs = self._worker_count(len(pending))
+        if jobs > 1:
+            try:
+                self._analyze_files_parallel(pending, jobs)
+                return
+            except (OSError, ImportError, BrokenProcessPool) as e:
+                # e.g. no /dev/shm for the pool's semaphores in some serverless sandboxes
+                print(f"⚠️ Parallel analysis unavailable ({e}), analyzing serially")
+        
+        for entry in pending:
+            self.analyze_file(entry.path, entry.size)
+    
+    def _record_coverage(self):
+        """Record how much of the source was analyzed; `complete` is False when a budget cut it short"""
+        skipped_bytes = 0
+        for file_path in self.skipped_files:
+            entry = self.index.get(file_path)
+            skipped_bytes += entry.size if entry else 0
+        self.analysis['coverage'] = {
+            'complete': not self.skipped_files,
+            'files_analyzed': len(self.analyzed_files),
+            'files_skipped': len(self.skipped_files),
+            'bytes_analyzed': self.bytes_analyzed,
+            'bytes_skipped': skipped_bytes,
+            'stopped_by': sorted(set(self.skipped_files.values())),
+            'sampled': self.sample is not None,
+            'population_files': self.sample.population_size if self.sample else len(self.analyzed_files) + len(self.skipped_files)
         }
+        if self.skipped_files:
+            print(f"⏱️ Partial analysis: {len(self.analyzed_files)} source files analyzed, "
+                  f"{len(self.skipped_files)} skipped ({', '.join(self.analysis['coverage']['stopped_by'])})")
+    
+    def _sample_files(self, pending: List) -> List:
+        """
+        Keep a stratified sample of the source files (per top-level directory and language).
+        Files already analyzed and shallow entry points are always part of it.
+        """
+        source_files = [entry for entry in self.index.files if entry.ext in CODE_FILE_ANALYZERS]
+        certain = set(self.analyzed_files)
+        certain.update(entry.path for entry in pending
+                       if _file_priority(entry)[:2] <= (0, 2))
+        self.sample = StratifiedSample(source_files, ANALYSIS_SAMPLE_SIZE, certain)
+        chosen = set(self.sample.paths)
+        print(f"🎯 Sampling {len(chosen)} of {len(source_files)} source files across {len(self.sample.strata)} strata")
+        return [entry for entry in pending if entry.path in chosen]
+    
+    def _worker_count(self, file_count: int) -> int:
+        jobs = ANALYZER_JOBS if self.jobs is None else self.jobs
+        if jobs <= 0:
+            if file_count < PARALLEL_MIN_FILES:
+                return 1
+            jobs = os.cpu_count() or 1
+        return max(1, min(jobs, file_count))
+    
+    def _analyze_files_parallel(self, entries: List, jobs: int):
+        """
+        Fan per-file analysis out to a process pool in chunks of similar byte size.
+        Workers return one record per file; records are merged in priority order, so the
+        result is identical to analyzing the files one by one. Files unchanged since the
+        baseline, and cached files whose blob SHA the view lists, never reach the pool.
+        The budgets are applied here before anything is read. Files are then hashed and
+        looked up in the cache, holding the misses' contents only up to what two chunks
+        per worker would; the pool is sized for the misses (and not started for too few).
+        Past that bound a chunk is read and hashed only when it is submitted, with at
+        most two chunks per worker in flight. Workers stop at the deadline and return
+        None for the files they skipped.
+        """
+        reused: Dict[str, Dict[str, Any]] = {}
+        cached: Dict[str, Dict[str, Any]] = {}
+        if self.baseline:
+            for entry in entries:
+                record = self.baseline.record(entry.path)
+                if record is not None:
+                    reused[entry.path] = record
+        if self.file_cache:
+            for entry in entries:
+                blob_sha = self._listed_blob_sha(entry.path)
+                if blob_sha and entry.path not in reused and entry.ext not in STREAMED_EXTENSIONS:
+                    record = self.file_cache.get(blob_sha, entry.path)
+                    if record is not None:
+                        cached[entry.path] = record
+        order = entries
+        entries = [entry for entry in entries if entry.path not in reused and entry.path not in cached
+                   and self._reserve_budget(entry.path, entry.size)]
+        streamed: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            if entry.ext in STREAMED_EXTENSIONS:
+                try:
+                    streamed[entry.path] = self._collect_file_record(CODE_FILE_ANALYZERS[entry.ext], entry.path)
+                except Exception as e:
+                    print(f"⚠️ Error analyzing {entry.path}: {e}")
+                    streamed[entry.path] = {}
+        entries = [entry for entry in entries if entry.path not in streamed]
         
-        for root, dirs, files in os.walk(self.repo_path):
-            # Skip common ignore directories
-            dirs[:] = [d for d in dirs if d not in ['.git', '__pycache__', 'node_modules', '.venv', 'venv', 'target', 'dist', 'build', '.next']]
+        results = {}
+        # Cache hits found by hashing, and the blob SHA of every file sent to a worker
+        hashed_hits: Dict[str, Dict[str, Any]] = {}
+        blob_shas: Dict[str, str] = {}
+        # Files are read and looked up in the cache before any pool exists, so a rerun whose
+        # files are all cached never starts one. Misses are held until they fill what the
+        # pool keeps in flight; the files after that are read (and hashed) per chunk.
+        preread: Dict[str, Optional[bytes]] = {}
+        position = 0
+        if self.file_cache:
+            held_bytes, in_flight_bytes = 0, jobs * 2 * PARALLEL_CHUNK_BYTES
+            while position < len(entries) and held_bytes < in_flight_bytes:
+                if self.deadline is not None and time.monotonic() > self.deadline:
+                    break
+                for file_path, data in self._read_chunk(entries[position:position + 1], hashed_hits, blob_shas):
+                    preread[file_path] = data
+                    held_bytes += len(data or b'')
+                position += 1
+        entries = [entry for entry in entries[:position] if entry.path in preread] + entries[position:]
+        
+        if entries:
+            total_bytes = sum(entry.size for entry in entries)
+            # Sized for the misses only; too few of them are analyzed in this process
+            jobs = self._worker_count(len(entries))
+            # At least a few chunks per worker so one large chunk does not hold up the rest
+            chunk_bytes = max(1, min(PARALLEL_CHUNK_BYTES, total_bytes // (jobs * 4)))
+            chunks, current, current_bytes = [], [], 0
+            for entry in entries:
+                if current and current_bytes + entry.size > chunk_bytes:
+                    chunks.append(current)
+                    current, current_bytes = [], 0
+                current.append(entry)
+                current_bytes += entry.size
+            if current:
+                chunks.append(current)
             
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_ext = os.path.splitext(file)[1].lower()
-                
-                if file_ext in code_extensions:
-                    try:
-                        code_extensions[file_ext](file_path)
-                    except Exception as e:
-                        print(f"⚠️ Error analyzing {file_path}: {e}")
+            # Largest chunks first for better load balancing
+            waiting = sorted(chunks, key=lambda chunk: -sum(entry.size for entry in chunk))
+            if jobs == 1:
+                print(f"⚙️ Analyzing {len(entries)} uncached source files in this process")
+                for chunk in waiting:
+                    if self.deadline is not None and time.monotonic() > self.deadline:
+                        results.update((entry.path, None) for entry in chunk)
+                        continue
+                    files = self._read_chunk(chunk, hashed_hits, blob_shas, preread)
+                    results.update(zip((path for path, _ in files), _analyze_file_chunk(files, self.deadline)))
+            else:
+                print(f"⚙️ Analyzing {len(entries)} source files in {len(chunks)} chunks across {jobs} workers")
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    running = {}
+                    while waiting or running:
+                        while waiting and len(running) < jobs * 2:
+                            chunk = waiting.pop(0)
+                            if self.deadline is not None and time.monotonic() > self.deadline:
+                                results.update((entry.path, None) for entry in chunk)
+                                continue
+                            files = self._read_chunk(chunk, hashed_hits, blob_shas, preread)
+                            if files:
+                                running[pool.submit(_analyze_file_chunk, files, self.deadline)] = [path for path, _ in files]
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            results.update(zip(running.pop(future), future.result()))
+        
+        for entry in order:
+            if entry.path in reused:
+                self.bytes_analyzed += entry.size
+                self.reused_files += 1
+                record = reused[entry.path]
+            elif entry.path in cached:
+                self.bytes_analyzed += entry.size
+                self.cached_files += 1
+                record = cached[entry.path]
+            elif entry.path in streamed:
+                record = streamed[entry.path]
+            elif entry.path in hashed_hits:
+                self.cached_files += 1
+                record = hashed_hits[entry.path]
+            elif entry.path in results:
+                record = results[entry.path]
+                if record is None:
+                    self.skipped_files[entry.path] = 'deadline'
+                    self.bytes_analyzed -= entry.size
+                    continue
+                if entry.path in blob_shas:
+                    self.file_cache.put(blob_shas[entry.path], entry.path, record)
+            else:
+                continue  # over the byte budget
+            self.analyzed_files.add(entry.path)
+            self._merge_file_record(entry.path, record)
+    
+    def _read_chunk(self, chunk: List, hashed_hits: Dict[str, Dict[str, Any]], blob_shas: Dict[str, str],
+                    preread: Optional[Dict[str, Optional[bytes]]] = None) -> List[Tuple[str, Optional[bytes]]]:
+        """
+        (path, bytes) of a chunk's files for a worker. With the file cache on, each file
+        is hashed once read; hits go to `hashed_hits` instead, misses record their SHA.
+        Files in `preread` were read and looked up already and are taken from it.
+        """
+        files = []
+        for entry in chunk:
+            if preread and entry.path in preread:
+                files.append((entry.path, preread.pop(entry.path)))
+                continue
+            try:
+                data = self.repo.read_bytes(entry.path)
+            except Exception:
+                # The worker reports the unreadable file just like the serial path would
+                files.append((entry.path, None))
+                continue
+            if self.file_cache:
+                # A SHA the view listed was looked up before the budget check
+                blob_sha = self._listed_blob_sha(entry.path)
+                if not blob_sha:
+                    blob_sha = git_blob_sha(data)
+                    record = self.file_cache.get(blob_sha, entry.path)
+                    if record is not None:
+                        hashed_hits[entry.path] = record
+                        continue
+                blob_shas[entry.path] = blob_sha
+            files.append((entry.path, data))
+        return files
+    
+    def _merge_file_record(self, file_path: str, record: Dict[str, Any]):
+        """Fold one file's contributions into self.analysis, keeping them for the next incremental run"""
+        if self._holding is not None:
+            self._holding[file_path] = record
+            return
+        self.file_records[file_path] = record
+        for key, value in record.items():
+            target = self.analysis[key]
+            if isinstance(target, dict):
+                target.update(value)
+            elif key in UNIQUE_FIELDS:
+                for item in value:
+                    if item not in target:
+                        target.append(item)
+            else:
+                target.extend(value)
+    
+    def _read_text(self, file_path: str) -> str:
+        """Read a repository file once and decode it with its declared (BOM / PEP 263) or sniffed encoding"""
+        if self._source is not None and self._source.path == file_path:
+            return self._source.text
+        return read_source_text(self.repo, file_path)
     
     def _analyze_python_file(self, file_path: str):
         """Deep analysis of Python files"""
         try:
-            # Try different encodings to handle various file formats
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            content = ""
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
+            content = self._read_text(file_path)
             
             if not content:
                 print(f"⚠️ Could not decode {file_path} with any encoding")
                 return
             
-            # Parse AST for detailed analysis
+            # One parse and one AST pass per file (see python_extract)
             try:
-                tree = ast.parse(content)
-                
-                # Extract imports to understand dependencies
-                imports = []
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            imports.append(alias.name)
-                    elif isinstance(node, ast.ImportFrom):
-                        if node.module:
-                            imports.append(node.module)
-                
-                # Detect frameworks and libraries from imports
-                framework_indicators = {
-                    'django': ['django', 'rest_framework'],
-                    'flask': ['flask'],
-                    'fastapi': ['fastapi', 'uvicorn'],
-                    'streamlit': ['streamlit'],
-                    'pytorch': ['torch', 'torchvision'],
-                    'tensorflow': ['tensorflow', 'keras'],
-                    'scikit-learn': ['sklearn'],
-                    'opencv': ['cv2'],
-                    'requests': ['requests'],
-                    'sqlalchemy': ['sqlalchemy']
-                }
-                
-                for framework, indicators in framework_indicators.items():
-                    if any(any(indicator in imp for indicator in indicators) for imp in imports):
-                        if framework not in self.analysis['frameworks']:
-                            self.analysis['frameworks'].append(framework)
-                
-                # Extract classes and functions for functionality analysis
-                classes = []
-                functions = []
-                
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.ClassDef):
-                        classes.append({
-                            'name': node.name,
-                            'docstring': ast.get_docstring(node),
-                            'methods': [n.name for n in node.body if isinstance(n, ast.FunctionDef)]
-                        })
-                    elif isinstance(node, ast.FunctionDef):
-                        functions.append({
-                            'name': node.name,
-                            'docstring': ast.get_docstring(node),
-                            'args': [arg.arg for arg in node.args.args]
-                        })
-                
-                # Store file analysis
-                rel_path = os.path.relpath(file_path, self.repo_path)
-                self.analysis['file_analysis'][rel_path] = {
-                    'type': 'python',
-                    'imports': imports,
-                    'classes': classes,
-                    'functions': functions,
-                    'lines': len(content.split('\n'))
-                }
-                
-                # Detect API endpoints
-                if any('app.route' in content or '@app.' in content or 'router.' in content for content in [content]):
-                    self._extract_api_endpoints_python(content, rel_path)
-                
-                # Detect data models
-                if any('class' in content and ('Model' in content or 'Schema' in content) for content in [content]):
-                    self._extract_data_models_python(classes, rel_path)
-                
-            except SyntaxError:
+                record = extract_python_symbols(content, file_path)
+            except (SyntaxError, RecursionError):
                 # File might have syntax errors, skip AST analysis
-                pass
+                return
+            self._add_python_record(file_path, record)
                 
         except Exception as e:
             print(f"Error analyzing Python file {file_path}: {e}")
     
-    def _analyze_javascript_file(self, file_path: str):
-        """Analyze JavaScript files"""
+    def _add_python_record(self, file_path: str, record: Dict[str, Any]):
+        """Fold one extract_python_symbols record into the analysis"""
+        # Detect frameworks and libraries from imports
+        self._add_detected(PYTHON_IMPORT_DETECTOR.match(imp.partition('.')[0] for imp in record['imports']))
+        
+        # Store a compact file record (see file_records)
+        self.analysis['file_analysis'][file_path] = FileRecord.from_python(record)
+        
+        # API endpoints and data models found in the same pass
+        self.analysis['api_endpoints'].extend(record['routes'])
+        self.analysis['data_models'].extend(record['models'])
+    
+    def _analyze_notebook_file(self, file_path: str):
+        """Code cells of a Python Jupyter notebook, streamed so that outputs are never decoded (see notebooks)"""
         try:
-            # Try different encodings to handle various file formats
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            content = ""
+            with self.repo.open(file_path) as stream:
+                notebook = read_notebook(stream)
+            if not notebook.is_python or not notebook.code_cells:
+                return
             
-            for encoding in encodings:
+            # The code cells make up one module, as if the notebook were exported as a script
+            cells = [python_cell(source) for source in notebook.code_cells]
+            try:
+                record = extract_python_symbols('\n\n'.join(cells), file_path)
+            except (SyntaxError, RecursionError):
+                # One broken cell should not hide the rest of the notebook
                 try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
+                    record = extract_python_symbols('\n\n'.join(parseable_cells(cells)), file_path)
+                except (SyntaxError, RecursionError):
+                    return
+            self._add_python_record(file_path, record)
+        
+        except Exception as e:
+            print(f"Error analyzing notebook {file_path}: {e}")
+    
+    def _analyze_javascript_file(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Analyze JavaScript/TypeScript files; returns the file's scan record"""
+        try:
+            content = self._read_text(file_path)
             
             if not content:
                 print(f"⚠️ Could not decode {file_path} with any encoding")
-                return
-            
-            # Detect frameworks and patterns
-            if 'import React' in content or 'from \'react\'' in content:
-                if 'react' not in self.analysis['frameworks']:
-                    self.analysis['frameworks'].append('react')
+                return None
             
-            if 'import Vue' in content or 'from \'vue\'' in content:
-                if 'vue' not in self.analysis['frameworks']:
-                    self.analysis['frameworks'].append('vue')
+            # One tokenizer-level pass: imports, exports, components, hooks (see js_scan)
+            scan = scan_script(content, allow_jsx=not file_path.endswith('.ts'))
+            packages = [package for package in map(import_package, scan['imports']) if package]
+            self._add_detected(NPM_DETECTOR.match(packages))
             
-            if 'express()' in content or 'app.get(' in content:
-                if 'express' not in self.analysis['frameworks']:
-                    self.analysis['frameworks'].append('express')
+            kind = 'typescript' if file_path.endswith(('.ts', '.tsx')) else 'javascript'
+            self.analysis['file_analysis'][file_path] = FileRecord.from_script(kind, scan)
+            for component in scan['components']:
+                self.analysis['ui_components'].append({
+                    'name': component,
+                    'file': file_path,
+                    'type': 'react_component'
+                })
             
-            # Extract API endpoints
-            self._extract_api_endpoints_js(content, os.path.relpath(file_path, self.repo_path))
+            # API endpoints and ORM models, in one scan (see route_extract)
+            routes, models = extract_js_routes(content, file_path)
+            self.analysis['api_endpoints'].extend(routes)
+            self.analysis['data_models'].extend(models)
+            return scan
             
         except Exception as e:
             print(f"Error analyzing JavaScript file {file_path}: {e}")
+            return None
     
     def _analyze_typescript_file(self, file_path: str):
         """Analyze TypeScript files"""
@@ -506,41 +945,11 @@ class DeepProjectAnalyzer:
             self.analysis['main_technologies'].append('typescript')
     
     def _analyze_react_file(self, file_path: str):
-        """Analyze React component files"""
-        try:
-            # Try different encodings to handle various file formats
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            content = ""
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if not content:
-                print(f"⚠️ Could not decode {file_path} with any encoding")
-                return
-            
-            if 'react' not in self.analysis['frameworks']:
-                self.analysis['frameworks'].append('react')
-            
-            # Extract component information
-            component_match = re.search(r'(?:export\s+default\s+)?(?:function|const)\s+(\w+)', content)
-            if component_match:
-                component_name = component_match.group(1)
-                rel_path = os.path.relpath(file_path, self.repo_path)
-                
-                self.analysis['ui_components'].append({
-                    'name': component_name,
-                    'file': rel_path,
-                    'type': 'react_component'
-                })
-                
-        except Exception as e:
-            print(f"Error analyzing React file {file_path}: {e}")
+        """Analyze React component files (.jsx/.tsx)"""
+        scan = self._analyze_javascript_file(file_path)
+        # JSX in a .jsx/.tsx file means React even without an explicit import (new JSX transform)
+        if scan and scan['jsx'] and 'react' not in self.analysis['frameworks']:
+            self.analysis['frameworks'].append('react')
     
     def _analyze_java_file(self, file_path: str):
         """Analyze Java files"""
@@ -589,16 +998,8 @@ class DeepProjectAnalyzer:
     
     def _analyze_configuration(self):
         """Analyze configuration files"""
-        config_files = [
-            'docker-compose.yml', 'Dockerfile', '.env', '.env.example',
-            'vercel.json', 'netlify.toml', 'next.config.js', 'nuxt.config.js',
-            'webpack.config.js', 'vite.config.js', 'tailwind.config.js',
-            'tsconfig.json', 'babel.config.js', '.eslintrc', 'prettier.config.js'
-        ]
-        
-        for config_file in config_files:
-            file_path = os.path.join(self.repo_path, config_file)
-            if os.path.exists(file_path):
+        for config_file in CONFIG_FILES:
+            if self.index.exists(config_file):
                 self.analysis['config_files'].append(config_file)
                 
                 # Detect deployment targets
@@ -611,22 +1012,12 @@ class DeepProjectAnalyzer:
                 
                 # Extract environment variables
                 if config_file in ['.env.example', '.env']:
-                    self._extract_env_variables(file_path)
+                    self._extract_env_variables(config_file)
     
     def _extract_env_variables(self, file_path: str):
         """Extract environment variables from .env files"""
         try:
-            # Try different encodings to handle various file formats
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            lines = []
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        lines = f.readlines()
-                    break
-                except UnicodeDecodeError:
-                    continue
+            lines = self._read_text(file_path).splitlines(keepends=True)
             
             if not lines:
                 print(f"⚠️ Could not decode {file_path} with any encoding")
@@ -663,8 +1054,7 @@ class DeepProjectAnalyzer:
         doc_files = ['README.md', 'CHANGELOG.md', 'CONTRIBUTING.md', 'LICENSE', 'docs/', 'documentation/']
         
         for doc_file in doc_files:
-            file_path = os.path.join(self.repo_path, doc_file)
-            if os.path.exists(file_path):
+            if self.index.exists(doc_file):
                 self.analysis['documentation_files'].append(doc_file)
     
     def _detect_project_type(self):
@@ -723,14 +1113,14 @@ class DeepProjectAnalyzer:
             functionality.append('Machine learning with PyTorch')
         
         # Based on file analysis
-        for file_path, analysis in self.analysis['file_analysis'].items():
-            if analysis['type'] == 'python':
-                for func in analysis['functions']:
-                    if func['name'] in ['train', 'predict', 'model']:
+        for file_path, record in self.analysis['file_analysis'].items():
+            if record.kind == 'python':
+                for func in record.functions:
+                    if func.name in ['train', 'predict', 'model']:
                         functionality.append('Machine learning model training and prediction')
                         break
-                for cls in analysis['classes']:
-                    if 'Model' in cls['name']:
+                for cls in record.classes:
+                    if 'Model' in cls.name:
                         functionality.append('Data modeling and database operations')
                         break
         
@@ -748,63 +1138,73 @@ class DeepProjectAnalyzer:
         
         self.analysis['actual_functionality'] = functionality
     
-    def _extract_api_endpoints_python(self, content: str, file_path: str):
-        """Extract API endpoints from Python files"""
-        # Flask routes
-        flask_routes = re.findall(r'@app\.route\([\'"]([^\'"]+)[\'"](?:,\s*methods=\[([^\]]+)\])?\)', content)
-        for route, methods in flask_routes:
-            self.analysis['api_endpoints'].append({
-                'path': route,
-                'methods': methods.replace("'", "").replace('"', '').split(', ') if methods else ['GET'],
-                'file': file_path,
-                'framework': 'flask'
-            })
-        
-        # FastAPI routes
-        fastapi_routes = re.findall(r'@app\.(get|post|put|delete|patch)\([\'"]([^\'"]+)[\'"]', content)
-        for method, route in fastapi_routes:
-            self.analysis['api_endpoints'].append({
-                'path': route,
-                'methods': [method.upper()],
-                'file': file_path,
-                'framework': 'fastapi'
-            })
-    
-    def _extract_api_endpoints_js(self, content: str, file_path: str):
-        """Extract API endpoints from JavaScript files"""
-        # Express routes
-        express_routes = re.findall(r'app\.(get|post|put|delete|patch)\([\'"]([^\'"]+)[\'"]', content)
-        for method, route in express_routes:
-            self.analysis['api_endpoints'].append({
-                'path': route,
-                'methods': [method.upper()],
-                'file': file_path,
-                'framework': 'express'
-            })
-    
-    def _extract_data_models_python(self, classes: List[Dict], file_path: str):
-        """Extract data models from Python classes"""
-        for cls in classes:
-            if any(keyword in cls['name'] for keyword in ['Model', 'Schema', 'Entity']):
-                self.analysis['data_models'].append({
-                    'name': cls['name'],
-                    'file': file_path,
-                    'methods': cls['methods'],
-                    'docstring': cls['docstring']
-                })
-    
     def _calculate_metrics(self):
         """Calculate code metrics"""
         total_files = len(self.analysis['file_analysis'])
-        total_lines = sum(analysis.get('lines', 0) for analysis in self.analysis['file_analysis'].values())
+        total_lines = sum(record.lines for record in self.analysis['file_analysis'].values())
         
         self.analysis['code_metrics'] = {
             'total_files': total_files,
             'total_lines': total_lines,
             'average_file_size': total_lines // total_files if total_files > 0 else 0,
-            'languages': list(set(analysis['type'] for analysis in self.analysis['file_analysis'].values())),
+            'languages': list(set(record.kind for record in self.analysis['file_analysis'].values())),
             'complexity_score': self._calculate_complexity_score()
         }
+        if self.sample:
+            self._extrapolate_metrics()
+        if self.analysis['workspace_packages']:
+            self._calculate_package_metrics()
+    
+    def _calculate_package_metrics(self):
+        """Analyzed source files, lines and languages per workspace package (a file counts for its innermost package)"""
+        packages = {entry['path']: entry for entry in self.analysis['workspace_packages']}
+        languages: Dict[str, set] = {path: set() for path in packages}
+        for entry in packages.values():
+            entry.update(source_files=0, lines=0)
+        for file_path, record in self.analysis['file_analysis'].items():
+            directory = file_path
+            while '/' in directory:
+                directory = directory.rpartition('/')[0]
+                if directory in packages:
+                    packages[directory]['source_files'] += 1
+                    packages[directory]['lines'] += record.lines
+                    languages[directory].add(record.kind)
+                    break
+        for path, entry in packages.items():
+            entry['languages'] = sorted(languages[path])
+    
+    def _extrapolate_metrics(self):
+        """Scale sampled code metrics up to the whole repository, with 95% margins"""
+        file_analysis = self.analysis['file_analysis']
+        
+        def measured(path: str, value: Callable[[FileRecord], float]) -> Optional[float]:
+            if path in file_analysis:
+                return value(file_analysis[path])
+            # Analyzed without a per-file record counts as zero; never analyzed is unknown
+            return 0 if path in self.analyzed_files else None
+        
+        files, files_margin = self.sample.estimate_total(lambda path: measured(path, lambda record: 1))
+        lines, lines_margin = self.sample.estimate_total(lambda path: measured(path, lambda record: record.lines))
+        average = lines / files if files else 0
+        # Ratio estimator margin from the residuals lines - average * files
+        _, residual_margin = self.sample.estimate_total(
+            lambda path: measured(path, lambda record: record.lines - average))
+        
+        self.analysis['code_metrics'].update({
+            'total_files': round(files),
+            'total_lines': round(lines),
+            'average_file_size': int(average),
+            'estimated': True,
+            'sample': {
+                'files': len(self.analyzed_files),
+                'population': self.sample.population_size,
+                'strata': len(self.sample.strata),
+                'confidence': 0.95,
+                'total_files_margin': round(files_margin),
+                'total_lines_margin': round(lines_margin),
+                'average_file_size_margin': round(residual_margin / files) if files else 0
+            }
+        })
     
     def _calculate_complexity_score(self) -> str:
         """Calculate project complexity score"""
@@ -832,12 +1232,57 @@ class DeepProjectAnalyzer:
             return 'Highly Complex'
 
 
-def enhance_analysis_context(repo_path: str) -> Dict[str, Any]:
+def _file_priority(entry) -> Tuple[int, int, int]:
+    """Sort key: entry points, then files under route/view directories, then shallow and small files"""
+    parts = entry.path.lower().split('/')
+    if parts[-1] in ENTRY_POINT_FILES:
+        rank = 0
+    elif any(part in ROUTE_DIRS for part in parts[:-1]):
+        rank = 1
+    else:
+        rank = 2
+    return rank, len(parts), entry.size
+
+
+def _analyze_file_chunk(files: List[Tuple[str, Optional[bytes]]], deadline: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Process-pool worker: analyze each file on its own and return its non-empty analysis
+    fields, or None for files left once `deadline` (a time.monotonic() value) has passed
+    """
+    repo = MemoryRepository('chunk')
+    for file_path, data in files:
+        if data is not None:
+            repo.add_file(file_path, data)
+    records = []
+    for file_path, data in files:
+        if deadline is not None and time.monotonic() > deadline:
+            records.append(None)
+            continue
+        # Budgets are enforced by the parent process
+        analyzer = DeepProjectAnalyzer(repo, jobs=1, time_budget=0, byte_budget=0, use_file_cache=False)
+        analyzer.analyze_file(file_path, len(data) if data is not None else 0)
+        records.append(analyzer.file_records.get(file_path, {}))
+    return records
+
+
+def analysis_is_complete(analysis_context: Dict[str, Any]) -> bool:
+    """False when a handler's analysis context came from a budget-limited (partial) analysis"""
+    coverage = analysis_context.get('enhanced_analysis', {}).get('coverage', {})
+    return coverage.get('complete', True)
+
+
+def enhance_analysis_context(repo: Union[str, LocalRepository, ZipRepository], jobs: Optional[int] = None,
+                             time_budget: Optional[float] = None, byte_budget: Optional[int] = None,
+                             baseline: Optional[AnalysisBaseline] = None) -> Dict[str, Any]:
     """
-    Enhanced analysis function that provides comprehensive project understanding
+    Enhanced analysis function that provides comprehensive project understanding.
+    When a budget runs out the analysis is partial; `coverage` says how much was seen.
+    With a baseline, files unchanged since its commit reuse their earlier records.
     """
     try:
-        analyzer = DeepProjectAnalyzer(repo_path)
+        # A streamed repository arrives with its source files already analyzed
+        analyzer = getattr(repo, 'analyzer', None) or DeepProjectAnalyzer(
+            repo, jobs=jobs, time_budget=time_budget, byte_budget=byte_budget, baseline=baseline)
         deep_analysis = analyzer.analyze_project()
         
         # Create enhanced context for AI
@@ -868,7 +1313,11 @@ def enhance_analysis_context(repo_path: str) -> Dict[str, Any]:
                 'entry_points': deep_analysis.get('entry_points', []),
                 'config_files': deep_analysis.get('config_files', []),
                 'documentation': deep_analysis.get('documentation_files', []),
-                'scripts': deep_analysis.get('scripts', [])[:5]  # First 5
+                'scripts': deep_analysis.get('scripts', [])[:5],  # First 5
+                'packages': [{'path': package['path'], 'name': package['name'], 'ecosystem': package['ecosystem'],
+                              'frameworks': package.get('frameworks', []), 'source_files': package.get('source_files', 0),
+                              'lines': package.get('lines', 0)}
+                             for package in deep_analysis.get('workspace_packages', [])[:30]]  # First 30
             },
             'environment': {
                 'required_variables': deep_analysis.get('environment_variables', [])[:10],  # First 10
@@ -876,7 +1325,11 @@ def enhance_analysis_context(repo_path: str) -> Dict[str, Any]:
                 'dependencies_summary': deep_analysis.get('dependency_analysis', {})
             },
             'metrics': deep_analysis.get('code_metrics', {}),
-            'raw_analysis': deep_analysis  # Full analysis for reference
+            'coverage': deep_analysis.get('coverage', {}),
+            # Lazy view for the handler's prompt assembly; handlers pop it before the context is cached
+            'raw_analysis': RawAnalysisView(deep_analysis),
+            # Per-file records for the next incremental analysis (see incremental.save_snapshot); popped too
+            'file_records': analyzer.file_records
         }
         
         return enhanced_context
@@ -911,7 +1364,8 @@ def enhance_analysis_context(repo_path: str) -> Dict[str, Any]:
                 'entry_points': [],
                 'config_files': [],
                 'documentation': [],
-                'scripts': []
+                'scripts': [],
+                'packages': []
             },
             'environment': {
                 'required_variables': [],
@@ -919,5 +1373,6 @@ def enhance_analysis_context(repo_path: str) -> Dict[str, Any]:
                 'dependencies_summary': {}
             },
             'metrics': {},
+            'coverage': {},
             'raw_analysis': {}
         }
\ No newline at end of file
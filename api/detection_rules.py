@@ -0,0 +1,156 @@
+"""
+Compiled technology detection rules
+Framework, database, test and build-tool indicators for npm packages, PyPI
+requirements and Python imports, compiled once at import time into exact-match
+hash maps plus a prefix trie (for scoped rules like `@angular/*`), so matching a
+manifest costs one dict lookup and one short trie walk per dependency
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+# Rule tables: analysis field -> detected name -> package patterns.
+# A pattern ending in `*` matches any name starting with the rest; all others match exactly.
+NPM_RULES = {
+    'frameworks': {
+        'react': ['react', '@types/react'],
+        'vue': ['vue', '@vue/*'],
+        'angular': ['angular', '@angular/*'],
+        'svelte': ['svelte', '@sveltejs/*'],
+        'next.js': ['next'],
+        'nuxt': ['nuxt', '@nuxt/*'],
+        'express': ['express'],
+        'fastify': ['fastify'],
+        'koa': ['koa'],
+        'nest': ['@nestjs/*'],
+        'electron': ['electron'],
+        'react-native': ['react-native']
+    },
+    'databases': {
+        'mongodb': ['mongoose', 'mongodb'],
+        'postgresql': ['pg', 'postgres', 'pg-promise', 'sequelize'],
+        'mysql': ['mysql', 'mysql2'],
+        'sqlite': ['sqlite3', 'better-sqlite3'],
+        'redis': ['redis', 'ioredis'],
+        'firebase': ['firebase', 'firebase-admin', '@firebase/*']
+    },
+    'testing_frameworks': {
+        'jest': ['jest', '@jest/*'],
+        'mocha': ['mocha'],
+        'chai': ['chai'],
+        'cypress': ['cypress'],
+        'playwright': ['playwright', '@playwright/*'],
+        'vitest': ['vitest']
+    },
+    'build_tools': {
+        'webpack': ['webpack', 'webpack-cli'],
+        'vite': ['vite'],
+        'rollup': ['rollup'],
+        'parcel': ['parcel'],
+        'esbuild': ['esbuild'],
+        'turbo': ['turbo'],
+        'lerna': ['lerna']
+    }
+}
+
+# Requirement names are matched after PEP 503 normalization (lowercase, `-` separators)
+PYPI_RULES = {
+    'frameworks': {
+        'django': ['django', 'djangorestframework', 'django-*'],
+        'flask': ['flask', 'flask-*'],
+        'fastapi': ['fastapi'],
+        'streamlit': ['streamlit'],
+        'gradio': ['gradio'],
+        'pytorch': ['torch', 'pytorch', 'torchvision', 'torchaudio'],
+        'tensorflow': ['tensorflow', 'tensorflow-*'],
+        'scikit-learn': ['scikit-learn', 'sklearn'],
+        'pandas': ['pandas'],
+        'numpy': ['numpy'],
+        'opencv': ['opencv', 'opencv-*']
+    },
+    'databases': {
+        'postgresql': ['psycopg*', 'asyncpg'],
+        'mysql': ['pymysql', 'mysqlclient', 'mysql-connector*'],
+        'sqlite': ['sqlite3'],
+        'mongodb': ['pymongo', 'motor'],
+        'redis': ['redis', 'aioredis']
+    }
+}
+
+# Top-level module names seen in `import` statements
+PYTHON_IMPORT_RULES = {
+    'frameworks': {
+        'django': ['django', 'rest_framework'],
+        'flask': ['flask', 'flask_*'],
+        'fastapi': ['fastapi', 'uvicorn'],
+        'streamlit': ['streamlit'],
+        'pytorch': ['torch', 'torchvision'],
+        'tensorflow': ['tensorflow', 'keras'],
+        'scikit-learn': ['sklearn'],
+        'opencv': ['cv2'],
+        'requests': ['requests'],
+        'sqlalchemy': ['sqlalchemy']
+    }
+}
+
+REQUIREMENT_NAME = re.compile(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def normalize_requirement(line: str) -> str:
+    """PEP 503 project name of a requirements.txt line (`Flask_Login>=0.6 ; ...` -> `flask-login`), or ''"""
+    match = REQUIREMENT_NAME.match(line)
+    if not match:
+        return ''
+    return re.sub(r'[-_.]+', '-', match.group(1)).lower()
+
+
+class RuleSet:
+    """A rule table compiled into an exact-match map and a prefix trie"""
+
+    _END = ''  # Trie key holding the rules that end at a node (never a real character)
+
+    def __init__(self, rules: Dict[str, Dict[str, Iterable[str]]]):
+        self._exact: Dict[str, List[int]] = {}
+        self._trie: Dict[str, dict] = {}
+        # (field, name) per rule, in table order so results keep a stable order
+        self._targets: List[Tuple[str, str]] = []
+        for field, names in rules.items():
+            for name, patterns in names.items():
+                target = len(self._targets)
+                self._targets.append((field, name))
+                for pattern in patterns:
+                    if pattern.endswith('*'):
+                        node = self._trie
+                        for char in pattern[:-1]:
+                            node = node.setdefault(char, {})
+                        node.setdefault(self._END, []).append(target)
+                    else:
+                        self._exact.setdefault(pattern, []).append(target)
+
+    def match(self, names: Iterable[str]) -> Dict[str, List[str]]:
+        """Detected names per analysis field, in rule-table order"""
+        exact, trie, end = self._exact, self._trie, self._END
+        hits = set()
+        for name in names:
+            targets = exact.get(name)
+            if targets:
+                hits.update(targets)
+            # Walk the trie along the name; every rule ending on the path is a prefix of it
+            node = trie
+            for char in name:
+                node = node.get(char)
+                if node is None:
+                    break
+                targets = node.get(end)
+                if targets:
+                    hits.update(targets)
+        detected: Dict[str, List[str]] = {}
+        for target in sorted(hits):
+            field, detected_name = self._targets[target]
+            detected.setdefault(field, []).append(detected_name)
+        return detected
+
+
+NPM_DETECTOR = RuleSet(NPM_RULES)
+PYPI_DETECTOR = RuleSet(PYPI_RULES)
+PYTHON_IMPORT_DETECTOR = RuleSet(PYTHON_IMPORT_RULES)
@@ -0,0 +1,176 @@
+"""
+Persistent per-file analysis cache
+Maps a source file's git blob SHA (computed the way git does, so it equals the SHAs the
+Trees API lists) to what the deep analyzer extracted from it, in a local SQLite
+database bounded by size. Forks, branches and successive commits share most blobs, so
+their analysis only does real work for the files that changed.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_records import contributions_as_json, contributions_from_json
+
+FILE_CACHE_PATH = os.getenv("FILE_ANALYSIS_CACHE_PATH", os.path.join(tempfile.gettempdir(), "readme_file_analysis.sqlite3"))
+# Total size of the stored (compressed) records; least recently used ones are evicted past it (0: disabled)
+FILE_CACHE_BYTES = int(os.getenv("FILE_ANALYSIS_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_records (
+    blob_sha TEXT NOT NULL,
+    path TEXT NOT NULL,
+    version TEXT NOT NULL,
+    record BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (blob_sha, path, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS file_records_used ON file_records (used);
+"""
+
+
+def git_blob_sha(data) -> str:
+    """SHA-1 of `blob <size>\\0<content>`, i.e. the object name git gives the file's content"""
+    digest = hashlib.sha1(b'blob %d\x00' % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(contributions_as_json(record), separators=(',', ':')).encode('utf-8'))
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    return contributions_from_json(json.loads(zlib.decompress(blob)))
+
+
+class FileAnalysisCache:
+    """
+    Per-file analysis records keyed by (blob SHA, path, analyzer version). The path is
+    part of the key because records name their file and some results derive from it
+    (e.g. Next.js route URLs). Writes and LRU touches are buffered and committed in one
+    transaction by flush(), which also evicts down to the byte budget.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None, version: str = ''):
+        self.path = path or FILE_CACHE_PATH
+        self.max_bytes = max_bytes or FILE_CACHE_BYTES
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, str, str, bytes, int, float]] = []
+        self._touched: List[Tuple[float, str, str, str]] = []
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error:
+            pass  # e.g. a filesystem without shared memory support; the default journal works too
+        self._db.executescript(SCHEMA)
+
+    def get(self, blob_sha: str, rel_path: str) -> Optional[Dict[str, Any]]:
+        """The cached record for this blob at this path, or None"""
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT record FROM file_records WHERE blob_sha = ? AND path = ? AND version = ?",
+                                       (blob_sha, rel_path, self.version)).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ File analysis cache lookup failed: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched.append((time.time(), blob_sha, rel_path, self.version))
+        try:
+            return _decode(row[0])
+        except (ValueError, KeyError, zlib.error):
+            return None
+
+    def contains(self, blob_sha: str, rel_path: str) -> bool:
+        with self._lock:
+            try:
+                return self._db.execute("SELECT 1 FROM file_records WHERE blob_sha = ? AND path = ? AND version = ?",
+                                        (blob_sha, rel_path, self.version)).fetchone() is not None
+            except sqlite3.Error:
+                return False
+
+    def put(self, blob_sha: str, rel_path: str, record: Dict[str, Any]):
+        """Buffer a record; it is written by the next flush()"""
+        try:
+            blob = _encode(record)
+        except (TypeError, ValueError) as e:
+            print(f"⚠️ Could not cache analysis of {rel_path}: {e}")
+            return
+        with self._lock:
+            self._pending.append((blob_sha, rel_path, self.version, blob, len(blob), time.time()))
+
+    def flush(self):
+        """Commit buffered records and LRU touches, then evict down to the byte budget"""
+        with self._lock:
+            pending, touched = self._pending, self._touched
+            self._pending, self._touched = [], []
+            if not pending and not touched:
+                return
+            try:
+                with self._db:
+                    self._db.executemany("INSERT OR REPLACE INTO file_records VALUES (?, ?, ?, ?, ?, ?)", pending)
+                    self._db.executemany("UPDATE file_records SET used = ? WHERE blob_sha = ? AND path = ? AND version = ?", touched)
+                self.stores += len(pending)
+                if pending:
+                    self._evict()
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not write the file analysis cache: {e}")
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM file_records").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Down to 90% of the budget so the next few flushes do not evict again
+        excess = total - int(self.max_bytes * 0.9)
+        victims = []
+        for blob_sha, path, version, size in self._db.execute(
+                "SELECT blob_sha, path, version, size FROM file_records ORDER BY used"):
+            victims.append((blob_sha, path, version))
+            excess -= size
+            if excess <= 0:
+                break
+        with self._db:
+            self._db.executemany("DELETE FROM file_records WHERE blob_sha = ? AND path = ? AND version = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            'stores': self.stores,
+            'evictions': self.evictions
+        }
+
+
+_file_cache = None
+
+
+def get_file_cache() -> Optional[FileAnalysisCache]:
+    """Process-wide per-file cache for the current analyzer version, or None when disabled"""
+    global _file_cache
+    if _file_cache is None and FILE_CACHE_BYTES > 0:
+        from .deep_analyzer import ANALYZER_VERSION
+        try:
+            _file_cache = FileAnalysisCache(version=ANALYZER_VERSION)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ File analysis cache unavailable: {e}")
+            return None
+    return _file_cache
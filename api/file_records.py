@@ -0,0 +1,148 @@
+"""
+Compact per-file analysis records
+The deep analyzer keeps one __slots__ record per analyzed source file instead of a dict
+of dicts: symbols are named tuples, names are interned (the same module, argument and
+method names recur across thousands of files) and docstrings are cut to what the prompt
+shows. The legacy dict shape is only materialized on access, through RawAnalysisView.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+# Docstrings are kept only as far as the prompt summary shows them
+DOCSTRING_CHARS = 80
+
+
+class FunctionSymbol(NamedTuple):
+    name: str
+    docstring: Optional[str]
+    args: Tuple[str, ...]
+
+
+class ClassSymbol(NamedTuple):
+    name: str
+    docstring: Optional[str]
+    methods: Tuple[str, ...]
+
+
+def _names(values: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(sys.intern(value) for value in values)
+
+
+def _doc(docstring: Optional[str]) -> Optional[str]:
+    return docstring[:DOCSTRING_CHARS] if docstring else docstring
+
+
+class FileRecord:
+    """What the analysis keeps about one source file"""
+
+    __slots__ = ('kind', 'lines', 'imports', 'classes', 'functions', 'exports', 'components', 'hooks')
+
+    def __init__(self, kind: str, lines: int, imports: Iterable[str] = (), classes: Tuple[ClassSymbol, ...] = (),
+                 functions: Tuple[FunctionSymbol, ...] = (), exports: Iterable[str] = (),
+                 components: Iterable[str] = (), hooks: Iterable[str] = ()):
+        self.kind = sys.intern(kind)
+        self.lines = lines
+        self.imports = _names(imports)
+        self.classes = classes
+        self.functions = functions
+        self.exports = _names(exports)
+        self.components = _names(components)
+        self.hooks = _names(hooks)
+
+    @classmethod
+    def from_python(cls, record: Dict[str, Any]) -> 'FileRecord':
+        """From an extract_python_symbols() record"""
+        return cls(
+            'python', record['lines'], record['imports'],
+            classes=tuple(ClassSymbol(sys.intern(c['name']), _doc(c['docstring']), _names(c['methods']))
+                          for c in record['classes']),
+            functions=tuple(FunctionSymbol(sys.intern(f['name']), _doc(f['docstring']), _names(f['args']))
+                            for f in record['functions'])
+        )
+
+    @classmethod
+    def from_script(cls, kind: str, scan: Dict[str, Any]) -> 'FileRecord':
+        """From a js_scan.scan_script() result"""
+        return cls(kind, scan['lines'], scan['imports'], exports=scan['exports'],
+                   components=scan['components'], hooks=scan['hooks'])
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> 'FileRecord':
+        """Inverse of as_dict (e.g. for records read back from the per-file cache)"""
+        if record['type'] == 'python':
+            return cls.from_python(record)
+        return cls(record['type'], record['lines'], record['imports'], exports=record['exports'],
+                   components=record['components'], hooks=record['hooks'])
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The legacy `file_analysis` entry (docstrings truncated to DOCSTRING_CHARS)"""
+        if self.kind == 'python':
+            return {
+                'type': self.kind,
+                'imports': list(self.imports),
+                'classes': [{'name': c.name, 'docstring': c.docstring, 'methods': list(c.methods)} for c in self.classes],
+                'functions': [{'name': f.name, 'docstring': f.docstring, 'args': list(f.args)} for f in self.functions],
+                'lines': self.lines
+            }
+        return {
+            'type': self.kind,
+            'imports': list(self.imports),
+            'exports': list(self.exports),
+            'components': list(self.components),
+            'hooks': list(self.hooks),
+            'lines': self.lines
+        }
+
+
+def contributions_as_json(record: Dict[str, Any]) -> Dict[str, Any]:
+    """A file's analysis contributions (see DeepProjectAnalyzer) with FileRecords as plain dicts"""
+    if 'file_analysis' not in record:
+        return record
+    return {**record, 'file_analysis': {path: file_record.as_dict() for path, file_record in record['file_analysis'].items()}}
+
+
+def contributions_from_json(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of contributions_as_json"""
+    if 'file_analysis' not in record:
+        return record
+    return {**record, 'file_analysis': {path: FileRecord.from_dict(value) for path, value in record['file_analysis'].items()}}
+
+
+class FileAnalysisView(Mapping):
+    """Read-only `file_analysis` mapping that builds each entry's dict when it is looked up"""
+
+    def __init__(self, records: Dict[str, FileRecord]):
+        self._records = records
+
+    def __getitem__(self, path: str) -> Dict[str, Any]:
+        return self._records[path].as_dict()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class RawAnalysisView(Mapping):
+    """
+    Read-only view of a finished deep analysis in its historical dict shape. Nothing is
+    copied: `file_analysis` is served through FileAnalysisView, every other field as is.
+    Not JSON-serializable on purpose; it must not end up in cached contexts.
+    """
+
+    def __init__(self, analysis: Dict[str, Any]):
+        self._analysis = analysis
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'file_analysis':
+            return FileAnalysisView(self._analysis['file_analysis'])
+        return self._analysis[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._analysis)
+
+    def __len__(self) -> int:
+        return len(self._analysis)
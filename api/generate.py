@@ -2,11 +2,6 @@ from http.server import BaseHTTPRequestHandler
 import json
 import urllib.parse
 import os
-import tempfile
-import shutil
-import requests
-import zipfile
-import ast
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -76,6 +71,8 @@ class handler(BaseHTTPRequestHandler):
         repo_url = query_params.get('repo_url', [''])[0]
         project_name = query_params.get('project_name', [''])[0]
         include_demo = query_params.get('include_demo', ['false'])[0].lower() == 'true'
+        # Bypass the cached README (the cached analysis is still reused)
+        refresh = query_params.get('refresh', ['false'])[0].lower() == 'true'
         
         try:
             num_screenshots = int(query_params.get('num_screenshots', ['0'])[0])
@@ -122,19 +119,74 @@ class handler(BaseHTTPRequestHandler):
             import traceback
             traceback.print_exc()
         
-        repo_path = None
+        repo = None
+        self.flight = None
         try:
-            # Download repository
-            repo_path, error = self.download_repo(repo_url, access_token, user_data)
-            if error:
-                self.send_json_response({"error": error}, 400)
-                return
-            
-            # Analyze codebase
-            analysis, error = self.analyze_codebase(repo_path)
-            if error:
-                self.send_json_response({"error": error}, 500)
-                return
+            from .repo_download import parse_github_repo, resolve_commit_sha
+            from .snapshot_cache import get_result_cache, analysis_cache_key, readme_cache_key
+            from .single_flight import get_single_flight, is_terminal
+            from .deep_analyzer import ANALYZER_VERSION, analysis_is_complete
+            from .incremental import load_baseline, save_snapshot
+            
+            # Resolve HEAD first; an unchanged repository skips download, analysis and Gemini
+            owner_repo = parse_github_repo(self.normalize_github_url(repo_url))
+            auth_headers = {'Authorization': f'token {access_token}'} if access_token else {}
+            commit_sha = resolve_commit_sha(*owner_repo, headers=auth_headers) if owner_repo else None
+            results = get_result_cache() if commit_sha else None
+            analysis_key = readme_key = None
+            if results:
+                analysis_key = analysis_cache_key(*owner_repo, commit_sha, ANALYZER_VERSION)
+                readme_key = readme_cache_key(
+                    *owner_repo, commit_sha, ANALYZER_VERSION,
+                    project_name=project_name, include_demo=include_demo,
+                    num_screenshots=num_screenshots, num_videos=num_videos
+                )
+                cached_readme = None if refresh else results.get('readme', readme_key)
+                if cached_readme:
+                    print(f"⚡ README cache hit for {owner_repo[0]}/{owner_repo[1]}@{commit_sha[:7]}")
+                    self.send_json_response({"readme": cached_readme})
+                    return
+                
+                # Identical generations already running: wait for the leader's result
+                coordinator = get_single_flight()
+                if coordinator:
+                    flight, is_leader = coordinator.begin(readme_key)
+                    if is_leader:
+                        self.flight = flight
+                    else:
+                        print(f"🛬 Following in-flight generation for {owner_repo[0]}/{owner_repo[1]}@{commit_sha[:7]}")
+                        for event in flight.follow():
+                            if is_terminal(event):
+                                # Answer with the leader's status (e.g. 400 for a missing repository);
+                                # events are shared between followers, so copy rather than pop
+                                result = {key: value for key, value in event.items() if key != 'status_code'}
+                                self.send_json_response(result, event.get('status_code', 200 if 'readme' in event else 500))
+                                return
+                        print("⚠️ In-flight generation ended without a result, generating independently")
+            
+            analysis = results.get('analysis', analysis_key) if results else None
+            if analysis:
+                print(f"⚡ Analysis cache hit for {owner_repo[0]}/{owner_repo[1]}@{commit_sha[:7]}")
+            else:
+                # Files unchanged since the last analyzed commit keep their earlier records
+                baseline = load_baseline(*owner_repo, commit_sha, headers=auth_headers) if results else None
+                
+                # Download repository
+                repo, error = self.download_repo(repo_url, access_token, user_data, commit_sha, baseline)
+                if error:
+                    self.send_json_response({"error": error}, 400)
+                    return
+                
+                # Analyze codebase
+                analysis, error = self.analyze_codebase(repo, baseline)
+                if error:
+                    self.send_json_response({"error": error}, 500)
+                    return
+                file_records = analysis.pop('file_records', None)
+                # Budget-limited (partial) analyses serve this request but are never cached
+                if results and analysis_is_complete(analysis):
+                    results.put('analysis', analysis_key, analysis)
+                    save_snapshot(*owner_repo, commit_sha, file_records)
             
             # Generate README
             readme_content, error = self.generate_readme_with_gemini(
@@ -143,6 +195,8 @@ class handler(BaseHTTPRequestHandler):
             if error:
                 self.send_json_response({"error": error}, 500)
                 return
+            if results and analysis_is_complete(analysis):
+                results.put('readme', readme_key, readme_content)
             
             print(f"✅ README generated successfully ({len(readme_content)} chars)")
             
@@ -160,17 +214,23 @@ class handler(BaseHTTPRequestHandler):
             self.send_json_response({"error": str(e)}, 500)
         
         finally:
-            # Always clean up temporary files
-            if repo_path and os.path.exists(repo_path):
+            # Release requests waiting on this generation
+            if self.flight:
+                self.flight.close()
+            # Always release the archive (in-memory buffer or spooled temp file)
+            if repo:
                 try:
-                    temp_root = os.path.dirname(repo_path)
-                    if temp_root.startswith(('/tmp', tempfile.gettempdir())):
-                        print(f"🧹 Cleaning up temporary directory: {temp_root}")
-                        shutil.rmtree(temp_root, ignore_errors=True)
+                    print(f"🧹 Releasing repository archive: {repo.name}")
+                    repo.close()
                 except Exception as cleanup_error:
                     print(f"⚠️ Cleanup warning: {cleanup_error}")
+            from .github_client import get_github_client
+            print(f"📊 GitHub API: {get_github_client().summary()}")
 
     def send_json_response(self, data, status_code=200):
+        # Requests following this generation get the same result and status
+        if getattr(self, 'flight', None):
+            self.flight.publish({**data, 'status_code': status_code})
         self.send_response(status_code)
         self.send_header('Content-type', 'application/json')
         # Get origin from request headers for CORS with credentials
@@ -232,13 +292,15 @@ class handler(BaseHTTPRequestHandler):
             repo = parts[1]
             
             # Check repository info using GitHub API
-            api_url = f"https://api.github.com/repos/{owner}/{repo}"
+            from .github_client import get_github_client
             headers = {'Authorization': f'token {access_token}'}
             
-            response = requests.get(api_url, headers=headers, timeout=10)
+            response = get_github_client().get(f"/repos/{owner}/{repo}", headers=headers, timeout=10)
             
             if response.status_code == 200:
                 repo_data = response.json()
+                # Reused by fetch_repository to decide on a sparse fetch
+                self.repo_metadata = repo_data
                 
                 # If repository is public, allow access
                 if not repo_data.get('private', False):
@@ -279,19 +341,19 @@ class handler(BaseHTTPRequestHandler):
             normalized_url = normalized_url[:-4]
         return normalized_url
 
-    def download_repo(self, repo_url: str, access_token: str = None, user_data: dict = None):
-        temp_dir = None
+    def download_repo(self, repo_url: str, access_token: str = None, user_data: dict = None, commit_sha: str = None, baseline=None):
+        from .repo_download import fetch_repository, parse_github_repo, format_bytes
+
         try:
             # First normalize the URL
             normalized_url = self.normalize_github_url(repo_url)
             
-            if "github.com" in normalized_url:
-                api_url = normalized_url.replace("github.com", "api.github.com/repos")
-                zip_url = api_url + "/zipball"
-            else:
+            owner_repo = parse_github_repo(normalized_url) if "github.com" in normalized_url else None
+            if not owner_repo:
                 return None, "Invalid GitHub URL"
             
-            # Check repository access if user is authenticated
+            # Check repository access if user is authenticated (keeping the metadata it reads)
+            self.repo_metadata = None
             if access_token and user_data:
                 has_access, access_error = self.check_repository_access(repo_url, access_token, user_data)
                 if not has_access:
@@ -305,49 +367,31 @@ class handler(BaseHTTPRequestHandler):
             else:
                 print(f"🌐 Using public access for repository download")
             
-            print(f"📥 Downloading repository: {repo_url}")
-            response = requests.get(zip_url, headers=headers, timeout=30, stream=True)
-            if response.status_code == 404:
-                if access_token:
-                    return None, "Repository not found or you don't have access to this private repository"
-                else:
-                    return None, "Repository not found. If this is a private repository, please log in and try again"
-            elif response.status_code == 401:
-                return None, "Authentication failed. Please log in again to access private repositories"
-            elif response.status_code == 403:
-                return None, "This is a private repository and you don't have access to it"
-            elif response.status_code != 200:
-                return None, f"Failed to download repository: {response.status_code}"
-            
-            # Simplified download for Vercel environment
-            temp_dir = tempfile.mkdtemp(prefix='readme_gen_')
-            zip_path = os.path.join(temp_dir, "repo.zip")
+            def check_response(response):
+                if response.status_code == 404:
+                    if access_token:
+                        return "Repository not found or you don't have access to this private repository"
+                    else:
+                        return "Repository not found. If this is a private repository, please log in and try again"
+                elif response.status_code == 401:
+                    return "Authentication failed. Please log in again to access private repositories"
+                elif response.status_code == 403:
+                    return "This is a private repository and you don't have access to it"
+                return None
             
-            # Simple download without streaming (works better on Vercel)
-            with open(zip_path, 'wb') as f:
-                f.write(response.content)
-            
-            total_size = len(response.content)
-            print(f"📦 Downloaded {total_size} bytes, extracting...")
-            
-            extract_dir = os.path.join(temp_dir, "extracted")
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # Simple extraction for Vercel environment
-                zip_ref.extractall(extract_dir)
-            
-            # Delete zip file immediately to save space
-            try:
-                os.remove(zip_path)
-            except:
-                pass
-            
-            extracted_items = os.listdir(extract_dir)
-            if extracted_items:
-                repo_dir = os.path.join(extract_dir, extracted_items[0])
-                print(f"✅ Repository extracted to: {repo_dir}")
-                return repo_dir, None
+            print(f"📥 Downloading repository: {repo_url}")
             
-            return None, "Failed to extract repository"
+            # Consults the snapshot cache first; otherwise streams the zipball in
+            # bounded chunks (aborting at the size cap) and reads members in place
+            repo, error = fetch_repository(
+                *owner_repo, headers=headers, check_response=check_response,
+                on_progress=lambda size: print(f"📥 Downloaded {format_bytes(size)}..."),
+                commit_sha=commit_sha, analyze=True, baseline=baseline,
+                metadata=self.repo_metadata
+            )
+            if repo:
+                print(f"✅ Repository archive opened: {repo.name} ({len(repo.list_files())} files)")
+            return repo, error
             
         except Exception as e:
             error_msg = str(e)
@@ -356,68 +400,46 @@ class handler(BaseHTTPRequestHandler):
             elif "too large" in error_msg:
                 error_msg = "Repository is too large to process. Please try with a smaller repository."
             
-            # Clean up on error
-            if temp_dir and os.path.exists(temp_dir):
-                try:
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                except:
-                    pass
-            
             return None, error_msg
 
-    def analyze_codebase(self, repo_path: str):
+    def analyze_codebase(self, repo, baseline=None):
         try:
             print("🔍 Starting enhanced deep code analysis...")
             
             # Import the enhanced analyzer
             from .deep_analyzer import enhance_analysis_context
+            from .python_extract import build_python_code_summary
+            from .repo_index import get_repo_index
+            from .source_loader import read_source_text
+            from .workspaces import dependency_manifests
             
             # Get enhanced analysis
-            enhanced_context = enhance_analysis_context(repo_path)
+            enhanced_context = enhance_analysis_context(repo, baseline=baseline)
             
-            # Create traditional file structure for compatibility
+            # Create traditional file structure for compatibility, from the index the analyzer already built
             context = {"file_structure": "", "dependencies": "No dependency file found.", "python_code_summary": {}}
-            ignore_list = ['.git', '__pycache__', 'node_modules', '.venv', 'venv', 'target', 'dist', 'build']
-            file_structure_list = []
-            
-            for root, dirs, files in os.walk(repo_path, topdown=True):
-                dirs[:] = [d for d in dirs if d not in ignore_list]
-                level = root.replace(repo_path, '').count(os.sep)
-                indent = ' ' * 4 * level
-                file_structure_list.append(f"{indent}📂 {os.path.basename(root)}/")
-                sub_indent = ' ' * 4 * (level + 1)
-                
-                for f in files:
-                    file_structure_list.append(f"{sub_indent}📄 {f}")
-                    file_path = os.path.join(root, f)
-                    
-                    if f.endswith('.py'):
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as py_file:
-                                source_code = py_file.read()
-                                tree = ast.parse(source_code)
-                                summary = {"functions": [], "classes": []}
-                                for node in ast.walk(tree):
-                                    if isinstance(node, ast.FunctionDef):
-                                        docstring = ast.get_docstring(node) or "No docstring."
-                                        summary["functions"].append(f"def {node.name}(...): # {docstring[:80]}")
-                                    elif isinstance(node, ast.ClassDef):
-                                        docstring = ast.get_docstring(node) or "No docstring."
-                                        summary["classes"].append(f"class {node.name}: # {docstring[:80]}")
-                                if summary["functions"] or summary["classes"]:
-                                     context["python_code_summary"][f] = summary
-                        except Exception as e:
-                            print(f"Could not parse Python file {file_path}: {e}")
-                    elif f in ['requirements.txt', 'package.json', 'pyproject.toml', 'pom.xml']:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as file_content:
-                                context["dependencies"] = file_content.read()
-                        except Exception: pass
-            
-            context["file_structure"] = "\n".join(file_structure_list)
+            index = get_repo_index(repo)
+            context["file_structure"] = index.render_tree()
+            
+            # Derived from the deep analyzer's per-file records instead of parsing every file again
+            # Popped so the per-file records are released once the prompt data is built
+            raw_analysis = enhanced_context.pop('raw_analysis', None) or {}
+            context["python_code_summary"] = build_python_code_summary(
+                index, raw_analysis.get('file_analysis', {}),
+                read_text=None if raw_analysis else (lambda path: read_source_text(repo, path))
+            )
+            
+            # The root manifest describes a monorepo as a whole, so the shallowest one wins
+            for entry in dependency_manifests(index, ('requirements.txt', 'package.json', 'pyproject.toml', 'pom.xml')):
+                try:
+                    context["dependencies"] = read_source_text(repo, entry.path)
+                    break
+                except Exception: pass
             
             # Add enhanced analysis to context
             context["enhanced_analysis"] = enhanced_context
+            # Per-file records for the repository's next incremental analysis; the caller pops them
+            context["file_records"] = enhanced_context.pop('file_records', None)
             
             print("✅ Enhanced deep code analysis completed")
             return context, None
@@ -0,0 +1,177 @@
+"""
+Shared GitHub HTTP client
+One keep-alive connection pool for every GitHub call a worker makes, with per-call
+timeouts, retries with backoff on 5xx responses and secondary rate limits, and
+per-endpoint latency counters
+"""
+
+import os
+import re
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from typing import Any, Dict, Optional, Tuple
+
+# Overridable so the download paths can be exercised against a local fake GitHub
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip('/')
+
+# (connect, read) timeout applied to every call unless the caller passes its own
+GITHUB_TIMEOUT: Tuple[float, float] = (
+    float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("GITHUB_READ_TIMEOUT", "30"))
+)
+
+# Retries after the first attempt, and the base delay that doubles on each retry
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+GITHUB_BACKOFF_SECONDS = float(os.getenv("GITHUB_BACKOFF_SECONDS", "0.5"))
+
+# Never sleep longer than this for a single retry; longer rate-limit waits fail fast
+GITHUB_MAX_RETRY_WAIT = float(os.getenv("GITHUB_MAX_RETRY_WAIT", "10"))
+
+# Keep-alive connections kept per host
+GITHUB_POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "16"))
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+# Contents API writes carry a blob `sha` precondition, so a retry of one that went through
+# fails with 409/422; they are only retried when the connection failed before sending
+CONNECT_RETRY_METHODS = {'PUT', 'DELETE'}
+
+
+def never_sent(error: Exception) -> bool:
+    """True when a requests error happened while connecting, before the request went out"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def endpoint_label(method: str, url: str) -> str:
+    """Collapse a URL to a low-cardinality label, e.g. `GET /repos/:owner/:repo/contents`"""
+    path = re.sub(r'^https?://[^/]+', '', url).split('?', 1)[0]
+    parts = [part for part in path.split('/') if part]
+    if parts[:1] == ['repos'] and len(parts) >= 3:
+        # Keep the resource name; refs, SHAs and file paths after it are dropped
+        keep = 5 if parts[3:4] == ['git'] else 4
+        parts = ['repos', ':owner', ':repo'] + parts[3:keep]
+    else:
+        parts = parts[:1]
+    return f"{method.upper()} /{'/'.join(parts)}"
+
+
+class GitHubClient:
+    """Pooled `requests` session with retries and latency accounting"""
+
+    def __init__(self, pool_size: int = None, max_retries: int = None, timeout: Tuple[float, float] = None):
+        self.max_retries = GITHUB_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout or GITHUB_TIMEOUT
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size or GITHUB_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, label: str, elapsed: float, error: bool = False, retried: bool = False):
+        with self._stats_lock:
+            stats = self._stats.setdefault(label, {'calls': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['retries'] += int(retried)
+            stats['total_ms'] += elapsed * 1000
+            stats['max_ms'] = max(stats['max_ms'], elapsed * 1000)
+
+    def _retry_delay(self, response: Optional[requests.Response], attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None when the outcome is final"""
+        backoff = GITHUB_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random() * 0.25)
+        if response is None or response.status_code in RETRYABLE_STATUS:
+            return backoff
+
+        if response.status_code in (403, 429):
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+            if response.headers.get('X-RateLimit-Remaining') == '0':
+                reset = response.headers.get('X-RateLimit-Reset', '')
+                return max(0.0, float(reset) - time.time()) if reset.isdigit() else None
+            if response.status_code == 429 or 'secondary rate limit' in response.text.lower():
+                return max(backoff, 1.0)
+        return None
+
+    def request(self, method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+        """
+        Send a request to `url` (absolute, or a path under GITHUB_API_URL).
+        5xx responses, connection errors and rate-limit answers are retried with
+        backoff for idempotent methods, and failed connections for PUT / DELETE;
+        the last response (or error) is returned as is.
+        """
+        method = method.upper()
+        if not url.startswith('http'):
+            url = f"{GITHUB_API_URL}{url}"
+        label = endpoint_label(method, url)
+        idempotent = method in IDEMPOTENT_METHODS
+        retries = self.max_retries if idempotent or method in CONNECT_RETRY_METHODS else 0
+
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = self._retry_delay(None, attempt) if attempt < retries and (idempotent or never_sent(e)) else None
+                self._record(label, time.perf_counter() - started, error=True, retried=delay is not None)
+                if delay is None:
+                    raise
+                print(f"🔁 {label} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            delay = self._retry_delay(response, attempt) if attempt < retries and idempotent else None
+            if delay is not None and delay > GITHUB_MAX_RETRY_WAIT:
+                delay = None
+            self._record(label, time.perf_counter() - started, error=response.status_code >= 500, retried=delay is not None)
+            if delay is None:
+                return response
+            print(f"🔁 {label} answered {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint call counts and latencies in milliseconds"""
+        with self._stats_lock:
+            return {
+                label: {
+                    'calls': int(stats['calls']),
+                    'errors': int(stats['errors']),
+                    'retries': int(stats['retries']),
+                    'avg_ms': round(stats['total_ms'] / stats['calls'], 1) if stats['calls'] else 0,
+                    'max_ms': round(stats['max_ms'], 1)
+                }
+                for label, stats in self._stats.items()
+            }
+
+    def summary(self) -> str:
+        """One-line latency report for the request log"""
+        return '; '.join(f"{label} x{stats['calls']} avg {stats['avg_ms']}ms max {stats['max_ms']}ms"
+                         + (f" ({stats['retries']} retried)" if stats['retries'] else '')
+                         for label, stats in self.stats().items()) or 'no calls'
+
+
+_github_client = None
+
+
+def get_github_client() -> GitHubClient:
+    """Process-wide client so connections stay warm across requests"""
+    global _github_client
+    if _github_client is None:
+        _github_client = GitHubClient()
+    return _github_client
@@ -0,0 +1,191 @@
+"""
+Repository ignore rules
+Compiles the repository's own .gitignore files, its .gitattributes `linguist-vendored` /
+`linguist-generated` markers and a built-in list of generated paths into one regex per
+rule layer, so walkers can prune whole subtrees with a single match per directory
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Honor .gitignore / .gitattributes found in the repository (false: built-in patterns only)
+RESPECT_REPO_IGNORE_FILES = os.getenv("RESPECT_REPO_IGNORE_FILES", "true").lower() not in ('0', 'false', 'no')
+
+IGNORE_FILES = ('.gitignore', '.gitattributes')
+
+# Ignore files larger than this are not read (nobody writes a 256 KB .gitignore by hand)
+MAX_IGNORE_FILE_BYTES = 256 * 1024
+
+# Generated or vendored paths, in .gitignore syntax. A repository can opt a path back in
+# with `-linguist-generated` / `linguist-vendored=false` in its .gitattributes.
+GENERATED_PATTERNS = [
+    # Protocol buffer / gRPC stubs
+    '*_pb2.py', '*_pb2.pyi', '*_pb2_grpc.py', '*.pb.go', '*.pb.cc', '*.pb.h', '*_pb.js', '*_pb.d.ts', '*_grpc_pb.js',
+    # Minified bundles and source maps
+    '*.min.js', '*.min.css', '*.bundle.js', '*.js.map', '*.css.map',
+    # Test snapshots and fixtures
+    '__snapshots__/', '*.snap', '__fixtures__/', 'fixtures/', 'testdata/',
+    # Vendored dependencies and tool output
+    'vendor/', 'third_party/', 'third-party/', 'bower_components/', 'coverage/', 'htmlcov/',
+    '.tox/', '.nox/', '.mypy_cache/', '.pytest_cache/', '.nyc_output/'
+]
+
+LINGUIST_ATTRIBUTES = {'linguist-vendored': 'vendored', 'linguist-generated': 'generated'}
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Regex for one gitignore glob: `*` and `?` stay within a path segment, `**` crosses them"""
+    out, i, n = [], 0, len(glob)
+    while i < n:
+        char = glob[i]
+        if char == '*':
+            if glob.startswith('**', i) and (i == 0 or glob[i - 1] == '/'):
+                if glob[i + 2:i + 3] == '/':
+                    out.append('(?:.*/)?')
+                    i += 3
+                    continue
+                if i + 2 == n:
+                    out.append('.*')
+                    break
+            out.append('[^/]*')
+            while i < n and glob[i] == '*':
+                i += 1
+            continue
+        if char == '?':
+            out.append('[^/]')
+        elif char == '[':
+            end = glob.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                body = glob[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end + 1
+                continue
+        elif char == '\\' and i + 1 < n:
+            out.append(re.escape(glob[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return ''.join(out)
+
+
+def compile_pattern(pattern: str, base: str = '') -> Optional[Tuple[str, bool, bool]]:
+    """
+    (regex over repository-relative paths, negated, directory-only) for one .gitignore
+    line found in directory `base`, or None for blank lines and comments
+    """
+    pattern = re.sub(r'(?<!\\)\s+$', '', pattern)
+    if not pattern or pattern.startswith('#'):
+        return None
+    negated = pattern.startswith('!')
+    if negated:
+        pattern = pattern[1:]
+    dir_only = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+    if not pattern:
+        return None
+    # A slash anywhere but at the end anchors the pattern to `base`; otherwise it matches at any depth
+    anchored = '/' in pattern
+    regex = (re.escape(base + '/') if base else '') + ('' if anchored else '(?:.*/)?') + _glob_to_regex(pattern.lstrip('/'))
+    return regex, negated, dir_only
+
+
+class _RuleLayer:
+    """
+    Ordered rules where the last matching one decides. All rules are compiled into one
+    alternation, latest first, so a single match finds the deciding rule.
+    """
+
+    def __init__(self):
+        self.rules: List[Tuple[str, bool, bool, str]] = []  # (regex, negated, dir_only, reason)
+        self._compiled: Dict[bool, Optional[re.Pattern]] = {}
+
+    def add(self, regex: str, negated: bool, dir_only: bool, reason: str):
+        self.rules.append((regex, negated, dir_only, reason))
+        self._compiled = {}
+
+    def _pattern(self, is_dir: bool) -> Optional[re.Pattern]:
+        if is_dir not in self._compiled:
+            parts = [f'(?P<r{position}>{regex})' for position, (regex, _, dir_only, _) in reversed(list(enumerate(self.rules)))
+                     if is_dir or not dir_only]
+            self._compiled[is_dir] = re.compile('(?:' + '|'.join(parts) + r')\Z', re.S) if parts else None
+        return self._compiled[is_dir]
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[str]:
+        pattern = self._pattern(is_dir)
+        match = pattern.match(rel_path) if pattern else None
+        if not match:
+            return None
+        _, negated, _, reason = self.rules[int(match.lastgroup[1:])]
+        return None if negated else reason
+
+
+class IgnoreMatcher:
+    """
+    Decides whether a repository path is ignored, and why ('gitignored', 'generated' or
+    'vendored'). Feed it the repository's ignore files parent directories first
+    (add_file); `match` judges one path, `excluded` also checks its ancestor directories.
+    """
+
+    def __init__(self, generated_patterns: Iterable[str] = None):
+        self.gitignore = _RuleLayer()
+        # Built-in patterns first, so any .gitattributes rule overrides them
+        self.attributes = _RuleLayer()
+        for pattern in (GENERATED_PATTERNS if generated_patterns is None else generated_patterns):
+            compiled = compile_pattern(pattern)
+            if compiled:
+                self.attributes.add(*compiled, 'generated')
+        self._dir_cache: Dict[str, Optional[str]] = {}
+
+    @staticmethod
+    def wants(rel_path: str) -> bool:
+        """True for the repository ignore files a matcher should be fed (see add_file)"""
+        return RESPECT_REPO_IGNORE_FILES and rel_path.rpartition('/')[2] in IGNORE_FILES
+
+    def add_file(self, rel_path: str, text: str):
+        """Load a .gitignore or .gitattributes found at `rel_path`"""
+        base, _, name = rel_path.rpartition('/')
+        if name == '.gitignore':
+            for line in text.splitlines():
+                compiled = compile_pattern(line, base)
+                if compiled:
+                    self.gitignore.add(*compiled, 'gitignored')
+        elif name == '.gitattributes':
+            for line in text.splitlines():
+                fields = line.split()
+                if not fields or fields[0].startswith('#'):
+                    continue
+                pattern = fields[0]
+                for attribute in fields[1:]:
+                    reason = LINGUIST_ATTRIBUTES.get(attribute.lstrip('-!').partition('=')[0])
+                    if not reason:
+                        continue
+                    unset = attribute.startswith(('-', '!')) or attribute.endswith('=false')
+                    # `dir/**` marks everything below dir; the directory itself gets the same
+                    # decision so walkers can prune (or keep) it as a whole
+                    for variant in ([pattern[:-3] + '/', pattern] if pattern.endswith('/**') else [pattern]):
+                        compiled = compile_pattern(variant, base)
+                        if compiled:
+                            regex, _, dir_only = compiled
+                            self.attributes.add(regex, unset, dir_only, reason)
+        self._dir_cache.clear()
+
+    def match(self, rel_path: str, is_dir: bool = False) -> Optional[str]:
+        """Why this path itself is ignored, or None"""
+        return self.gitignore.match(rel_path, is_dir) or self.attributes.match(rel_path, is_dir)
+
+    def excluded(self, rel_path: str, is_dir: bool = False) -> Optional[str]:
+        """Like match, but a path under an ignored directory is ignored too (flat listings)"""
+        parent = rel_path.rpartition('/')[0]
+        if parent:
+            if parent not in self._dir_cache:
+                self._dir_cache[parent] = self.excluded(parent, is_dir=True)
+            if self._dir_cache[parent]:
+                return self._dir_cache[parent]
+        return self.match(rel_path, is_dir)
@@ -0,0 +1,117 @@
+"""
+Incremental re-analysis between two commits of the same repository
+After a complete analysis the per-file records are kept as the repository's snapshot.
+When a later commit is analyzed, GitHub's compare API names the paths that changed
+since then; every other source file reuses its previous record without being read,
+and the aggregates are derived again from the merged records.
+"""
+
+import os
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from .file_records import contributions_as_json, contributions_from_json
+from .github_client import get_github_client
+
+# Reuse the previous commit's per-file records for files a new commit did not touch
+INCREMENTAL_ANALYSIS = os.getenv("INCREMENTAL_ANALYSIS", "true").lower() not in ('0', 'false', 'no')
+
+# The compare API lists at most this many files; a longer diff is analyzed from scratch
+COMPARE_MAX_FILES = 300
+
+
+class AnalysisBaseline:
+    """
+    Per-file records of a previous analysis (as stored by save_snapshot) minus the paths
+    changed, added or removed since. Records are decoded only when a file asks for one.
+    """
+
+    def __init__(self, commit_sha: str, records: Dict[str, Dict[str, Any]],
+                 changed: Iterable[str] = (), added: Iterable[str] = (), removed: Iterable[str] = ()):
+        self.commit_sha = commit_sha
+        self.records = records
+        self.dirty: Set[str] = set(changed) | set(added) | set(removed)
+
+    def record(self, rel_path: str) -> Optional[Dict[str, Any]]:
+        """The previous record of an unchanged file, or None when it has to be analyzed"""
+        if rel_path in self.dirty:
+            return None
+        record = self.records.get(rel_path)
+        return None if record is None else contributions_from_json(record)
+
+    def covers(self, rel_path: str) -> bool:
+        return rel_path not in self.dirty and rel_path in self.records
+
+
+def compare_commits(owner: str, repo: str, base: str, head: str,
+                    headers: dict = None) -> Optional[Tuple[Set[str], Set[str], Set[str]]]:
+    """
+    (changed, added, removed) paths between two commits; a rename removes the old path
+    and adds the new one. None when the comparison fails, is too long to be listed, or
+    `head` does not descend from `base`.
+    """
+    try:
+        response = get_github_client().get(f"/repos/{owner}/{repo}/compare/{base}...{head}",
+                                           headers=headers or {}, timeout=10)
+        if response.status_code != 200:
+            print(f"⚠️ Could not compare {base[:7]}...{head[:7]}: {response.status_code}")
+            return None
+        comparison = response.json()
+    except Exception as e:
+        print(f"⚠️ Could not compare {base[:7]}...{head[:7]}: {e}")
+        return None
+    # A three-dot compare lists the changes since the merge base: after a force-push or a
+    # branch switch (`behind` / `diverged`) it misses what changed on the old side
+    if comparison.get('status') not in ('ahead', 'identical'):
+        print(f"⚠️ {head[:7]} does not descend from {base[:7]} ({comparison.get('status')}), analyzing in full")
+        return None
+    files = comparison.get('files', [])
+    if len(files) >= COMPARE_MAX_FILES:
+        return None
+
+    changed, added, removed = set(), set(), set()
+    for entry in files:
+        status = entry.get('status')
+        if status == 'added' or status == 'copied':
+            added.add(entry['filename'])
+        elif status == 'removed':
+            removed.add(entry['filename'])
+        elif status == 'renamed':
+            removed.add(entry.get('previous_filename', ''))
+            added.add(entry['filename'])
+        elif status != 'unchanged':
+            changed.add(entry['filename'])
+    return changed, added, removed
+
+
+def load_baseline(owner: str, repo: str, commit_sha: str, headers: dict = None) -> Optional[AnalysisBaseline]:
+    """Baseline for analyzing owner/repo@commit_sha from its last snapshot, or None"""
+    from .deep_analyzer import ANALYZER_VERSION
+    from .snapshot_cache import analysis_snapshot_key, get_result_cache
+
+    if not INCREMENTAL_ANALYSIS:
+        return None
+    snapshot = get_result_cache().get('snapshots', analysis_snapshot_key(owner, repo, ANALYZER_VERSION))
+    if not snapshot or not snapshot.get('records'):
+        return None
+
+    previous = snapshot['commit']
+    changes = (set(), set(), set()) if previous == commit_sha else compare_commits(owner, repo, previous, commit_sha, headers)
+    if changes is None:
+        return None
+    changed, added, removed = changes
+    print(f"♻️ Incremental analysis against {previous[:7]}: "
+          f"{len(changed)} changed, {len(added)} added, {len(removed)} removed")
+    return AnalysisBaseline(previous, snapshot['records'], changed, added, removed)
+
+
+def save_snapshot(owner: str, repo: str, commit_sha: str, file_records: Dict[str, Dict[str, Any]]):
+    """Keep a complete analysis' per-file records as the baseline for the repository's next commit"""
+    from .deep_analyzer import ANALYZER_VERSION
+    from .snapshot_cache import analysis_snapshot_key, get_result_cache
+
+    if not INCREMENTAL_ANALYSIS or not file_records:
+        return
+    get_result_cache().put('snapshots', analysis_snapshot_key(owner, repo, ANALYZER_VERSION), {
+        'commit': commit_sha,
+        'records': {path: contributions_as_json(record) for path, record in file_records.items()}
+    })
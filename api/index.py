@@ -2,10 +2,6 @@ from http.server import BaseHTTPRequestHandler
 import json
 import urllib.parse
 import os
-import tempfile
-import shutil
-import requests
-import zipfile
 import ast
 import base64
 from dotenv import load_dotenv
@@ -63,12 +59,12 @@ class handler(BaseHTTPRequestHandler):
             return
         
         try:
-            repo_path, error = self.download_repo(repo_url)
+            repo, error = self.download_repo(repo_url)
             if error:
                 self.send_json_response({"error": error}, 400)
                 return
             
-            analysis, error = self.analyze_codebase(repo_path)
+            analysis, error = self.analyze_codebase(repo)
             if error:
                 self.send_json_response({"error": error}, 500)
                 return
@@ -80,8 +76,7 @@ class handler(BaseHTTPRequestHandler):
                 self.send_json_response({"error": error}, 500)
                 return
             
-            if repo_path and os.path.exists(repo_path):
-                shutil.rmtree(os.path.dirname(repo_path), ignore_errors=True)
+            repo.close()
             
             self.send_json_response({"readme": readme_content})
             
@@ -116,7 +111,7 @@ class handler(BaseHTTPRequestHandler):
             # Stream progress updates
             self.stream_message("Starting README generation...")
             
-            repo_path, error = self.download_repo(repo_url)
+            repo, error = self.download_repo(repo_url)
             if error:
                 self.stream_message(f"Error: {error}")
                 return
@@ -124,7 +119,7 @@ class handler(BaseHTTPRequestHandler):
             self.stream_message("Repository downloaded successfully!")
             self.stream_message("Analyzing codebase...")
             
-            analysis, error = self.analyze_codebase(repo_path)
+            analysis, error = self.analyze_codebase(repo)
             if error:
                 self.stream_message(f"Error: {error}")
                 return
@@ -142,8 +137,7 @@ class handler(BaseHTTPRequestHandler):
             self.stream_message("README generation complete!")
             self.stream_message("FINAL_RESULT:" + readme_content)
             
-            if repo_path and os.path.exists(repo_path):
-                shutil.rmtree(os.path.dirname(repo_path), ignore_errors=True)
+            repo.close()
                 
         except Exception as e:
             self.stream_message(f"Error: Generation failed: {str(e)}")
@@ -188,53 +182,26 @@ class handler(BaseHTTPRequestHandler):
 
     def download_repo(self, repo_url):
         """Download repository from GitHub URL"""
+        from .repo_download import fetch_repository, parse_github_repo, RepositoryTooLargeError
+
         try:
             # Parse GitHub URL
             if 'github.com' not in repo_url:
                 return None, "Invalid GitHub URL"
             
-            # Convert to API URL
-            if repo_url.endswith('.git'):
-                repo_url = repo_url[:-4]
-            
-            parts = repo_url.replace('https://github.com/', '').split('/')
-            if len(parts) < 2:
+            owner_repo = parse_github_repo(repo_url)
+            if not owner_repo:
                 return None, "Invalid repository URL format"
             
-            owner, repo = parts[0], parts[1]
-            api_url = f"https://api.github.com/repos/{owner}/{repo}/zipball"
-            
-            # Create temp directory
-            temp_dir = tempfile.mkdtemp()
-            zip_path = os.path.join(temp_dir, 'repo.zip')
-            
-            # Download repository
-            response = requests.get(api_url, stream=True)
-            if response.status_code != 200:
-                return None, f"Failed to download repository: {response.status_code}"
-            
-            with open(zip_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            # Extract repository
-            extract_path = os.path.join(temp_dir, 'extracted')
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_path)
-            
-            # Find the actual repo directory
-            extracted_items = os.listdir(extract_path)
-            if len(extracted_items) == 1:
-                repo_path = os.path.join(extract_path, extracted_items[0])
-            else:
-                repo_path = extract_path
-            
-            return repo_path, None
+            # Download repository (or reuse a cached snapshot of the same commit)
+            return fetch_repository(*owner_repo)
             
+        except RepositoryTooLargeError as e:
+            return None, str(e)
         except Exception as e:
             return None, f"Download failed: {str(e)}"
 
-    def analyze_codebase(self, repo_path):
+    def analyze_codebase(self, repo):
         """Analyze the codebase structure and content"""
         try:
             analysis = {
@@ -245,55 +212,44 @@ class handler(BaseHTTPRequestHandler):
                 'readme_exists': False
             }
             
-            # Walk through the repository
-            for root, dirs, files in os.walk(repo_path):
-                # Skip hidden directories and common ignore patterns
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env']]
+            # One pass over the shared repository index (vendored dirs already pruned)
+            from .repo_index import get_repo_index
+            for entry in get_repo_index(repo).files:
+                # Skip hidden files and directories
+                if any(part.startswith('.') for part in entry.path.split('/')):
+                    continue
                 
-                rel_path = os.path.relpath(root, repo_path)
-                if rel_path == '.':
-                    rel_path = ''
+                rel_file_path = entry.path
+                file = os.path.basename(rel_file_path)
+                ext = entry.ext
                 
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                    
-                    file_path = os.path.join(root, file)
-                    rel_file_path = os.path.join(rel_path, file) if rel_path else file
-                    
-                    # Get file extension
-                    _, ext = os.path.splitext(file)
-                    ext = ext.lower()
-                    
-                    # Count languages
-                    if ext:
-                        analysis['languages'][ext] = analysis['languages'].get(ext, 0) + 1
-                    
-                    # Check for key files
-                    if file.lower() in ['readme.md', 'readme.txt', 'readme']:
-                        analysis['readme_exists'] = True
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                analysis['key_files']['readme'] = f.read()[:2000]  # First 2000 chars
-                        except:
-                            pass
-                    
-                    elif file in ['package.json', 'requirements.txt', 'Cargo.toml', 'go.mod', 'pom.xml']:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                analysis['key_files'][file] = f.read()
-                        except:
-                            pass
-                    
-                    # Sample some code files
-                    elif ext in ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs', '.php'] and len(analysis['key_files']) < 10:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()[:1000]  # First 1000 chars
-                                analysis['key_files'][rel_file_path] = content
-                        except:
-                            pass
-            
+                # Count languages
+                if ext:
+                    analysis['languages'][ext] = analysis['languages'].get(ext, 0) + 1
+                
+                # Check for key files
+                if file.lower() in ['readme.md', 'readme.txt', 'readme']:
+                    analysis['readme_exists'] = True
+                    try:
+                        analysis['key_files']['readme'] = repo.read_text(rel_file_path, errors='ignore')[:2000]  # First 2000 chars
+                    except:
+                        pass
+                
+                elif file in ['package.json', 'requirements.txt', 'Cargo.toml', 'go.mod', 'pom.xml']:
+                    try:
+                        analysis['key_files'][file] = repo.read_text(rel_file_path, errors='ignore')
+                    except:
+                        pass
+                
+                # Sample some code files
+                elif ext in ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs', '.php'] and len(analysis['key_files']) < 10:
+                    try:
+                        with repo.open(rel_file_path) as f:
+                            content = f.read(1000).decode('utf-8', errors='ignore')  # First 1000 bytes
+                        analysis['key_files'][rel_file_path] = content
+                    except:
+                        pass
+        
             return analysis, None
             
         except Exception as e:
@@ -0,0 +1,219 @@
+"""
+Lightweight JS/TS/JSX scanner
+One linear, tokenizer-level pass over a script that skips comments, strings, template
+literals and regex literals, and extracts imports, exports, React components and hooks
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+# One token per match, leading whitespace included: comments (and trailing whitespace)
+# are consumed, everything else is classified
+TOKEN = re.compile(r'''
+    \s*(?:
+    (?P<skip>//[^\n]*|/\*.*?(?:\*/|\Z)|\Z)
+  | (?P<str>'[^'\\\n]*(?:\\.[^'\\\n]*)*'|"[^"\\\n]*(?:\\.[^"\\\n]*)*")
+  | (?P<tpl>`)
+  | (?P<id>[A-Za-z_$][\w$]*)
+  | (?P<num>\.?\d[\w.]*)
+  | (?P<punc>=>|\.\.\.|&&|\|\||\?\?|[{}()\[\];,<>=:?.!+\-*/%&|^~@#\\'"])
+    )''', re.S | re.X)
+
+# The rest of a template literal up to its end or the next `${`
+TEMPLATE_CHUNK = re.compile(r'[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*(`|\$\{|\Z)', re.S)
+
+REGEX_LITERAL = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+
+# After these a `/` starts a regex literal and a `<` may open JSX; after anything else
+# (an identifier, a literal, `)` or `]`) they are operators
+EXPRESSION_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                       'void', 'throw', 'yield', 'await', 'instanceof'}
+EXPRESSION_END_PUNCTUATION = {')', ']', '}'}
+SLASH_OR_ANGLE = {'/', '<'}
+
+DECLARATION_KEYWORDS = {'function', 'class', 'const', 'let', 'var', 'async', 'interface', 'type',
+                        'enum', 'abstract', 'declare', 'namespace'}
+
+# Right-hand sides of `const Name = ...` that make a PascalCase binding a component
+COMPONENT_INITIALIZERS = {'(', 'function', 'async', 'memo', 'forwardRef', 'React', 'observer'}
+
+HOOK_NAME = re.compile(r'use[A-Z0-9]')
+
+
+def _is_component_name(name: str) -> bool:
+    return name[:1].isupper() and not name.isupper()
+
+
+def import_package(specifier: str) -> Optional[str]:
+    """npm package of an import specifier (`@scope/pkg/sub` -> `@scope/pkg`); None for relative paths"""
+    if not specifier or specifier.startswith(('.', '/')):
+        return None
+    parts = specifier.split('/')
+    return '/'.join(parts[:2]) if specifier.startswith('@') else parts[0]
+
+
+def scan_script(source: str, allow_jsx: bool = True) -> Dict[str, Any]:
+    """
+    Scan one JS/TS/JSX/TSX file. Returns imports (specifiers in order), exports
+    (exported names, `default` for anonymous default exports), components (PascalCase
+    functions and arrow components in files with JSX, and Component subclasses), hooks
+    (custom hooks defined), hooks_used, jsx and lines. Pass allow_jsx=False for .ts
+    files, where `<Type>value` is a type assertion rather than an element.
+    """
+    imports: List[str] = []
+    exports: List[str] = []
+    declared_components: List[str] = []
+    class_components: List[str] = []
+    hooks: List[str] = []
+    hooks_used: List[str] = []
+    jsx = False
+
+    # Brace stack: '{' for blocks and objects, '`' for template substitutions
+    braces: List[str] = []
+    prev = prev2 = prev_kind = None  # previous two significant tokens
+    export_state = None              # None, 'start', 'default', 'decl' or 'list'
+    export_name = None
+    declaring = None                 # 'function', 'binding' or 'class' until the declared name
+    pending_binding = None           # PascalCase `const Name` waiting for its initializer
+    pending_class = None             # class name waiting for `extends [React.]Component`
+    maybe_jsx = False
+
+    position, length = 0, len(source)
+    while position < length:
+        match = TOKEN.match(source, position)
+        if not match:
+            position += 1
+            continue
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'skip':
+            position = match.end()
+            continue
+
+        expression_start = value in SLASH_OR_ANGLE and (
+            prev is None or (prev_kind == 'punc' and prev not in EXPRESSION_END_PUNCTUATION)
+            or (prev_kind == 'id' and prev in EXPRESSION_KEYWORDS))
+        if value == '/' and expression_start:
+            literal = REGEX_LITERAL.match(source, match.start(kind))
+            if literal:
+                position = literal.end()
+                prev2, prev, prev_kind = prev, 'regex', 'str'
+                continue
+
+        position = match.end()
+        if kind == 'tpl' or (value == '}' and braces and braces[-1] == '`'):
+            # Template text up to the closing backtick or the next substitution
+            if kind == 'punc':
+                braces.pop()
+            chunk = TEMPLATE_CHUNK.match(source, position)
+            position = chunk.end()
+            if chunk.group(1) == '${':
+                braces.append('`')
+            prev2, prev, prev_kind = prev, 'template', 'str'
+            continue
+        if value == '{' and kind == 'punc':
+            braces.append('{')
+        elif value == '}' and kind == 'punc' and braces:
+            braces.pop()
+
+        if maybe_jsx:
+            jsx = kind == 'id' or value == '>'
+            maybe_jsx = False
+        elif allow_jsx and not jsx and value == '<' and expression_start:
+            maybe_jsx = True
+
+        if kind == 'str':
+            # import x from 'y' / export * from 'y' / import 'y' / require('y') / import('y')
+            if prev == 'from' or prev == 'import' or (prev == '(' and prev2 in ('require', 'import')):
+                imports.append(value[1:-1])
+
+        # Exports
+        if export_state == 'start':
+            if value == 'default':
+                export_state = 'default'
+            elif value in DECLARATION_KEYWORDS:
+                export_state = 'decl'
+            elif value == '{':
+                export_state, export_name = 'list', None
+            elif value != '*':
+                export_state = None
+        elif export_state == 'default':
+            if kind != 'id' or value == 'extends':
+                # `export default () => ...`, `export default {...}`, `export default class extends X`
+                exports.append('default')
+                export_state = None
+            elif value not in DECLARATION_KEYWORDS:
+                exports.append(value)
+                export_state = None
+        elif export_state == 'decl':
+            if kind == 'id' and value not in DECLARATION_KEYWORDS:
+                exports.append(value)
+                export_state = None
+        elif export_state == 'list':
+            if kind == 'id':
+                # `a as b` exports b: the last identifier before the comma wins
+                if value not in ('as', 'type'):
+                    export_name = value
+            elif value in (',', '}'):
+                if export_name:
+                    exports.append(export_name)
+                export_name = None
+                if value == '}':
+                    export_state = None
+        if value == 'export' and prev != '.':
+            export_state = 'start'
+
+        # Components and hooks
+        if pending_binding:
+            if prev == '=':
+                if value in COMPONENT_INITIALIZERS:
+                    declared_components.append(pending_binding)
+                pending_binding = None
+            elif value in (';', ')', '{', '}', '=>'):
+                pending_binding = None
+        if pending_class:
+            if kind == 'id' and (prev == 'extends' or (prev == '.' and prev2 in ('React', 'Preact'))):
+                if value in ('Component', 'PureComponent'):
+                    class_components.append(pending_class)
+                    pending_class = None
+                elif value not in ('React', 'Preact'):
+                    pending_class = None
+            elif value == '{':
+                pending_class = None
+
+        if kind == 'id':
+            if declaring and value not in DECLARATION_KEYWORDS:
+                if _is_component_name(value):
+                    if declaring == 'function':
+                        declared_components.append(value)
+                    elif declaring == 'binding':
+                        pending_binding = value
+                    else:
+                        pending_class = value
+                elif value[:3] == 'use' and HOOK_NAME.match(value) and declaring != 'class':
+                    hooks.append(value)
+                declaring = None
+            elif value == 'function':
+                declaring = 'function'
+            elif value in ('const', 'let', 'var'):
+                declaring = 'binding'
+            elif value == 'class':
+                declaring = 'class'
+            elif value[:3] == 'use' and HOOK_NAME.match(value) and source.startswith('(', position) and value not in hooks_used:
+                hooks_used.append(value)
+        elif value != '*':
+            # `function* name` keeps waiting; anything else (a destructuring pattern) does not
+            declaring = None
+
+        prev2, prev, prev_kind = prev, value, kind
+
+    components = list(dict.fromkeys((declared_components if jsx else []) + class_components))
+    return {
+        'imports': imports,
+        'exports': exports,
+        'components': components,
+        'hooks': hooks,
+        'hooks_used': hooks_used,
+        'jsx': jsx,
+        'lines': source.count('\n') + 1
+    }
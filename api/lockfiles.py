@@ -0,0 +1,186 @@
+"""
+Streaming lockfile parsers
+package-lock.json (and npm-shrinkwrap.json), yarn.lock and pnpm-lock.yaml are read
+line by line from the repository view's stream, never materialized as a document.
+Each parser yields (package name, resolved version, declared ranges) entries as it
+goes, so the caller can stop as soon as the packages it asks about are resolved.
+"""
+
+import io
+import json
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, Tuple
+
+# Longer lines are cut (only minified lockfiles have them; npm, yarn and pnpm never write one)
+MAX_LINE_CHARS = 64 * 1024
+
+# Sections of pnpm-lock.yaml listing an importer's direct dependencies
+PNPM_DEPENDENCY_SECTIONS = {'dependencies', 'devDependencies', 'optionalDependencies'}
+
+LockEntry = Tuple[str, str, Tuple[str, ...]]
+
+
+def _lines(stream: BinaryIO) -> Iterator[str]:
+    text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    return iter(lambda: text.readline(MAX_LINE_CHARS), '')
+
+
+def iter_package_lock(lines: Iterable[str]) -> Iterator[LockEntry]:
+    """
+    Top-level installs of a pretty-printed package-lock.json / npm-shrinkwrap.json:
+    `packages["node_modules/<name>"]` (lockfile v2/v3), else `dependencies["<name>"]` (v1)
+    """
+    unit = None
+    section = current = None
+    seen_packages = False
+    for line in lines:
+        stripped = line.lstrip()
+        if not stripped.startswith('"'):
+            continue
+        indent = len(line) - len(stripped)
+        if unit is None:
+            if not indent:
+                continue
+            unit = indent
+        depth = indent // unit
+        key, _, rest = stripped[1:].partition('":')
+        if depth == 1:
+            if key == 'dependencies' and seen_packages:
+                return  # v2 repeats the tree in v1 form for old npm versions
+            section = key if key in ('packages', 'dependencies') else None
+            seen_packages = seen_packages or section == 'packages'
+            current = None
+        elif depth == 2 and section:
+            if section == 'packages':
+                name = key[len('node_modules/'):] if key.startswith('node_modules/') else ''
+                current = name if name and '/node_modules/' not in name else None
+            else:
+                current = key
+        elif depth == 3 and current and key == 'version':
+            yield current, rest.strip().rstrip(',').strip('"'), ()
+            current = None
+
+
+def iter_yarn_lock(lines: Iterable[str]) -> Iterator[LockEntry]:
+    """Entries of a yarn.lock (classic v1 or Berry), with the ranges each one resolves"""
+    name, ranges = None, []
+    for line in lines:
+        if not line.strip() or line.startswith('#'):
+            continue
+        if not line[0].isspace():
+            # `"@scope/a@^1.0.0", "@scope/a@^1.2.0":` (v1) or `"a@npm:^1.0.0, a@npm:^1.2.0":` (Berry)
+            name, ranges = None, []
+            for spec in line.rstrip().rstrip(':').split(','):
+                spec = spec.strip().strip('"')
+                at = spec.find('@', 1)
+                if at > 0:
+                    name = spec[:at]
+                    version_range = spec[at + 1:]
+                    ranges.append(version_range[4:] if version_range.startswith('npm:') else version_range)
+            continue
+        if name and line.startswith('  version'):
+            yield name, line.strip()[len('version'):].lstrip(':').strip().strip('"'), tuple(ranges)
+            name = None
+
+
+def _pnpm_version(value: str) -> str:
+    # `18.2.0(react@18.2.0)` (v6+) and `18.2.0_react@18.2.0` (v5) carry peer suffixes
+    return value.strip().strip('\'"').split('(')[0].split('_')[0]
+
+
+def iter_pnpm_lock(lines: Iterable[str]) -> Iterator[LockEntry]:
+    """
+    Direct dependencies of the root importer of a pnpm-lock.yaml: `importers["."]` (v9),
+    or the top-level dependency sections (v5/v6). Ends where `packages:` begins.
+    """
+    in_importers = root_importer = False
+    block_indent = None  # indent of the dependency names in the current section
+    pending = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        indent = len(line) - len(line.lstrip(' '))
+        key, _, value = stripped.partition(':')
+        key, value = key.strip('\'"'), value.strip()
+        if indent == 0:
+            if key in ('packages', 'snapshots'):
+                return
+            in_importers = key == 'importers'
+            block_indent = 2 if key in PNPM_DEPENDENCY_SECTIONS else None
+            pending = None
+        elif in_importers and indent == 2:
+            root_importer = key == '.'
+            block_indent = pending = None
+        elif in_importers and indent == 4:
+            block_indent = 6 if root_importer and key in PNPM_DEPENDENCY_SECTIONS else None
+            pending = None
+        elif block_indent is not None and indent == block_indent:
+            # v5 `react: 18.2.0`; v6 and v9 nest `specifier:` and `version:` under the name
+            pending = None if value else key
+            if value:
+                yield key, _pnpm_version(value), ()
+        elif pending and indent == block_indent + 2 and key == 'version':
+            yield pending, _pnpm_version(value), ()
+            pending = None
+
+
+LOCKFILE_PARSERS: Dict[str, Callable[[Iterable[str]], Iterator[LockEntry]]] = {
+    'package-lock.json': iter_package_lock,
+    'npm-shrinkwrap.json': iter_package_lock,
+    'yarn.lock': iter_yarn_lock,
+    'pnpm-lock.yaml': iter_pnpm_lock
+}
+
+
+def resolve_versions(stream: BinaryIO, filename: str, declared: Dict[str, str]) -> Tuple[Dict[str, str], int]:
+    """
+    Resolved versions of the `declared` packages (name -> range from package.json) in
+    one lockfile stream, and how many entries were read. Reading stops once every
+    package is resolved through an entry for its declared range (or a top-level one).
+    """
+    resolved: Dict[str, str] = {}
+    exact = set()
+    scanned = 0
+    for name, version, ranges in LOCKFILE_PARSERS[filename](_lines(stream)):
+        scanned += 1
+        if name not in declared or name in exact:
+            continue
+        if not ranges or declared[name] in ranges:
+            resolved[name] = version
+            exact.add(name)
+            if len(exact) == len(declared):
+                break
+        elif name not in resolved:
+            resolved[name] = version  # another range of the same package, until the declared one shows up
+    return resolved, scanned
+
+
+def _package_lock_text(entries: Iterable[LockEntry]) -> str:
+    return json.dumps({'lockfileVersion': 1, 'dependencies': {name: {'version': version} for name, version, _ in entries}}, indent=2)
+
+
+def _yarn_lock_text(entries: Iterable[LockEntry]) -> str:
+    return ''.join(f'"{", ".join(f"{name}@{version_range}" for version_range in ranges)}":\n  version "{version}"\n\n'
+                   for name, version, ranges in entries if ranges)
+
+
+def _pnpm_lock_text(entries: Iterable[LockEntry]) -> str:
+    return 'dependencies:\n' + ''.join(f"  '{name}': {version}\n" for name, version, _ in entries)
+
+
+LOCKFILE_WRITERS: Dict[str, Callable[[Iterable[LockEntry]], str]] = {
+    'package-lock.json': _package_lock_text,
+    'npm-shrinkwrap.json': _package_lock_text,
+    'yarn.lock': _yarn_lock_text,
+    'pnpm-lock.yaml': _pnpm_lock_text
+}
+
+
+def compact_lockfile(stream: BinaryIO, filename: str, keep: Callable[[str], bool]) -> bytes:
+    """
+    A lockfile in the same format holding only the entries of the packages `keep`
+    accepts (the parsers read it as they read the original), built in one pass over
+    the stream. Used where a large lockfile would otherwise be held in memory whole.
+    """
+    entries = [entry for entry in LOCKFILE_PARSERS[filename](_lines(stream)) if keep(entry[0])]
+    return LOCKFILE_WRITERS[filename](entries).encode('utf-8')
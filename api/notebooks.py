@@ -0,0 +1,300 @@
+"""
+Streaming Jupyter notebook reader
+An .ipynb file is JSON whose bulk is usually cell outputs (base64 images, HTML,
+dataframes). The reader walks the document from the repository view's stream and
+keeps only what the analyzers use: the code cells' source and the kernel language.
+Every other value, outputs included, is skipped by jumping between quotes and
+brackets without decoding it, so memory stays flat whatever the notebook's size.
+"""
+
+import ast
+import io
+import json
+import re
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional
+
+CHUNK_CHARS = 64 * 1024
+
+# Code cell source kept per notebook; past it, later cells are skipped like outputs
+MAX_SOURCE_CHARS = 1024 * 1024
+
+# Cell magics whose body is still Python (`%%bash`, `%%sql`, `%%html` ... cells are not)
+PYTHON_CELL_MAGICS = {'time', 'timeit', 'capture', 'prun', 'debug'}
+
+NON_SPACE = re.compile(r'[^ \t\r\n]')
+STRING_SPECIAL = re.compile(r'["\\]')
+STRUCTURE = re.compile(r'["\[\]{}]')
+SCALAR_END = re.compile(r'[,}\] \t\r\n]')
+# `?name`, `name?` and `name??` object help lines
+HELP_LINE = re.compile(r'\s*(?:\?{1,2}[\w.]+|[\w.]+\?{1,2})\s*$')
+
+
+class Notebook(NamedTuple):
+    code_cells: List[str]    # source of each code cell, in order
+    language: Optional[str]  # kernel language from the metadata, when declared
+
+    @property
+    def is_python(self) -> bool:
+        return self.language is None or self.language.lower().startswith(('python', 'ipython'))
+
+
+class _JsonStream:
+    """Pull-style JSON walker over a text stream, reading it in fixed-size chunks"""
+
+    def __init__(self, stream: BinaryIO):
+        self._text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace')
+        self.buf = ''
+        self.pos = 0
+        self.kept = 0  # characters returned by string() so far
+
+    def _fill(self) -> bool:
+        chunk = self._text.read(CHUNK_CHARS)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, not consumed ('' at the end of the stream)"""
+        while True:
+            match = NON_SPACE.search(self.buf, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buf[self.pos]
+            self.pos = len(self.buf)
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def string(self, keep: bool = True) -> Optional[str]:
+        """
+        Consume a string. Its decoded value is returned while the reader is within
+        MAX_SOURCE_CHARS; otherwise (or with keep=False) it is skipped and None returned.
+        """
+        self.expect('"')
+        parts, size = [], 0
+        while True:
+            match = STRING_SPECIAL.search(self.buf, self.pos)
+            end = match.start() if match else len(self.buf)
+            if keep:
+                size += end - self.pos
+                keep = self.kept + size <= MAX_SOURCE_CHARS
+                if keep:
+                    parts.append(self.buf[self.pos:end])
+                else:
+                    parts = []
+            if match is None or (match.group() == '\\' and end + 1 >= len(self.buf)):
+                # The string (or an escape) continues in the next chunk
+                self.pos = end
+                if not self._fill():
+                    raise ValueError("unterminated string")
+                continue
+            if match.group() == '"':
+                self.pos = end + 1
+                break
+            # An escape: keep both characters for json to decode, skip them either way
+            if keep:
+                parts.append(self.buf[end:end + 2])
+            self.pos = end + 2
+        if not keep:
+            return None
+        value = ''.join(parts)
+        if '\\' in value:
+            value = json.loads(f'"{value}"', strict=False)
+        self.kept += len(value)
+        return value
+
+    def skip_value(self):
+        """Consume any value without decoding it"""
+        char = self.peek()
+        if char == '"':
+            self.string(keep=False)
+            return
+        if char not in '[{':
+            while True:
+                match = SCALAR_END.search(self.buf, self.pos)
+                if match:
+                    self.pos = match.start()
+                    return
+                self.pos = len(self.buf)
+                if not self._fill():
+                    return
+        depth = 0
+        while True:
+            match = STRUCTURE.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("unterminated value")
+                continue
+            if match.group() == '"':
+                self.pos = match.start()
+                self.string(keep=False)
+                continue
+            self.pos = match.end()
+            depth += 1 if match.group() in '[{' else -1
+            if depth == 0:
+                return
+
+    def members(self) -> Iterator[str]:
+        """Keys of the object starting here; the caller consumes each value before the next key"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.name()
+            self.expect(':')
+            yield key
+            if not self._next('}'):
+                return
+
+    def items(self) -> Iterator[None]:
+        """One step per element of the array starting here; the caller consumes each element"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield None
+            if not self._next(']'):
+                return
+
+    def name(self) -> Optional[str]:
+        """A short string (key, cell type, language) that does not count against the source budget"""
+        kept, self.kept = self.kept, 0
+        try:
+            return self.string()
+        finally:
+            self.kept = kept
+
+    def _next(self, closing: str) -> bool:
+        char = self.peek()
+        self.pos += 1
+        if char == ',':
+            return True
+        if char == closing:
+            return False
+        raise ValueError(f"expected ',' or {closing!r}, found {char!r}")
+
+
+def _source(reader: _JsonStream) -> Optional[str]:
+    """A cell's `source` (nbformat 4) or `input` (nbformat 3): one string or a list of lines"""
+    if reader.peek() == '"':
+        return reader.string()
+    if reader.peek() != '[':
+        reader.skip_value()
+        return None
+    lines = []
+    for _ in reader.items():
+        line = ''
+        if reader.peek() == '"':
+            line = reader.string()
+            if line is None:
+                lines = None  # over the budget: the cell is dropped rather than cut
+        else:
+            reader.skip_value()
+        if lines is not None:
+            lines.append(line)
+    return None if lines is None else ''.join(lines)
+
+
+def _cells(reader: _JsonStream, code_cells: List[str]):
+    for _ in reader.items():
+        if reader.peek() != '{':
+            reader.skip_value()
+            continue
+        cell_type = source = None
+        for key in reader.members():
+            if key == 'cell_type' and reader.peek() == '"':
+                cell_type = reader.name()
+            elif key in ('source', 'input') and cell_type in (None, 'code'):
+                source = _source(reader)
+            else:
+                # outputs, attachments, metadata, execution_count ...
+                reader.skip_value()
+        if cell_type == 'code' and source:
+            code_cells.append(source)
+
+
+def _language(reader: _JsonStream) -> Optional[str]:
+    """`metadata.language_info.name`, else `metadata.kernelspec.language`"""
+    found = {}
+    for key in reader.members():
+        if key in ('language_info', 'kernelspec') and reader.peek() == '{':
+            for field in reader.members():
+                if field == ('name' if key == 'language_info' else 'language') and reader.peek() == '"':
+                    found[key] = reader.name()
+                else:
+                    reader.skip_value()
+        else:
+            reader.skip_value()
+    return found.get('language_info') or found.get('kernelspec')
+
+
+def read_notebook(stream: BinaryIO) -> Notebook:
+    """Code cells and kernel language of an .ipynb stream (nbformat 3 or 4); raises ValueError on malformed JSON"""
+    reader = _JsonStream(stream)
+    code_cells, language = [], None
+    for key in reader.members():
+        if key == 'cells' and reader.peek() == '[':
+            _cells(reader, code_cells)
+        elif key == 'worksheets' and reader.peek() == '[':
+            for _ in reader.items():
+                for field in reader.members():
+                    if field == 'cells' and reader.peek() == '[':
+                        _cells(reader, code_cells)
+                    else:
+                        reader.skip_value()
+        elif key == 'metadata' and reader.peek() == '{':
+            language = _language(reader)
+        else:
+            reader.skip_value()
+    return Notebook(code_cells, language)
+
+
+def python_cell(source: str) -> str:
+    """
+    A code cell as plain Python: IPython line magics, shell escapes and `?` help lines
+    are commented out; a cell magic with a non-Python body comments out the whole cell
+    """
+    lines = source.split('\n')
+    first = lines[0].strip()
+    if first.startswith('%%'):
+        magic = first[2:].split(None, 1)[0] if first[2:].strip() else ''
+        start = 1 if magic in PYTHON_CELL_MAGICS else len(lines)
+        lines = ['# ' + line for line in lines[:start]] + lines[start:]
+    return '\n'.join('# ' + line if line.lstrip().startswith(('%', '!')) or HELP_LINE.match(line) else line
+                     for line in lines)
+
+
+def parseable_cells(cells: List[str]) -> List[str]:
+    """The cells that parse on their own, for notebooks where one broken cell fails the whole module"""
+    valid = []
+    for cell in cells:
+        try:
+            ast.parse(cell)
+        except (SyntaxError, ValueError, RecursionError):
+            continue
+        valid.append(cell)
+    return valid
+
+
+def compact_notebook(stream: BinaryIO) -> bytes:
+    """
+    An .ipynb holding only a notebook's code cells and kernel language, read from a
+    stream: what the analyzer reads from it is unchanged, and outputs are never held
+    """
+    notebook = read_notebook(stream)
+    return json.dumps({
+        'cells': [{'cell_type': 'code', 'metadata': {}, 'outputs': [], 'source': source} for source in notebook.code_cells],
+        'metadata': {'language_info': {'name': notebook.language}} if notebook.language else {},
+        'nbformat': 4,
+        'nbformat_minor': 5
+    }).encode('utf-8')
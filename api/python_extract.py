@@ -0,0 +1,128 @@
+"""
+Single-pass Python source extraction
+Each .py file is parsed once per request; one NodeVisitor pass collects imports,
+classes with their methods, functions, docstrings, route and model hints. The deep
+analysis and the legacy `python_code_summary` prompt section are both derived from it.
+"""
+
+import ast
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from .route_extract import is_python_model, python_decorator_route, python_url_call, resolve_python_routes
+
+
+class PythonSymbolVisitor(ast.NodeVisitor):
+    """
+    Collects imports, classes and functions (methods and nested ones included) in source
+    order, plus route decorators, URL pattern calls and model classes (see route_extract)
+    """
+
+    def __init__(self):
+        self.imports: List[str] = []
+        self.classes: List[Dict[str, Any]] = []
+        self.functions: List[Dict[str, Any]] = []
+        self.route_candidates: List[tuple] = []
+        self.url_calls: List[tuple] = []
+        self.model_classes: List[Dict[str, Any]] = []
+
+    def visit_Import(self, node: ast.Import):
+        self.imports.extend(alias.name for alias in node.names)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module:
+            self.imports.append(node.module)
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        record = {
+            'name': node.name,
+            'docstring': ast.get_docstring(node),
+            'methods': [n.name for n in node.body if isinstance(n, ast.FunctionDef)]
+        }
+        self.classes.append(record)
+        if is_python_model(node):
+            self.model_classes.append(record)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        self.functions.append({
+            'name': node.name,
+            'docstring': ast.get_docstring(node),
+            'args': [arg.arg for arg in node.args.args]
+        })
+        self._collect_routes(node)
+        self.generic_visit(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):
+        # Not listed as a function, but async handlers carry routes too
+        self._collect_routes(node)
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        url_call = python_url_call(node)
+        if url_call:
+            self.url_calls.append(url_call)
+        self.generic_visit(node)
+
+    def _collect_routes(self, node):
+        for decorator in node.decorator_list:
+            route = python_decorator_route(decorator)
+            if route:
+                self.route_candidates.append(route)
+
+
+def extract_python_symbols(content: str, file_path: str) -> Dict[str, Any]:
+    """
+    Parse `content` once and return the per-file record:
+    imports, classes, functions, lines, routes (API endpoints) and models.
+    Raises SyntaxError (or RecursionError for pathologically nested code).
+    """
+    visitor = PythonSymbolVisitor()
+    visitor.visit(ast.parse(content))
+
+    routes = resolve_python_routes(visitor.route_candidates, visitor.url_calls, visitor.imports, file_path)
+    models = [{
+        'name': cls['name'],
+        'file': file_path,
+        'methods': cls['methods'],
+        'docstring': cls['docstring']
+    } for cls in visitor.model_classes]
+
+    return {
+        'imports': visitor.imports,
+        'classes': visitor.classes,
+        'functions': visitor.functions,
+        'lines': len(content.split('\n')),
+        'routes': routes,
+        'models': models
+    }
+
+
+def summarize_symbols(record: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Legacy one-line-per-symbol summary (`def name(...): # docstring`) of a file record"""
+    return {
+        "functions": [f"def {func['name']}(...): # {(func['docstring'] or 'No docstring.')[:80]}" for func in record['functions']],
+        "classes": [f"class {cls['name']}: # {(cls['docstring'] or 'No docstring.')[:80]}" for cls in record['classes']]
+    }
+
+
+def build_python_code_summary(index, file_analysis: Dict[str, Dict], read_text: Optional[Callable[[str], str]] = None) -> Dict[str, Dict]:
+    """
+    `python_code_summary` for the prompt, keyed by file name, from the records the
+    deep analyzer already produced. Files it has no record for are parsed here only
+    when `read_text` is given (i.e. when the deep analysis did not run).
+    """
+    summaries = {}
+    for entry in index.with_extension('.py'):
+        record = file_analysis.get(entry.path)
+        if record is None and read_text:
+            try:
+                record = extract_python_symbols(read_text(entry.path), entry.path)
+            except Exception as e:
+                print(f"Could not parse Python file {entry.path}: {e}")
+        if not record:
+            continue
+        summary = summarize_symbols(record)
+        if summary["functions"] or summary["classes"]:
+            summaries[os.path.basename(entry.path)] = summary
+    return summaries
@@ -0,0 +1,325 @@
+"""
+Virtual repository views
+Lets the analyzers list, stat and read repository files straight from a zipball
+without extracting it, or from a plain directory when one already exists on disk
+"""
+
+import io
+import os
+import json
+import zipfile
+import tempfile
+import threading
+from collections import namedtuple
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union
+
+# Archives up to this size are kept entirely in memory; larger ones are read from disk
+IN_MEMORY_ZIP_BYTES = int(os.getenv("REPO_IN_MEMORY_ZIP_BYTES", str(32 * 1024 * 1024)))
+
+RepoEntry = namedtuple('RepoEntry', ['path', 'size'])
+
+# Archive member (beside the wrapped directory) holding a MemoryRepository's full listing:
+# files without content, real sizes of compacted ones and the tree's blob SHAs
+LISTING_MEMBER = '.repository-listing.json'
+
+
+def new_archive_buffer() -> BinaryIO:
+    """Scratch file for a downloaded archive: in memory while small, spilled to disk when large"""
+    return tempfile.SpooledTemporaryFile(max_size=IN_MEMORY_ZIP_BYTES, mode='w+b')
+
+
+class LocalRepository:
+    """Repository view backed by a directory on disk"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.name = os.path.basename(os.path.normpath(root))
+
+    def _abs(self, rel_path: str) -> str:
+        return os.path.join(self.root, *[p for p in rel_path.split('/') if p])
+
+    def walk(self) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """os.walk-style traversal yielding repo-relative roots; prune by mutating dirs in place"""
+        for root, dirs, files in os.walk(self.root, topdown=True):
+            rel_root = os.path.relpath(root, self.root)
+            rel_root = '' if rel_root == '.' else rel_root.replace(os.sep, '/')
+            yield rel_root, dirs, files
+
+    def list_files(self) -> List[str]:
+        return [f"{root}/{f}" if root else f for root, _, files in self.walk() for f in files]
+
+    def exists(self, rel_path: str) -> bool:
+        return os.path.exists(self._abs(rel_path))
+
+    def is_dir(self, rel_path: str) -> bool:
+        return os.path.isdir(self._abs(rel_path))
+
+    def stat(self, rel_path: str) -> RepoEntry:
+        return RepoEntry(rel_path, os.path.getsize(self._abs(rel_path)))
+
+    def open(self, rel_path: str) -> BinaryIO:
+        return open(self._abs(rel_path), 'rb')
+
+    def read_bytes(self, rel_path: str) -> bytes:
+        with self.open(rel_path) as f:
+            return f.read()
+
+    def read_text(self, rel_path: str, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+        return self.read_bytes(rel_path).decode(encoding, errors)
+
+    def close(self):
+        pass
+
+
+class _IndexedRepository:
+    """Shared directory index for views whose file listing is known up front"""
+
+    def __init__(self):
+        self._sizes: Dict[str, int] = {}
+        self._tree: Dict[str, Tuple[List[str], List[str]]] = {'': ([], [])}
+        # RepoIndex built from this view (see repo_index.get_repo_index)
+        self.index = None
+
+    def _add_dir(self, rel_dir: str):
+        if rel_dir in self._tree:
+            return
+        parent, _, dirname = rel_dir.rpartition('/')
+        self._add_dir(parent)
+        self._tree[parent][0].append(dirname)
+        self._tree[rel_dir] = ([], [])
+        self.index = None
+
+    def _add_file(self, rel_path: str, size: int):
+        parent, _, filename = rel_path.rpartition('/')
+        self._add_dir(parent)
+        self._tree[parent][1].append(filename)
+        self._sizes[rel_path] = size
+        self.index = None
+
+    def walk(self) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """os.walk-style traversal of the index; prune by mutating dirs in place"""
+        stack = ['']
+        while stack:
+            rel_root = stack.pop()
+            subdirs, files = self._tree[rel_root]
+            dirs = list(subdirs)
+            yield rel_root, dirs, list(files)
+            for d in reversed(dirs):
+                child = f"{rel_root}/{d}" if rel_root else d
+                if child in self._tree:
+                    stack.append(child)
+
+    def list_files(self) -> List[str]:
+        return list(self._sizes)
+
+    def exists(self, rel_path: str) -> bool:
+        rel_path = rel_path.strip('/')
+        return rel_path in self._sizes or rel_path in self._tree
+
+    def is_dir(self, rel_path: str) -> bool:
+        return rel_path.strip('/') in self._tree
+
+    def stat(self, rel_path: str) -> RepoEntry:
+        if rel_path not in self._sizes:
+            raise FileNotFoundError(rel_path)
+        return RepoEntry(rel_path, self._sizes[rel_path])
+
+    def read_bytes(self, rel_path: str) -> bytes:
+        with self.open(rel_path) as f:
+            return f.read()
+
+    def read_text(self, rel_path: str, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+        return self.read_bytes(rel_path).decode(encoding, errors)
+
+
+class ZipRepository(_IndexedRepository):
+    """
+    Repository view over a zipball. Only the central directory is parsed up front;
+    members are decompressed lazily when a file is opened or read.
+    """
+
+    def __init__(self, source: Union[str, BinaryIO], member_filter=None):
+        super().__init__()
+        self._source = source
+        # Optional MemberFilter; rejected members are left out of the view entirely
+        self.member_filter = member_filter
+        self._zip = zipfile.ZipFile(source, 'r')
+        self._members: Dict[str, zipfile.ZipInfo] = {}
+        # Git blob SHAs recorded with a sparse snapshot (see MemoryRepository.write_zip)
+        self.blob_shas: Dict[str, str] = {}
+
+        listing = None
+        if LISTING_MEMBER in self._zip.NameToInfo:
+            listing = json.loads(self._zip.read(LISTING_MEMBER))
+            self.blob_shas = listing.get('blob_shas', {})
+        infolist = [info for info in self._zip.infolist() if info.filename != LISTING_MEMBER]
+
+        names = [info.filename for info in infolist]
+        self.prefix = self._common_prefix(names)
+        self.name = self.prefix.rstrip('/') or 'repository'
+
+        if member_filter:
+            # The central directory lists every .gitignore / .gitattributes up front
+            infos = {info.filename[len(self.prefix):].strip('/'): info for info in infolist
+                     if not info.is_dir() and member_filter.ignore_matcher.wants(info.filename)}
+            member_filter.load_ignore_files(((path, info.file_size) for path, info in infos.items()),
+                                            lambda path: self._zip.read(infos[path]))
+
+        if listing:
+            # Listed in the original view's order, with files that were never fetched
+            members = {info.filename[len(self.prefix):].strip('/'): info for info in infolist if not info.is_dir()}
+            for rel_path, size in listing['files']:
+                if member_filter and not member_filter.accept(rel_path, size):
+                    continue
+                self._add_file(rel_path, size)
+                if rel_path in members:
+                    self._members[rel_path] = members[rel_path]
+        else:
+            for info in infolist:
+                rel_path = info.filename[len(self.prefix):].strip('/')
+                if not rel_path:
+                    continue
+                if info.is_dir():
+                    if not (member_filter and member_filter.is_ignored_dir(rel_path)):
+                        self._add_dir(rel_path)
+                elif member_filter and not member_filter.accept(rel_path, info.file_size):
+                    continue
+                else:
+                    self._add_file(rel_path, info.file_size)
+                    self._members[rel_path] = info
+
+    @staticmethod
+    def _common_prefix(names: List[str]) -> str:
+        """GitHub zipballs wrap everything in a single `owner-repo-sha/` directory"""
+        top_level = {name.split('/', 1)[0] for name in names if name}
+        if len(top_level) == 1:
+            top = top_level.pop()
+            if all(name.startswith(top + '/') for name in names):
+                return top + '/'
+        return ''
+
+    def open(self, rel_path: str) -> BinaryIO:
+        info = self._members.get(rel_path)
+        if info is None:
+            raise FileNotFoundError(rel_path)
+        return self._zip.open(info, 'r')
+
+    def close(self):
+        self._zip.close()
+        if hasattr(self._source, 'close'):
+            self._source.close()
+
+
+class MemoryRepository(_IndexedRepository):
+    """
+    Repository view assembled from individually fetched files (e.g. the Git
+    Trees/Blobs API). Every entry is listed; only fetched files have content.
+    """
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self._contents: Dict[str, bytes] = {}
+        # DeepProjectAnalyzer fed while the files arrived, if any
+        self.analyzer = None
+        # Git blob SHAs from the tree listing, so cached per-file analyses are found
+        # without the content (see file_cache)
+        self.blob_shas: Dict[str, str] = {}
+
+    def add_dir(self, rel_dir: str):
+        self._add_dir(rel_dir)
+
+    def add_entry(self, rel_path: str, size: int):
+        """List a file without content (shown in the tree, never read)"""
+        self._add_file(rel_path, size)
+
+    def add_file(self, rel_path: str, data: bytes):
+        if rel_path not in self._sizes:
+            self._add_file(rel_path, len(data))
+        self._contents[rel_path] = data
+
+    def open(self, rel_path: str) -> BinaryIO:
+        if rel_path not in self._contents:
+            raise FileNotFoundError(rel_path)
+        return io.BytesIO(self._contents[rel_path])
+
+    def _file_contents(self) -> Iterator[Tuple[str, bytes]]:
+        return iter(self._contents.items())
+
+    def write_zip(self, dest: BinaryIO) -> int:
+        """
+        Serialize the fetched files as a zipball (wrapped in a `name/` directory like GitHub's),
+        with the full listing in LISTING_MEMBER so ZipRepository reopens the same view
+        """
+        with zipfile.ZipFile(dest, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for rel_path, data in self._file_contents():
+                archive.writestr(f"{self.name}/{rel_path}", data)
+            archive.writestr(LISTING_MEMBER, json.dumps({
+                'files': list(self._sizes.items()),
+                'blob_shas': self.blob_shas
+            }))
+        return dest.tell()
+
+    def close(self):
+        self._contents.clear()
+        self.analyzer = None
+
+
+class SpooledRepository(MemoryRepository):
+    """
+    MemoryRepository whose file contents are appended to a scratch file as they arrive
+    (see new_archive_buffer), so only the listing stays in memory once it spills to disk
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._spool = new_archive_buffer()
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        self._end = 0
+        # Reads seek the shared spool (workspace packages are analyzed from threads)
+        self._lock = threading.Lock()
+
+    def add_file(self, rel_path: str, data: bytes):
+        if rel_path not in self._sizes:
+            self._add_file(rel_path, len(data))
+        with self._lock:
+            self._spool.seek(self._end)
+            self._spool.write(data)
+            self._spans[rel_path] = (self._end, len(data))
+            self._end += len(data)
+
+    def _read(self, rel_path: str) -> bytes:
+        offset, size = self._spans[rel_path]
+        with self._lock:
+            self._spool.seek(offset)
+            return self._spool.read(size)
+
+    def open(self, rel_path: str) -> BinaryIO:
+        if rel_path not in self._spans:
+            raise FileNotFoundError(rel_path)
+        return io.BytesIO(self._read(rel_path))
+
+    def _file_contents(self) -> Iterator[Tuple[str, bytes]]:
+        return ((rel_path, self._read(rel_path)) for rel_path in self._spans)
+
+    def close(self):
+        self._spool.close()
+        self._spans.clear()
+        super().close()
+
+
+def open_zip_repository(zip_path: str, in_memory_threshold: int = None, member_filter=None) -> ZipRepository:
+    """Open an on-disk zipball, loading it into memory first when it is small enough"""
+    if in_memory_threshold is None:
+        in_memory_threshold = IN_MEMORY_ZIP_BYTES
+    if os.path.getsize(zip_path) <= in_memory_threshold:
+        with open(zip_path, 'rb') as f:
+            return ZipRepository(io.BytesIO(f.read()), member_filter)
+    return ZipRepository(zip_path, member_filter)
+
+
+def as_repository(repo: Union[str, LocalRepository, ZipRepository, MemoryRepository]):
+    """Accept either a filesystem path or an existing repository view"""
+    if isinstance(repo, str):
+        return LocalRepository(repo)
+    return repo
@@ -0,0 +1,247 @@
+"""
+Bounded-memory repository download helpers
+Streams GitHub archives to disk chunk by chunk instead of buffering the whole body
+"""
+
+import os
+import re
+from typing import Callable, Optional, BinaryIO, Tuple
+
+from .github_client import get_github_client
+
+# Size of each chunk pulled from the socket and written to disk
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("REPO_DOWNLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+# Hard cap on archive size; downloads abort as soon as it is exceeded
+MAX_DOWNLOAD_BYTES = int(os.getenv("REPO_MAX_DOWNLOAD_BYTES", str(250 * 1024 * 1024)))
+
+# How often (in bytes) the progress callback fires
+PROGRESS_INTERVAL_BYTES = 5 * 1024 * 1024
+
+REPOSITORY_TOO_LARGE_MESSAGE = "Repository is too large to process. Please try with a smaller repository."
+
+
+class RepositoryTooLargeError(Exception):
+    """Raised when an archive exceeds MAX_DOWNLOAD_BYTES"""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(REPOSITORY_TOO_LARGE_MESSAGE)
+        self.size = size
+        self.limit = limit
+
+
+def format_bytes(size: int) -> str:
+    """Format a byte count for log and status messages"""
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} B"
+
+
+def stream_response_to_file(
+    response,
+    dest: BinaryIO,
+    chunk_size: int = None,
+    max_bytes: int = None,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Write a streamed `requests` response to `dest` without holding it in memory.
+    Returns the number of bytes written. Raises RepositoryTooLargeError as soon
+    as the running byte counter (or the advertised Content-Length) exceeds max_bytes.
+    """
+    chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+    max_bytes = max_bytes or MAX_DOWNLOAD_BYTES
+
+    # Reject early when the server tells us the size up front
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        response.close()
+        raise RepositoryTooLargeError(int(content_length), max_bytes)
+
+    downloaded = 0
+    next_report = PROGRESS_INTERVAL_BYTES
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if not chunk:
+                continue
+            downloaded += len(chunk)
+            if downloaded > max_bytes:
+                raise RepositoryTooLargeError(downloaded, max_bytes)
+            dest.write(chunk)
+
+            if downloaded >= next_report:
+                next_report += PROGRESS_INTERVAL_BYTES
+                if on_progress:
+                    on_progress(downloaded)
+    finally:
+        response.close()
+
+    if on_progress:
+        on_progress(downloaded)
+    return downloaded
+
+
+def parse_github_repo(repo_url: str) -> Optional[Tuple[str, str]]:
+    """Extract (owner, repo) from a GitHub URL, ignoring .git suffixes and trailing paths"""
+    normalized_url = repo_url.strip().rstrip('/')
+    if normalized_url.endswith('.git'):
+        normalized_url = normalized_url[:-4]
+    match = re.search(r'github\.com[/:]([^/\s]+)/([^/\s?#]+)', normalized_url)
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+
+def resolve_commit_sha(owner: str, repo: str, headers: dict = None) -> Optional[str]:
+    """
+    Resolve the default branch HEAD to a commit SHA with one lightweight call.
+    The last ETag is replayed as If-None-Match, so an unchanged repository
+    answers 304 (which does not count against the GitHub rate limit).
+    """
+    from .snapshot_cache import get_result_cache
+
+    head_key = f"{owner}/{repo}".lower()
+    results = get_result_cache()
+    cached = results.get('heads', head_key)
+
+    request_headers = {**(headers or {}), 'Accept': 'application/vnd.github.sha'}
+    if cached and cached.get('etag'):
+        request_headers['If-None-Match'] = cached['etag']
+
+    try:
+        response = get_github_client().get(
+            f"/repos/{owner}/{repo}/commits/HEAD",
+            headers=request_headers,
+            timeout=10
+        )
+        if response.status_code == 304 and cached:
+            print(f"⚡ HEAD unchanged for {owner}/{repo}: {cached['sha'][:7]}")
+            return cached['sha']
+        if response.status_code == 200:
+            commit_sha = response.text.strip()
+            if re.fullmatch(r'[0-9a-f]{40}', commit_sha):
+                etag = response.headers.get('ETag')
+                if etag:
+                    results.put('heads', head_key, {'etag': etag, 'sha': commit_sha})
+                print(f"📌 Resolved HEAD for {owner}/{repo}: {commit_sha[:7]}")
+                return commit_sha
+        print(f"⚠️ Could not resolve HEAD for {owner}/{repo}: {response.status_code}")
+    except Exception as e:
+        print(f"⚠️ Could not resolve HEAD for {owner}/{repo}: {e}")
+    return None
+
+
+def fetch_repository(
+    owner: str,
+    repo: str,
+    headers: dict = None,
+    check_response: Optional[Callable] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+    commit_sha: str = None,
+    analyze: bool = False,
+    baseline=None,
+    metadata: dict = None
+):
+    """
+    Acquire a repository view for owner/repo.
+    The HEAD commit is resolved first so a cached snapshot of that commit skips the
+    download entirely; otherwise the tarball is streamed (see repo_stream) and saved to
+    the cache as a zipball. Callers that go on to run the deep analysis pass `analyze`
+    to have source files analyzed while the tarball downloads. With REPO_STREAMING_PIPELINE
+    off, the zipball is streamed into the cache (or a spooled temp file when the commit
+    is unknown). Repositories above SPARSE_FETCH_THRESHOLD_KB are fetched file by file
+    through the Trees/Blobs API instead.
+    `check_response(response)` maps a failed archive response to a user-facing error
+    message. Pass `commit_sha` when the caller has already resolved HEAD, `metadata`
+    when it already fetched the repository's (GET /repos/{owner}/{repo}), and the
+    incremental.AnalysisBaseline of an earlier commit to skip files it still covers.
+    Returns (repository_view, error). Raises RepositoryTooLargeError past the size cap.
+    """
+    from .repo_archive import ZipRepository, new_archive_buffer
+    from .repo_filters import MemberFilter
+    from .snapshot_cache import get_snapshot_cache
+    from .repo_stream import STREAMING_PIPELINE, stream_tarball_repository
+    from .sparse_fetch import SPARSE_FETCH_THRESHOLD_KB, fetch_sparse_repository, get_repository_metadata, should_fetch_sparse
+
+    headers = headers or {}
+    if not commit_sha:
+        commit_sha = resolve_commit_sha(owner, repo, headers)
+
+    cache = None
+    if commit_sha:
+        try:
+            cache = get_snapshot_cache()
+        except OSError as e:
+            print(f"⚠️ Snapshot cache unavailable: {e}")
+
+    if cache:
+        repo_view = cache.open(owner, repo, commit_sha, MemberFilter())
+        if repo_view:
+            return repo_view, None
+
+    def cache_view(repo_view):
+        # Keep the snapshot as a zipball so later requests can read it in place
+        if cache:
+            try:
+                cache.put(owner, repo, commit_sha, repo_view.write_zip)
+            except OSError as e:
+                print(f"⚠️ Could not cache snapshot: {e}")
+
+    # Huge repositories: fetch only the files the analyzers read instead of the zipball
+    if SPARSE_FETCH_THRESHOLD_KB > 0:
+        if metadata is None:
+            metadata = get_repository_metadata(owner, repo, headers)
+        if should_fetch_sparse(metadata):
+            print(f"🪶 {owner}/{repo} is {format_bytes(metadata['size'] * 1024)}, switching to sparse fetch")
+            ref = commit_sha or metadata.get('default_branch') or 'HEAD'
+            repo_view, error = fetch_sparse_repository(owner, repo, ref, headers, baseline=baseline)
+            if repo_view:
+                cache_view(repo_view)
+                return repo_view, None
+            print(f"⚠️ Sparse fetch failed ({error}), falling back to the zipball")
+
+    # The tarball can be decompressed while it downloads; the zipball needs its central directory
+    archive_format = 'tarball' if STREAMING_PIPELINE else 'zipball'
+
+    # Pin the download to the resolved commit so the cache entry matches its key
+    archive_url = f"/repos/{owner}/{repo}/{archive_format}"
+    if commit_sha:
+        archive_url += f"/{commit_sha}"
+
+    response = get_github_client().get(archive_url, headers=headers, stream=True)
+    if response.status_code != 200:
+        response.close()
+        error = check_response(response) if check_response else None
+        return None, error or f"Failed to download repository: {response.status_code}"
+
+    def write(dest: BinaryIO) -> int:
+        total_size = stream_response_to_file(response, dest, on_progress=on_progress)
+        print(f"📦 Downloaded {format_bytes(total_size)}, opening archive...")
+        return total_size
+
+    # Vendored dirs, binaries and oversized members are dropped before they are read
+    member_filter = MemberFilter()
+    if STREAMING_PIPELINE:
+        repo_view = stream_tarball_repository(response, f"{owner}-{repo}", member_filter, on_progress,
+                                              analyze=analyze, baseline=baseline)
+        cache_view(repo_view)
+    elif cache:
+        repo_view = cache.store(owner, repo, commit_sha, write, member_filter)
+    else:
+        # Small archives stay in memory, large ones spill to a temp file
+        archive = new_archive_buffer()
+        try:
+            write(archive)
+            archive.seek(0)
+            repo_view = ZipRepository(archive, member_filter)
+        except BaseException:
+            archive.close()
+            raise
+    print(f"🧹 Archive filter: {member_filter.summary()}")
+
+    if not repo_view.list_files():
+        repo_view.close()
+        return None, "Failed to extract repository"
+    return repo_view, None
@@ -0,0 +1,131 @@
+"""
+Repository member filtering
+Decides from the zip central directory alone which members are worth reading,
+so vendored trees, binaries and oversized files never reach the analyzers
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .ignore_rules import IgnoreMatcher, MAX_IGNORE_FILE_BYTES
+from .lockfiles import LOCKFILE_PARSERS
+
+# Directories that only hold vendored, generated or build output
+IGNORED_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'target', 'dist', 'build', '.next', '.ipynb_checkpoints'}
+
+# Extensions that are never source code: images, fonts, media, archives, model weights, compiled objects
+BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tif', '.tiff', '.psd', '.icns',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.mp3', '.mp4', '.wav', '.ogg', '.flac', '.mov', '.avi', '.mkv', '.webm',
+    '.zip', '.tar', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar', '.war',
+    '.pt', '.pth', '.ckpt', '.h5', '.hdf5', '.onnx', '.pb', '.tflite', '.safetensors',
+    '.bin', '.pkl', '.pickle', '.joblib', '.npy', '.npz', '.parquet',
+    '.pdf', '.exe', '.dll', '.so', '.dylib', '.o', '.a', '.lib', '.class', '.pyc', '.pyo', '.wasm',
+    '.sqlite', '.db'
+}
+
+# Members larger than this are skipped regardless of type
+MAX_MEMBER_BYTES = int(os.getenv("REPO_MAX_MEMBER_BYTES", str(5 * 1024 * 1024)))
+
+# Lockfiles are streamed rather than read whole (see lockfiles), so they get a larger cap
+MAX_LOCKFILE_BYTES = int(os.getenv("REPO_MAX_LOCKFILE_BYTES", str(64 * 1024 * 1024)))
+
+# Notebooks are mostly cell outputs the analyzer skips unread (see notebooks), so they get one too
+MAX_NOTEBOOK_BYTES = int(os.getenv("REPO_MAX_NOTEBOOK_BYTES", str(256 * 1024 * 1024)))
+
+# At most this many .gitignore / .gitattributes files are loaded, shallowest first
+MAX_IGNORE_FILES = int(os.getenv("REPO_MAX_IGNORE_FILES", "64"))
+
+
+class MemberFilter:
+    """Classifies archive members and keeps a tally of what was skipped and why"""
+
+    def __init__(self, ignored_dirs=None, binary_extensions=None, max_member_bytes: int = None, ignore_matcher: IgnoreMatcher = None):
+        self.ignored_dirs = set(ignored_dirs if ignored_dirs is not None else IGNORED_DIRS)
+        self.binary_extensions = set(binary_extensions if binary_extensions is not None else BINARY_EXTENSIONS)
+        self.max_member_bytes = max_member_bytes or MAX_MEMBER_BYTES
+        # Built-in generated-path patterns plus whatever ignore files are loaded into it
+        self.ignore_matcher = ignore_matcher if ignore_matcher is not None else IgnoreMatcher()
+        self.ignore_files_loaded = 0
+        self.kept_entries = 0
+        self.kept_bytes = 0
+        self.skipped_entries = 0
+        self.skipped_bytes = 0
+        self.skipped_by_reason: Dict[str, int] = {'ignored_dir': 0, 'gitignored': 0, 'generated': 0, 'vendored': 0,
+                                                  'binary': 0, 'oversized': 0}
+
+    def is_ignored_dir(self, rel_dir: str) -> bool:
+        return (any(part in self.ignored_dirs for part in rel_dir.split('/'))
+                or self.ignore_matcher.excluded(rel_dir, is_dir=True) is not None)
+
+    def wants_ignore_file(self, rel_path: str, size: int) -> bool:
+        """True for a .gitignore / .gitattributes member that should be loaded (see load_ignore_file)"""
+        return (self.ignore_matcher.wants(rel_path) and size <= MAX_IGNORE_FILE_BYTES
+                and self.ignore_files_loaded < MAX_IGNORE_FILES
+                and not self.is_ignored_dir(rel_path.rpartition('/')[0]))
+
+    def load_ignore_file(self, rel_path: str, data: bytes):
+        self.ignore_matcher.add_file(rel_path, data.decode('utf-8', 'replace'))
+        self.ignore_files_loaded += 1
+
+    def load_ignore_files(self, members: Iterable[Tuple[str, int]], read) -> List[str]:
+        """
+        Load every wanted ignore file among (path, size) members before any member is
+        judged, parent directories first; `read(path)` returns a member's bytes.
+        Returns the loaded paths.
+        """
+        loaded = []
+        candidates = [(rel_path, size) for rel_path, size in members if self.ignore_matcher.wants(rel_path)]
+        for rel_path, size in sorted(candidates, key=lambda member: (member[0].count('/'), member[0])):
+            if self.wants_ignore_file(rel_path, size):
+                try:
+                    self.load_ignore_file(rel_path, read(rel_path))
+                    loaded.append(rel_path)
+                except Exception as e:
+                    print(f"⚠️ Could not read {rel_path}: {e}")
+        return loaded
+
+    def skip_reason(self, rel_path: str, size: int) -> Optional[str]:
+        """Return why a member should be skipped, or None to keep it"""
+        parts = rel_path.split('/')
+        if any(part in self.ignored_dirs for part in parts[:-1]):
+            return 'ignored_dir'
+        # .gitignore, linguist-vendored / linguist-generated and built-in generated paths
+        reason = self.ignore_matcher.excluded(rel_path)
+        if reason:
+            return reason
+        if os.path.splitext(parts[-1])[1].lower() in self.binary_extensions:
+            return 'binary'
+        if size > self.max_member_bytes and not (parts[-1] in LOCKFILE_PARSERS and size <= MAX_LOCKFILE_BYTES) \
+                and not (parts[-1].lower().endswith('.ipynb') and size <= MAX_NOTEBOOK_BYTES):
+            return 'oversized'
+        return None
+
+    def accept(self, rel_path: str, size: int) -> bool:
+        """Check a member and record it in the running totals"""
+        reason = self.skip_reason(rel_path, size)
+        if reason:
+            self.skipped_entries += 1
+            self.skipped_bytes += size
+            self.skipped_by_reason[reason] += 1
+            return False
+        self.kept_entries += 1
+        self.kept_bytes += size
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'kept_entries': self.kept_entries,
+            'kept_bytes': self.kept_bytes,
+            'skipped_entries': self.skipped_entries,
+            'skipped_bytes': self.skipped_bytes,
+            **{f'skipped_{reason}': count for reason, count in self.skipped_by_reason.items()}
+        }
+
+    def summary(self) -> str:
+        """One-line description for the request log"""
+        from .repo_download import format_bytes
+        reasons = ', '.join(f"{count} {reason.replace('_', ' ')}" for reason, count in self.skipped_by_reason.items() if count)
+        return (f"kept {self.kept_entries} files ({format_bytes(self.kept_bytes)}), "
+                f"skipped {self.skipped_entries} ({format_bytes(self.skipped_bytes)}){': ' + reasons if reasons else ''}")
@@ -0,0 +1,161 @@
+"""
+One-pass repository index
+Walks a repository once (os.scandir for directories on disk, the in-memory listing
+for archive views) and answers every later question about paths, sizes, languages
+and directory names, so analysis phases never re-walk the tree
+"""
+
+import os
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .ignore_rules import IGNORE_FILES, IgnoreMatcher, MAX_IGNORE_FILE_BYTES
+from .repo_archive import LocalRepository
+from .repo_filters import IGNORED_DIRS
+
+IndexEntry = namedtuple('IndexEntry', ['path', 'size', 'ext', 'language'])
+
+# Source languages by file extension
+LANGUAGE_BY_EXTENSION = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript', '.java': 'java', '.kt': 'kotlin', '.swift': 'swift',
+    '.c': 'c', '.h': 'c', '.cpp': 'c++', '.cc': 'c++', '.hpp': 'c++', '.cs': 'c#', '.rs': 'rust',
+    '.go': 'go', '.php': 'php', '.rb': 'ruby', '.scala': 'scala', '.dart': 'dart', '.lua': 'lua',
+    '.r': 'r', '.jl': 'julia', '.sh': 'shell', '.ipynb': 'jupyter', '.vue': 'vue', '.svelte': 'svelte',
+    '.html': 'html', '.css': 'css', '.scss': 'css', '.sql': 'sql'
+}
+
+
+class RepoIndex:
+    """Flat index of a repository's files and directories, in walk order"""
+
+    def __init__(self, repo, ignored_dirs: Iterable[str] = None, ignore_matcher: IgnoreMatcher = None):
+        self.repo = repo
+        self.name = repo.name
+        self.ignored_dirs = set(ignored_dirs if ignored_dirs is not None else IGNORED_DIRS)
+        # .gitignore / .gitattributes rules are loaded per directory as the walk reaches it
+        self.ignore_matcher = ignore_matcher if ignore_matcher is not None else IgnoreMatcher()
+        # Files and directories left out by the ignore rules, per reason
+        self.pruned: Dict[str, int] = {}
+        self.files: List[IndexEntry] = []
+        self.dirs: List[str] = []
+        self.dir_names: Set[str] = set()
+        # (directory, file names) pairs in walk order, for tree rendering
+        self.layout: List[Tuple[str, List[str]]] = []
+        self._by_path: Dict[str, IndexEntry] = {}
+        self._dir_set: Set[str] = set()
+        self._by_ext: Dict[str, List[IndexEntry]] = {}
+
+        if isinstance(repo, LocalRepository):
+            self._scan_directory(repo.root)
+        else:
+            self._scan_view(repo)
+
+    def _add(self, rel_root: str, files: List[Tuple[str, int]]):
+        if rel_root:
+            self.dirs.append(rel_root)
+            self._dir_set.add(rel_root)
+            self.dir_names.add(rel_root.rpartition('/')[2].lower())
+        self.layout.append((rel_root, [name for name, _ in files]))
+        for name, size in files:
+            path = f"{rel_root}/{name}" if rel_root else name
+            ext = os.path.splitext(name)[1].lower()
+            entry = IndexEntry(path, size, ext, LANGUAGE_BY_EXTENSION.get(ext))
+            self.files.append(entry)
+            self._by_path[path] = entry
+            self._by_ext.setdefault(ext, []).append(entry)
+
+    def _load_ignore_files(self, rel_root: str, names: Iterable[str], read_bytes):
+        """Feed this directory's .gitignore / .gitattributes to the matcher before judging its entries"""
+        for name in IGNORE_FILES:
+            rel_path = f"{rel_root}/{name}" if rel_root else name
+            if name in names and self.ignore_matcher.wants(rel_path):
+                try:
+                    data = read_bytes(rel_path)
+                except Exception:
+                    continue  # e.g. listed but not fetched
+                if len(data) <= MAX_IGNORE_FILE_BYTES:
+                    self.ignore_matcher.add_file(rel_path, data.decode('utf-8', 'replace'))
+
+    def _keep(self, rel_root: str, name: str, is_dir: bool) -> bool:
+        if is_dir and name in self.ignored_dirs:
+            return False
+        reason = self.ignore_matcher.match(f"{rel_root}/{name}" if rel_root else name, is_dir)
+        if reason:
+            self.pruned[reason] = self.pruned.get(reason, 0) + 1
+            return False
+        return True
+
+    def _scan_directory(self, root: str):
+        """Depth-first os.scandir walk; DirEntry already knows file types, so only sizes cost a stat"""
+        def read_bytes(rel_path: str) -> bytes:
+            with open(os.path.join(root, *rel_path.split('/')), 'rb') as f:
+                return f.read(MAX_IGNORE_FILE_BYTES + 1)
+
+        stack = ['']
+        while stack:
+            rel_root = stack.pop()
+            dirs, files = [], []
+            try:
+                with os.scandir(os.path.join(root, *rel_root.split('/')) if rel_root else root) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                        elif entry.is_file():
+                            files.append((entry.name, entry.stat().st_size))
+            except OSError as e:
+                print(f"⚠️ Could not scan {rel_root or root}: {e}")
+            # Ignored subtrees are pruned here, before the walk descends into them
+            self._load_ignore_files(rel_root, {name for name, _ in files}, read_bytes)
+            dirs = [d for d in dirs if self._keep(rel_root, d, True)]
+            self._add(rel_root, [(name, size) for name, size in files if self._keep(rel_root, name, False)])
+            stack.extend(f"{rel_root}/{d}" if rel_root else d for d in reversed(dirs))
+
+    def _scan_view(self, repo):
+        for rel_root, dirs, files in repo.walk():
+            self._load_ignore_files(rel_root, files, repo.read_bytes)
+            dirs[:] = [d for d in dirs if self._keep(rel_root, d, True)]
+            self._add(rel_root, [(name, repo.stat(f"{rel_root}/{name}" if rel_root else name).size)
+                                 for name in files if self._keep(rel_root, name, False)])
+
+    def exists(self, path: str) -> bool:
+        """File or directory lookup; a trailing '/' is accepted for directories"""
+        path = path.strip('/')
+        return path in self._by_path or path in self._dir_set
+
+    def get(self, path: str) -> Optional[IndexEntry]:
+        return self._by_path.get(path)
+
+    def with_extension(self, *extensions: str) -> List[IndexEntry]:
+        return [entry for ext in extensions for entry in self._by_ext.get(ext, [])]
+
+    def named(self, *filenames: str) -> List[IndexEntry]:
+        """Files with one of the given names anywhere in the tree, in walk order"""
+        wanted = set(filenames)
+        return [entry for entry in self.files if entry.path.rpartition('/')[2] in wanted]
+
+    def languages(self) -> Dict[str, int]:
+        """File count per detected language"""
+        counts: Dict[str, int] = {}
+        for entry in self.files:
+            if entry.language:
+                counts[entry.language] = counts.get(entry.language, 0) + 1
+        return counts
+
+    def render_tree(self) -> str:
+        """Indented 📂/📄 listing used as `file_structure` in the prompt context"""
+        lines = []
+        for rel_dir, files in self.layout:
+            level = rel_dir.count('/') + 1 if rel_dir else 0
+            lines.append(f"{' ' * 4 * level}📂 {rel_dir.rpartition('/')[2] or self.name}/")
+            lines.extend(f"{' ' * 4 * (level + 1)}📄 {name}" for name in files)
+        return "\n".join(lines)
+
+
+def get_repo_index(repo) -> RepoIndex:
+    """Build the index for a repository view once and reuse it for every later phase"""
+    index = getattr(repo, 'index', None)
+    if index is None:
+        index = RepoIndex(repo)
+        repo.index = index
+    return index
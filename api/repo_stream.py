@@ -0,0 +1,249 @@
+"""
+Pipelined repository download
+Reads the GitHub tarball as a stream (`r|gz`) while a background thread keeps
+pulling bytes off the socket, spooling kept members to a scratch file and (for
+callers that analyze the repository) handing each source file to the analyzer as
+soon as it is decompressed, so analysis overlaps with the network transfer
+"""
+
+import io
+import os
+import queue
+import tarfile
+import threading
+import time
+from typing import BinaryIO, Callable, Optional
+
+from .detection_rules import NPM_DETECTOR
+from .lockfiles import LOCKFILE_PARSERS, compact_lockfile
+from .notebooks import compact_notebook
+from .repo_archive import SpooledRepository
+from .repo_download import MAX_DOWNLOAD_BYTES, RepositoryTooLargeError, stream_response_to_file
+
+# Whether cache misses use the streaming tarball pipeline instead of the buffered zipball
+STREAMING_PIPELINE = os.getenv("REPO_STREAMING_PIPELINE", "true").lower() not in ('0', 'false', 'no')
+
+# Downloaded chunks buffered between the network thread and the decompressor
+PIPELINE_QUEUE_CHUNKS = int(os.getenv("REPO_PIPELINE_QUEUE_CHUNKS", "64"))
+
+# How long close() waits for the download thread; one blocked in a socket read is left
+# to notice the cancellation (or its read timeout) on its own
+PIPELINE_CLOSE_TIMEOUT = 1.0
+
+# How often a download thread waiting on a full queue checks for cancellation
+PIPELINE_PUT_INTERVAL = 0.1
+
+
+class ChunkQueueReader(io.RawIOBase):
+    """
+    Read-only file object fed by a background download thread.
+    The thread streams the response into a bounded queue; reads block until data
+    arrives, and download errors (including the size cap) are re-raised here.
+    """
+
+    _DONE = object()
+
+    def __init__(self, response, on_progress: Optional[Callable[[int], None]] = None):
+        super().__init__()
+        self._queue = queue.Queue(maxsize=PIPELINE_QUEUE_CHUNKS)
+        self._buffer = memoryview(b'')
+        self._finished = False
+        self._received = 0
+        self._reported = 0
+        self._on_progress = on_progress
+        self._response = response
+        self._cancelled = False
+        self.total_bytes = 0
+        # Seconds the consumer spent blocked waiting for the network
+        self.wait_seconds = 0.0
+        self._thread = threading.Thread(target=self._download, args=(response,), daemon=True)
+        self._thread.start()
+
+    def _download(self, response):
+        try:
+            self.total_bytes = stream_response_to_file(response, self, on_progress=self._record_progress)
+            self._put(self._DONE)
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item) -> bool:
+        """Queue an item; False once the consumer has cancelled, instead of blocking on a full queue"""
+        while not self._cancelled:
+            try:
+                self._queue.put(item, timeout=PIPELINE_PUT_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _record_progress(self, received: int):
+        # Runs on the download thread; the consumer thread does the reporting
+        self._received = received
+
+    def write(self, chunk: bytes):
+        """Called by stream_response_to_file on the download thread"""
+        if not self._put(chunk):
+            raise IOError("Download cancelled")
+        return len(chunk)
+
+    def close(self):
+        """Stop the download thread if the consumer gives up early"""
+        if not self._finished:
+            self._cancelled = True
+            self._response.close()
+            self._thread.join(PIPELINE_CLOSE_TIMEOUT)
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer and not self._finished:
+            started = time.monotonic()
+            item = self._queue.get()
+            self.wait_seconds += time.monotonic() - started
+            if item is self._DONE:
+                self._finished = True
+            elif isinstance(item, BaseException):
+                self._finished = True
+                raise item
+            else:
+                self._buffer = memoryview(item)
+        if self._on_progress and self._received != self._reported:
+            self._reported = self._received
+            self._on_progress(self._received)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class MemberReader(io.RawIOBase):
+    """
+    Non-seekable file object over a tar member read in stream mode: the one tarfile
+    returns asks the (unseekable) archive stream whether it can seek, which io wrappers do
+    """
+
+    def __init__(self, member_file: BinaryIO):
+        super().__init__()
+        self._file = member_file
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        data = self._file.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+
+def compact_member(rel_path: str, stream: BinaryIO) -> Optional[bytes]:
+    """
+    Compact copy of a member the filter kept past the generic size cap (see repo_filters),
+    parsed from the member stream so the whole file is never held: a lockfile keeps
+    the packages the detection rules know, a notebook its code cells. None when it
+    cannot be parsed.
+    """
+    filename = rel_path.rpartition('/')[2]
+    try:
+        if filename in LOCKFILE_PARSERS:
+            return compact_lockfile(stream, filename, lambda name: bool(NPM_DETECTOR.match([name])))
+        if filename.lower().endswith('.ipynb'):
+            return compact_notebook(stream)
+    except (ValueError, UnicodeError) as e:
+        print(f"⚠️ Could not read {rel_path}: {e}")
+    return None
+
+
+def stream_tarball_repository(response, name: str, member_filter, on_progress: Optional[Callable[[int], None]] = None, max_bytes: int = None,
+                              analyze: bool = False, baseline=None) -> SpooledRepository:
+    """
+    Build a repository view from a streamed tarball response, spooling kept members
+    to a scratch file as they arrive. With `analyze`, each source file is analyzed as
+    it arrives (or its record reused from `baseline`, an incremental.AnalysisBaseline)
+    and the analyzer is attached to the view so enhance_analysis_context only runs the
+    whole-repository passes afterwards.
+    Raises RepositoryTooLargeError when the download or the kept content exceeds max_bytes.
+    """
+    from .deep_analyzer import ANALYSIS_SAMPLE_SIZE, ANALYSIS_SAMPLE_THRESHOLD, DeepProjectAnalyzer
+
+    max_bytes = max_bytes or MAX_DOWNLOAD_BYTES
+    repo_view = SpooledRepository(name)
+    analyzer = DeepProjectAnalyzer(repo_view, baseline=baseline) if analyze else None
+    reader = ChunkQueueReader(response, on_progress)
+    kept_bytes = 0
+    analyzed = 0
+    sample_cap = ANALYSIS_SAMPLE_SIZE if ANALYSIS_SAMPLE_THRESHOLD else 0
+    waited = 0.0
+
+    def credit_wait():
+        # The time budget covers analysis, not the download: push the deadline back by
+        # the time spent blocked on the network since the last credit
+        nonlocal waited
+        if analyzer.deadline is not None:
+            analyzer.deadline += reader.wait_seconds - waited
+        waited = reader.wait_seconds
+
+    try:
+        with tarfile.open(fileobj=io.BufferedReader(reader), mode='r|gz') as archive:
+            for member in archive:
+                # GitHub tarballs wrap everything in a single `owner-repo-sha/` directory
+                rel_path = member.name.partition('/')[2].strip('/')
+                if not rel_path:
+                    if member.isdir():
+                        repo_view.name = member.name.strip('/')
+                    continue
+                if member.isdir():
+                    if not member_filter.is_ignored_dir(rel_path):
+                        repo_view.add_dir(rel_path)
+                    continue
+
+                if member.isfile():
+                    size = member.size
+                elif member.issym():
+                    # Zipballs store symlinks as small files holding the target; keep parity
+                    size = len(member.linkname.encode())
+                else:
+                    continue
+                if not member_filter.accept(rel_path, size):
+                    continue
+
+                kept_bytes += size
+                if kept_bytes > max_bytes:
+                    raise RepositoryTooLargeError(kept_bytes, max_bytes)
+                if member.isfile() and size > member_filter.max_member_bytes:
+                    # Listed with its real size, but only a compact copy is held
+                    repo_view.add_entry(rel_path, size)
+                    data = compact_member(rel_path, io.BufferedReader(MemberReader(archive.extractfile(member))))
+                    if data is not None:
+                        repo_view.add_file(rel_path, data)
+                elif member.isfile():
+                    data = archive.extractfile(member).read()
+                    repo_view.add_file(rel_path, data)
+                    # A directory's ignore files sort before most of its entries, so their
+                    # rules reach the filter before the files they cover
+                    if member_filter.wants_ignore_file(rel_path, size):
+                        member_filter.load_ignore_file(rel_path, data)
+                else:
+                    repo_view.add_file(rel_path, member.linkname.encode())
+
+                # Huge repositories may only get a sampled analysis, drawn once the tree is
+                # complete; past the sample size the rest is left for the pass after the download
+                if analyzer is None or (sample_cap and len(analyzer.held_files) >= sample_cap):
+                    continue
+                credit_wait()
+                if analyzer.analyze_arriving_file(rel_path):
+                    analyzed += 1
+    except BaseException:
+        repo_view.close()
+        raise
+    finally:
+        reader.close()
+
+    if analyzer is None:
+        print(f"🚰 Streamed {len(repo_view.list_files())} files")
+        return repo_view
+    credit_wait()
+    print(f"🚰 Streamed {len(repo_view.list_files())} files, analyzed {analyzed} source files during download")
+    repo_view.analyzer = analyzer
+    return repo_view
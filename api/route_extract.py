@@ -0,0 +1,190 @@
+"""
+Route and data-model extraction engine
+One pass per file. Python routes and models come from the decorators, calls and class
+bases seen during the single AST visit (see python_extract); JS/TS routes and models
+come from one combined pattern compiled from the rule registry below. Adding a
+framework adds a rule, never another scan over the file.
+"""
+
+import ast
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Python route decorators by attribute name: (framework, default methods).
+# A None framework is decided by the file's imports (Flask 2 and FastAPI share `.get` etc.)
+PYTHON_ROUTE_DECORATORS = {
+    'route': ('flask', ['GET']),
+    'api_route': ('fastapi', ['GET']),
+    'get': (None, ['GET']),
+    'post': (None, ['POST']),
+    'put': (None, ['PUT']),
+    'delete': (None, ['DELETE']),
+    'patch': (None, ['PATCH'])
+}
+
+# Python calls that register URL patterns: name -> (framework, import prefix the file must have)
+PYTHON_URL_CALLS = {
+    'path': ('django', 'django'),
+    're_path': ('django', 'django'),
+    'url': ('django', 'django')
+}
+
+# Base classes (last dotted component) that make a Python class a data model
+PYTHON_MODEL_BASES = {'Model', 'BaseModel', 'SQLModel', 'Document', 'DeclarativeBase', 'Schema'}
+
+# Class names containing one of these are data models whatever their bases
+MODEL_NAME_HINTS = ('Model', 'Schema', 'Entity')
+
+QUOTED = r'[\'"`]'
+
+# JS/TS rules: (rule name, pattern). Patterns may capture `method`, `path` and `name`.
+JS_RULES = [
+    # Express-style routers (also Koa routers; see the koa marker)
+    ('express', r'\b(?:app|router|server|api)\.(?P<method>get|post|put|delete|patch|all)\(\s*' + QUOTED + r'(?P<path>/[^\'"`]*)' + QUOTED),
+    ('koa_marker', r'(?:require\(\s*|from\s+)[\'"](?:koa|koa-router|@koa/router)[\'"]'),
+    # NestJS controllers and handler decorators
+    ('nest_controller', r'@Controller\(\s*(?:' + QUOTED + r'(?P<path>[^\'"`]*)' + QUOTED + r')?'),
+    ('nest', r'@(?P<method>Get|Post|Put|Delete|Patch|All)\(\s*(?:' + QUOTED + r'(?P<path>[^\'"`]*)' + QUOTED + r')?\s*\)'),
+    # Next.js App Router handlers (only in route.js/ts files)
+    ('next', r'\bexport\s+(?:async\s+)?(?:function\s+|const\s+)(?P<method>GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS)\b'),
+    # ORM models
+    ('mongoose', r'\bmongoose\.model\(\s*' + QUOTED + r'(?P<name>\w+)'),
+    ('sequelize', r'\.define\(\s*' + QUOTED + r'(?P<name>\w+)' + QUOTED + r'\s*,\s*\{'),
+    ('typeorm', r'@Entity\([^)]*\)\s*(?:export\s+)?(?:default\s+)?class\s+(?P<name>\w+)')
+]
+
+ROUTE_FILE_NAMES = {'route.js', 'route.ts', 'route.mjs'}
+
+
+def _compile_rules(rules: List[Tuple[str, str]]):
+    """One alternation with a wrapper group per rule; inner group names get the rule's index"""
+    parts = []
+    for position, (_, pattern) in enumerate(rules):
+        pattern = re.sub(r'\(\?P<(\w+)>', lambda m: f'(?P<r{position}_{m.group(1)}>', pattern)
+        parts.append(f'(?P<r{position}>{pattern})')
+    return re.compile('|'.join(parts))
+
+
+JS_PATTERN = _compile_rules(JS_RULES)
+
+
+def _join_path(*parts: str) -> str:
+    return '/' + '/'.join(part.strip('/') for part in parts if part and part.strip('/'))
+
+
+def _next_route_path(file_path: str) -> Optional[str]:
+    """URL of a Next.js App Router `app/**/route.ts` file; route groups `(name)` are dropped"""
+    parts = file_path.split('/')
+    if parts[-1] not in ROUTE_FILE_NAMES or 'app' not in parts[:-1]:
+        return None
+    segments = parts[parts.index('app') + 1:-1]
+    return _join_path(*[segment for segment in segments if not segment.startswith('(')])
+
+
+def _next_pages_api_path(file_path: str) -> Optional[str]:
+    """URL of a Next.js Pages Router API file (`pages/api/users/[id].ts`)"""
+    parts = file_path.split('/')
+    for position in range(len(parts) - 2):
+        if parts[position] == 'pages' and parts[position + 1] == 'api':
+            stem = parts[-1].rsplit('.', 1)[0]
+            return _join_path(*parts[position + 1:-1], '' if stem == 'index' else stem)
+    return None
+
+
+def extract_js_routes(content: str, file_path: str) -> Tuple[List[Dict], List[Dict]]:
+    """(API endpoints, data models) of one JS/TS file, from a single scan"""
+    routes, models = [], []
+    router_routes = []
+    koa = False
+    controller = ''
+    next_path = _next_route_path(file_path)
+
+    for match in JS_PATTERN.finditer(content):
+        rule = JS_RULES[int(match.lastgroup[1:])][0]
+        groups = {key.partition('_')[2]: value for key, value in match.groupdict().items()
+                  if value is not None and key.startswith(f'{match.lastgroup}_')}
+        if rule == 'express':
+            route = {'path': groups['path'], 'methods': [groups['method'].upper()], 'file': file_path, 'framework': 'express'}
+            routes.append(route)
+            router_routes.append(route)
+        elif rule == 'koa_marker':
+            koa = True
+        elif rule == 'nest_controller':
+            controller = groups.get('path', '')
+        elif rule == 'nest':
+            routes.append({'path': _join_path(controller, groups.get('path', '')), 'methods': [groups['method'].upper()],
+                           'file': file_path, 'framework': 'nest'})
+        elif rule == 'next':
+            if next_path:
+                routes.append({'path': next_path, 'methods': [groups['method']], 'file': file_path, 'framework': 'next.js'})
+        else:
+            models.append({'name': groups['name'], 'file': file_path, 'methods': [], 'docstring': None, 'framework': rule})
+
+    if koa:
+        for route in router_routes:
+            route['framework'] = 'koa'
+
+    pages_path = _next_pages_api_path(file_path)
+    if pages_path:
+        routes.append({'path': pages_path, 'methods': ['ANY'], 'file': file_path, 'framework': 'next.js'})
+    return routes, models
+
+
+def _dotted_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return ''
+
+
+def _string_arg(call: ast.Call) -> Optional[str]:
+    if call.args and isinstance(call.args[0], ast.Constant) and isinstance(call.args[0].value, str):
+        return call.args[0].value
+    return None
+
+
+def python_decorator_route(decorator: ast.expr) -> Optional[Tuple[Optional[str], str, List[str]]]:
+    """(framework or None, path, methods) for a route decorator like `@app.route('/x', methods=[...])`"""
+    if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)):
+        return None
+    rule = PYTHON_ROUTE_DECORATORS.get(decorator.func.attr)
+    path = _string_arg(decorator)
+    if not rule or path is None or not path.startswith('/'):
+        return None
+    framework, methods = rule
+    for keyword in decorator.keywords:
+        if keyword.arg == 'methods' and isinstance(keyword.value, (ast.List, ast.Tuple, ast.Set)):
+            declared = [element.value.upper() for element in keyword.value.elts
+                        if isinstance(element, ast.Constant) and isinstance(element.value, str)]
+            methods = declared or methods
+    return framework, path, list(methods)
+
+
+def python_url_call(call: ast.Call) -> Optional[Tuple[str, str, str]]:
+    """(framework, required import prefix, path) for a URL pattern call like `path('users/', view)`"""
+    rule = PYTHON_URL_CALLS.get(call.func.id) if isinstance(call.func, ast.Name) else None
+    path = _string_arg(call) if rule else None
+    if path is None or len(call.args) < 2:
+        return None
+    framework, required_import = rule
+    return framework, required_import, _join_path(path.strip('^$'))
+
+
+def is_python_model(node: ast.ClassDef) -> bool:
+    """Classes named like models, or deriving from a known ORM/schema base"""
+    return (any(hint in node.name for hint in MODEL_NAME_HINTS)
+            or any(_dotted_name(base) in PYTHON_MODEL_BASES for base in node.bases))
+
+
+def resolve_python_routes(candidates: List[Tuple[Optional[str], str, List[str]]], url_calls: List[Tuple[str, str, str]],
+                          imports: List[str], file_path: str) -> List[Dict]:
+    """Turn the candidates collected during the AST visit into endpoint records"""
+    roots = {imp.partition('.')[0] for imp in imports}
+    # `.get`-style shortcuts: FastAPI unless the file only uses Flask
+    shortcut_framework = 'flask' if 'flask' in roots and 'fastapi' not in roots else 'fastapi'
+    routes = [{'path': path, 'methods': methods, 'file': file_path, 'framework': framework or shortcut_framework}
+              for framework, path, methods in candidates]
+    routes.extend({'path': path, 'methods': ['ANY'], 'file': file_path, 'framework': framework}
+                  for framework, required_import, path in url_calls if required_import in roots)
+    return routes
@@ -0,0 +1,84 @@
+"""
+Stratified source-file sampling for huge repositories
+Picks a representative subset of source files per (top-level directory, language)
+stratum from the repository index and extrapolates per-file totals, with 95%
+margins, from what the sample measured
+"""
+
+import hashlib
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# z-score of the reported margins (95% confidence)
+CONFIDENCE_Z = 1.96
+
+
+def stratum_key(entry, by_directory: bool = True) -> Tuple[str, str]:
+    """(top-level directory, language or extension) of an index entry"""
+    directory = entry.path.partition('/')[0] if by_directory and '/' in entry.path else ''
+    return directory, entry.language or entry.ext
+
+
+def _sample_order(path: str) -> bytes:
+    # A stable pseudo-random order, so the same commit always yields the same sample
+    return hashlib.md5(path.encode('utf-8', 'surrogateescape')).digest()
+
+
+class StratifiedSample:
+    """
+    A sample over `population` index entries. Files in `certain` (e.g. entry points, or
+    files already analyzed) are always included and stand only for themselves.
+    """
+
+    def __init__(self, population: List, size: int, certain: Iterable[str] = ()):
+        certain = set(certain)
+        self.population_size = len(population)
+        self.certain = [entry.path for entry in population if entry.path in certain]
+        rest = [entry for entry in population if entry.path not in certain]
+        budget = max(0, size - len(self.certain))
+
+        # Coarsen the strata until every stratum can get at least one file
+        strata = self._group(rest, by_directory=True)
+        if len(strata) > max(1, budget // 2):
+            strata = self._group(rest, by_directory=False)
+        if len(strata) > max(1, budget):
+            strata = {('', ''): rest} if rest else {}
+
+        # Proportional allocation with at least one file per stratum
+        self.strata: Dict[Tuple[str, str], Tuple[int, List[str]]] = {}
+        for key, entries in strata.items():
+            quota = min(len(entries), max(1, round(budget * len(entries) / len(rest))))
+            chosen = sorted(entries, key=lambda entry: _sample_order(entry.path))[:quota]
+            self.strata[key] = (len(entries), [entry.path for entry in chosen])
+
+    @staticmethod
+    def _group(entries: List, by_directory: bool) -> Dict[Tuple[str, str], List]:
+        strata: Dict[Tuple[str, str], List] = {}
+        for entry in entries:
+            strata.setdefault(stratum_key(entry, by_directory), []).append(entry)
+        return strata
+
+    @property
+    def paths(self) -> List[str]:
+        return self.certain + [path for _, chosen in self.strata.values() for path in chosen]
+
+    def estimate_total(self, value: Callable[[str], Optional[float]]) -> Tuple[float, float]:
+        """
+        Stratified estimate of sum(value) over the whole population and its 95% margin.
+        `value(path)` returns None for sampled files that were not measured (e.g. skipped
+        by a budget); those are left out of their stratum's sample.
+        """
+        total, variance = 0.0, 0.0
+        for path in self.certain:
+            total += value(path) or 0
+        for population, chosen in self.strata.values():
+            values = [v for v in (value(path) for path in chosen) if v is not None]
+            n = len(values)
+            if not n:
+                continue
+            mean = sum(values) / n
+            total += population * mean
+            if n > 1:
+                spread = sum((v - mean) ** 2 for v in values) / (n - 1)
+                variance += population ** 2 * (1 - n / population) * spread / n
+        return total, CONFIDENCE_Z * math.sqrt(variance)
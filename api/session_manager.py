@@ -5,9 +5,10 @@ import secrets
 import hashlib
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-import requests
 from dotenv import load_dotenv
 
+from .github_client import GITHUB_API_URL, get_github_client
+
 load_dotenv()
 
 # GitHub Database configuration
@@ -78,9 +79,9 @@ def get_file_from_github(file_path: str) -> Optional[Dict]:
         return None
     
     try:
-        url = f"https://api.github.com/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}/contents/{file_path}"
+        url = f"{GITHUB_API_URL}/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}/contents/{file_path}"
         
-        response = requests.get(url, headers=get_github_headers())
+        response = get_github_client().get(url, headers=get_github_headers())
         
         if response.status_code == 200:
             file_data = response.json()
@@ -106,7 +107,7 @@ def save_file_to_github(file_path: str, content: str, sha: Optional[str] = None,
         return False
     
     try:
-        url = f"https://api.github.com/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}/contents/{file_path}"
+        url = f"{GITHUB_API_URL}/repos/{GITHUB_DATA_REPO_OWNER}/{GITHUB_DATA_REPO_NAME}/contents/{file_path}"
         
         data = {
             'message': commit_message,
@@ -116,7 +117,7 @@ def save_file_to_github(file_path: str, content: str, sha: Optional[str] = None,
         if sha:
             data['sha'] = sha
         
-        response = requests.put(url, headers=get_github_headers(), json=data)
+        response = get_github_client().put(url, headers=get_github_headers(), json=data)
         
         if response.status_code in [200, 201]:
             return True
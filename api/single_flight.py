@@ -0,0 +1,214 @@
+"""
+Single-flight deduplication of concurrent README generations
+The first request for a (repository, commit, generation params) key becomes the
+leader and does the work; identical requests arriving meanwhile follow it and
+receive the same events (SSE statuses and the final README or error).
+The in-memory coordinator covers one process; the lock-file variant shares a
+flight between processes on the same machine through the snapshot cache directory.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows local development: lock files are unavailable
+    fcntl = None
+
+from .snapshot_cache import SNAPSHOT_CACHE_DIR
+
+# 'memory' (one process), 'file' (all processes sharing the cache dir) or 'off'
+SINGLE_FLIGHT_MODE = os.getenv("SINGLE_FLIGHT_MODE", "memory").lower()
+
+# Followers give up and run the generation themselves after this many seconds
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "300"))
+
+# How often followers of a lock-file flight poll for new events
+FILE_FLIGHT_POLL_SECONDS = 0.2
+
+
+def is_terminal(event: dict) -> bool:
+    """A flight ends with either the README or an error"""
+    return 'readme' in event or 'error' in event
+
+
+class Flight:
+    """In-process flight: events are buffered so late followers get a full replay"""
+
+    def __init__(self, key: str, on_close=None):
+        self.key = key
+        self.events = []
+        self.closed = False
+        self._condition = threading.Condition()
+        self._on_close = on_close
+
+    def publish(self, event: dict):
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        if self._on_close:
+            self._on_close(self)
+
+    def follow(self, timeout: float = None) -> Iterator[dict]:
+        """Yield every event published so far and then new ones until the flight ends"""
+        deadline = time.monotonic() + (timeout or SINGLE_FLIGHT_WAIT_SECONDS)
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self.events) and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self._condition.wait(remaining)
+                pending = self.events[index:]
+                index = len(self.events)
+                done = self.closed
+            for event in pending:
+                yield event
+                if is_terminal(event):
+                    return
+            if done:
+                return
+
+
+class SingleFlight:
+    """In-memory coordinator: one leader per key within this process"""
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key: str) -> Tuple[Flight, bool]:
+        """Return (flight, is_leader); the leader must close the flight when done"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight:
+                return flight, False
+            flight = Flight(key, on_close=self._finish)
+            self._flights[key] = flight
+            return flight, True
+
+    def _finish(self, flight: Flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+class FileFlight:
+    """
+    Cross-process flight. The leader holds an exclusive flock on `<key>.lock` and
+    appends events as JSON lines to `<key>.events`, removing it when done.
+    """
+
+    def __init__(self, root: str, key: str):
+        self.key = key
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        self.lock_path = os.path.join(root, digest + '.lock')
+        self.events_path = os.path.join(root, digest + '.events')
+        self._lock_file = None
+        self._events_file = None
+
+    def try_lead(self) -> bool:
+        lock_file = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        self._events_file = open(self.events_path, 'w', encoding='utf-8')
+        return True
+
+    def _leader_alive(self) -> bool:
+        with open(self.lock_path, 'a+') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return False
+
+    def publish(self, event: dict):
+        self._events_file.write(json.dumps(event) + '\n')
+        self._events_file.flush()
+
+    def close(self):
+        if self._events_file:
+            self._events_file.close()
+            try:
+                os.remove(self.events_path)
+            except OSError:
+                pass
+        if self._lock_file:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+
+    def follow(self, timeout: float = None) -> Iterator[dict]:
+        """Tail the leader's event log; stops at a terminal event or when the leader is gone"""
+        deadline = time.monotonic() + (timeout or SINGLE_FLIGHT_WAIT_SECONDS)
+        events_file = None
+        buffer = ''
+        try:
+            while time.monotonic() < deadline:
+                if events_file is None and os.path.exists(self.events_path):
+                    try:
+                        events_file = open(self.events_path, 'r', encoding='utf-8')
+                    except OSError:
+                        pass
+                if events_file:
+                    buffer += events_file.read()
+                    *lines, buffer = buffer.split('\n')
+                    for line in lines:
+                        event = json.loads(line)
+                        yield event
+                        if is_terminal(event):
+                            return
+                if not self._leader_alive():
+                    return
+                time.sleep(FILE_FLIGHT_POLL_SECONDS)
+        finally:
+            if events_file:
+                events_file.close()
+
+
+class FileSingleFlight:
+    """Lock-file coordinator: one leader per key across processes sharing `root`"""
+
+    def __init__(self, root: str = None):
+        self.root = root or os.path.join(SNAPSHOT_CACHE_DIR, 'flights')
+        os.makedirs(self.root, exist_ok=True)
+
+    def begin(self, key: str) -> Tuple[FileFlight, bool]:
+        flight = FileFlight(self.root, key)
+        return flight, flight.try_lead()
+
+
+_single_flight = None
+
+
+def get_single_flight() -> Optional[object]:
+    """Process-wide coordinator for SINGLE_FLIGHT_MODE, or None when disabled"""
+    global _single_flight
+    if _single_flight is None:
+        if SINGLE_FLIGHT_MODE == 'file' and fcntl:
+            try:
+                _single_flight = FileSingleFlight()
+            except OSError as e:
+                print(f"⚠️ Lock-file single-flight unavailable, using in-memory: {e}")
+                _single_flight = SingleFlight()
+        elif SINGLE_FLIGHT_MODE != 'off':
+            _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,221 @@
+"""
+Content-addressed repository snapshot cache
+Keeps downloaded zipballs on local disk keyed by owner/repo@commit so regenerating
+the same commit skips the download entirely. Shared between workers via file locks.
+Results derived from a commit (analysis, generated README) are cached alongside.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows local development: fall back to unlocked access
+    fcntl = None
+
+from .repo_archive import ZipRepository, open_zip_repository
+
+SNAPSHOT_CACHE_DIR = os.getenv("REPO_SNAPSHOT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "readme_snapshots"))
+SNAPSHOT_CACHE_BYTES = int(os.getenv("REPO_SNAPSHOT_CACHE_BYTES", str(256 * 1024 * 1024)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "500"))
+
+
+class SnapshotCache:
+    """On-disk LRU cache of repository archives bounded by a total byte budget"""
+
+    def __init__(self, root: str = None, max_bytes: int = None):
+        self.root = root or SNAPSHOT_CACHE_DIR
+        self.max_bytes = max_bytes or SNAPSHOT_CACHE_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def key_for(owner: str, repo: str, commit_sha: str) -> str:
+        return f"{owner.lower()}/{repo.lower()}@{commit_sha.lower()}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(key.encode()).hexdigest() + '.zip')
+
+    @contextmanager
+    def _lock(self, exclusive: bool):
+        """Cache-wide lock: readers share it, writers and eviction take it exclusively"""
+        with open(os.path.join(self.root, '.lock'), 'a+') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def open(self, owner: str, repo: str, commit_sha: str, member_filter=None) -> Optional[ZipRepository]:
+        """Open a cached snapshot, or return None on a miss"""
+        key = self.key_for(owner, repo, commit_sha)
+        path = self._path(key)
+        with self._lock(exclusive=False):
+            if not os.path.exists(path):
+                self.misses += 1
+                print(f"📭 Snapshot cache miss: {key}")
+                return None
+            # Refresh mtime so eviction treats this entry as recently used
+            os.utime(path, None)
+            repo_view = open_zip_repository(path, member_filter=member_filter)
+        self.hits += 1
+        print(f"📬 Snapshot cache hit: {key}")
+        return repo_view
+
+    def store(self, owner: str, repo: str, commit_sha: str, write: Callable[[BinaryIO], int], member_filter=None) -> ZipRepository:
+        """Stream a new snapshot into the cache via `write(fileobj)` and open it"""
+        return self.put(owner, repo, commit_sha, write, open_view=True, member_filter=member_filter)
+
+    def put(self, owner: str, repo: str, commit_sha: str, write: Callable[[BinaryIO], int], open_view: bool = False, member_filter=None) -> Optional[ZipRepository]:
+        """
+        Write a snapshot via `write(fileobj)`, optionally opening a view of it.
+        The archive is written to a private temp file first and renamed into place,
+        so concurrent readers never see a partial zip.
+        """
+        key = self.key_for(owner, repo, commit_sha)
+        path = self._path(key)
+        repo_view = None
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            with self._lock(exclusive=True):
+                os.replace(tmp_path, path)
+                self.stores += 1
+                self._evict(keep=path)
+                if open_view:
+                    repo_view = open_zip_repository(path, member_filter=member_filter)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        print(f"💾 Snapshot cached: {key}")
+        return repo_view
+
+    def _evict(self, keep: str = None):
+        """Delete least recently used snapshots until the cache fits its byte budget"""
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith('.zip') and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                # Open handles keep working after unlink on POSIX
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            'stores': self.stores,
+            'evictions': self.evictions
+        }
+
+
+class ResultCache:
+    """
+    Small JSON documents derived from a commit: resolved HEADs (with their ETag),
+    analysis contexts and generated READMEs. Each kind lives in its own directory
+    and keeps at most RESULT_CACHE_MAX_ENTRIES, evicting the least recently used.
+    Writes go through a temp file and an atomic rename, so no lock is needed.
+    """
+
+    def __init__(self, root: str = None, max_entries: int = None):
+        self.root = root or os.path.join(SNAPSHOT_CACHE_DIR, 'results')
+        self.max_entries = max_entries or RESULT_CACHE_MAX_ENTRIES
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        path = self._path(kind, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            return None
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        return value
+
+    def put(self, kind: str, key: str, value: Any):
+        kind_dir = os.path.join(self.root, kind)
+        try:
+            os.makedirs(kind_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=kind_dir, suffix='.part')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._path(kind, key))
+            self._evict(kind_dir)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Could not cache {kind} result: {e}")
+
+    def _evict(self, kind_dir: str):
+        entries = [(entry.stat().st_mtime, entry.path) for entry in os.scandir(kind_dir) if entry.name.endswith('.json')]
+        for _, path in sorted(entries)[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {'hits': dict(self.hits), 'misses': dict(self.misses)}
+
+
+def analysis_cache_key(owner: str, repo: str, commit_sha: str, analyzer_version: str) -> str:
+    return f"{SnapshotCache.key_for(owner, repo, commit_sha)}#analysis-v{analyzer_version}"
+
+
+def analysis_snapshot_key(owner: str, repo: str, analyzer_version: str) -> str:
+    """One per repository: the per-file records of its latest complete analysis (see incremental)"""
+    return f"{owner.lower()}/{repo.lower()}#snapshot-v{analyzer_version}"
+
+
+def readme_cache_key(owner: str, repo: str, commit_sha: str, analyzer_version: str, **generation_params) -> str:
+    params = '&'.join(f"{name}={generation_params[name]}" for name in sorted(generation_params))
+    return f"{analysis_cache_key(owner, repo, commit_sha, analyzer_version)}#readme?{params}"
+
+
+_snapshot_cache = None
+_result_cache = None
+
+
+def get_snapshot_cache() -> SnapshotCache:
+    """Process-wide cache instance so statistics accumulate across requests"""
+    global _snapshot_cache
+    if _snapshot_cache is None:
+        _snapshot_cache = SnapshotCache()
+    return _snapshot_cache
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache instance"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+    return _result_cache
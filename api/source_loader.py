@@ -0,0 +1,117 @@
+"""
+Byte-level source loading
+Reads a repository file once (memory-mapped when it is large and on disk), works out
+its encoding from a byte order mark or a PEP 263 coding cookie, and decodes it once
+"""
+
+import codecs
+import mmap
+import os
+import re
+from typing import Optional, Tuple, Union
+
+from .repo_archive import LocalRepository
+
+# Files on disk at least this large are memory-mapped instead of copied into a buffer
+MMAP_MIN_BYTES = int(os.getenv("SOURCE_MMAP_MIN_BYTES", str(1024 * 1024)))
+
+# UTF-32 marks first: the UTF-32 LE mark starts with the UTF-16 LE one
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be')
+)
+
+# PEP 263: `# -*- coding: latin-1 -*-` on the first or second line
+CODING_COOKIE = re.compile(rb'^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)')
+BLANK_OR_COMMENT = re.compile(rb'^[ \t\f]*(?:[#\r\n]|$)')
+
+# Extensions whose coding cookie is honoured
+COOKIE_EXTENSIONS = {'.py', '.pyw'}
+
+# Undeclared files that are not valid UTF-8 fall back to this (it decodes any byte sequence)
+FALLBACK_ENCODING = 'latin-1'
+
+
+def _cookie_encoding(head: bytes) -> Optional[str]:
+    lines = head.split(b'\n', 2)[:2]
+    for number, line in enumerate(lines):
+        match = CODING_COOKIE.match(line)
+        if match:
+            try:
+                return codecs.lookup(match.group(1).decode('ascii')).name
+            except (LookupError, UnicodeDecodeError):
+                return None
+        # The second line only counts when the first is blank or a comment
+        if number == 0 and not BLANK_OR_COMMENT.match(line):
+            return None
+    return None
+
+
+def detect_encoding(data, path: str = '') -> Tuple[Optional[str], int]:
+    """(declared encoding, BOM length) from the first bytes of `data`; (None, 0) when undeclared"""
+    head = bytes(data[:512])
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(mark):
+            return encoding, len(mark)
+    if os.path.splitext(path)[1].lower() in COOKIE_EXTENSIONS:
+        return _cookie_encoding(head), 0
+    return None, 0
+
+
+class SourceFile:
+    """A file's raw bytes (possibly a read-only mmap) and its text, decoded on first use"""
+
+    def __init__(self, path: str, data: Union[bytes, mmap.mmap]):
+        self.path = path
+        self.data = data
+        self.encoding, self._skip = detect_encoding(data, path)
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._decode()
+        return self._text
+
+    def _decode(self) -> str:
+        candidates = [self.encoding] if self.encoding else []
+        candidates += [encoding for encoding in ('utf-8', FALLBACK_ENCODING) if encoding != self.encoding]
+        with memoryview(self.data) as view:
+            for encoding in candidates:
+                try:
+                    # Decoding straight from the buffer avoids copying a mapped file first
+                    text = str(view[self._skip if encoding == self.encoding else 0:], encoding)
+                    self.encoding = encoding
+                    return text
+                except UnicodeDecodeError:
+                    continue
+        return ""
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_source(repo, rel_path: str) -> SourceFile:
+    """Load one repository file; large files of on-disk repositories are memory-mapped"""
+    if isinstance(repo, LocalRepository):
+        size = repo.stat(rel_path).size
+        if size >= MMAP_MIN_BYTES and size > 0:
+            with repo.open(rel_path) as f:
+                return SourceFile(rel_path, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    return SourceFile(rel_path, repo.read_bytes(rel_path))
+
+
+def read_source_text(repo, rel_path: str) -> str:
+    """Text of one repository file, decoded as load_source would"""
+    with load_source(repo, rel_path) as source:
+        return source.text
@@ -0,0 +1,183 @@
+"""
+Sparse repository acquisition via the Git Trees/Blobs API
+For repositories whose zipball would be huge, lists the tree once and fetches only
+the manifests, config files and source files the analyzers actually read
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from .github_client import get_github_client
+from .repo_archive import MemoryRepository
+from .repo_download import MAX_DOWNLOAD_BYTES, format_bytes
+from .repo_filters import MAX_IGNORE_FILES, MemberFilter
+
+# Repositories larger than this (GitHub reports size in KB) are fetched sparsely
+SPARSE_FETCH_THRESHOLD_KB = int(os.getenv("SPARSE_FETCH_THRESHOLD_KB", str(100 * 1024)))
+
+# Upper bound on source files fetched in sparse mode (manifests and configs are always fetched)
+SPARSE_MAX_BLOBS = int(os.getenv("SPARSE_MAX_BLOBS", "400"))
+
+# Concurrent blob downloads, sharing the pooled GitHub client
+SPARSE_FETCH_WORKERS = int(os.getenv("SPARSE_FETCH_WORKERS", "8"))
+
+# Extra files the handlers read for the prompt context
+CONTEXT_FILES = {'requirements.txt', 'package.json', 'pyproject.toml', 'pom.xml', 'Cargo.toml', 'go.mod'}
+
+
+def get_repository_metadata(owner: str, repo: str, headers: dict = None) -> Optional[dict]:
+    """Fetch repository metadata (size in KB, default branch); None when unavailable"""
+    try:
+        response = get_github_client().get(f"/repos/{owner}/{repo}", headers=headers or {}, timeout=10)
+        if response.status_code == 200:
+            return response.json()
+        print(f"⚠️ Could not read metadata for {owner}/{repo}: {response.status_code}")
+    except Exception as e:
+        print(f"⚠️ Could not read metadata for {owner}/{repo}: {e}")
+    return None
+
+
+def should_fetch_sparse(metadata: Optional[dict], threshold_kb: int = None) -> bool:
+    """Use sparse mode when GitHub reports the repository above the size threshold"""
+    if threshold_kb is None:
+        threshold_kb = SPARSE_FETCH_THRESHOLD_KB
+    return bool(metadata) and threshold_kb > 0 and metadata.get('size', 0) > threshold_kb
+
+
+def select_paths(tree: List[dict], member_filter: MemberFilter, max_blobs: int = None, max_bytes: int = None) -> Tuple[List[dict], List[dict]]:
+    """
+    Split tree entries into (blobs to fetch, entries to list only), mirroring what
+    DeepProjectAnalyzer reads: dependency manifests, root config and docs files, and
+    source files by extension. Source files beyond the budget are left out entirely
+    so the analyzers never see a file they cannot read.
+    """
+    from .deep_analyzer import CODE_FILE_ANALYZERS, CONFIG_FILES, DEPENDENCY_FILE_ANALYZERS
+    from .workspaces import WORKSPACE_FILES
+
+    max_blobs = SPARSE_MAX_BLOBS if max_blobs is None else max_blobs
+    max_bytes = max_bytes or MAX_DOWNLOAD_BYTES
+    always = set(DEPENDENCY_FILE_ANALYZERS) | CONTEXT_FILES | WORKSPACE_FILES
+
+    required, code, listed = [], [], []
+    for entry in tree:
+        if entry.get('type') != 'blob':
+            continue
+        path = entry['path']
+        if not member_filter.accept(path, entry.get('size', 0)):
+            continue
+        filename = path.rsplit('/', 1)[-1]
+        if filename in always or (path == filename and (filename in CONFIG_FILES or filename.lower().startswith('readme'))):
+            required.append(entry)
+        elif os.path.splitext(filename)[1].lower() in CODE_FILE_ANALYZERS:
+            code.append(entry)
+        else:
+            listed.append(entry)
+
+    # Shallow, small files first: entry points and top-level modules say the most
+    code.sort(key=lambda entry: (entry['path'].count('/'), entry.get('size', 0)))
+
+    fetch = list(required)
+    total = sum(entry.get('size', 0) for entry in required)
+    for entry in code:
+        size = entry.get('size', 0)
+        if len(fetch) - len(required) >= max_blobs or total + size > max_bytes:
+            continue
+        fetch.append(entry)
+        total += size
+
+    skipped = len(required) + len(code) - len(fetch)
+    if skipped:
+        print(f"✂️ Sparse fetch: leaving out {skipped} source files over the budget")
+    return fetch, listed
+
+
+def cached_source_paths(entries: List[dict], baseline=None) -> Set[str]:
+    """
+    Paths of source-file tree entries whose per-file analysis is cached under their blob
+    SHA, or unchanged since the commit of `baseline` (an incremental.AnalysisBaseline)
+    """
+    from .deep_analyzer import CODE_FILE_ANALYZERS
+    from .file_cache import get_file_cache
+
+    file_cache = get_file_cache()
+    if not file_cache and not baseline:
+        return set()
+    return {entry['path'] for entry in entries
+            if os.path.splitext(entry['path'])[1].lower() in CODE_FILE_ANALYZERS
+            and ((baseline and baseline.covers(entry['path']))
+                 or (file_cache and entry.get('sha') and file_cache.contains(entry['sha'], entry['path'])))}
+
+
+def fetch_sparse_repository(owner: str, repo: str, ref: str, headers: dict = None, workers: int = None, baseline=None):
+    """
+    Build a MemoryRepository for owner/repo at `ref` from the recursive tree listing
+    and concurrently fetched blobs. Source files `baseline` still covers are listed
+    only. Returns (repository_view, error).
+    """
+    headers = headers or {}
+    workers = workers or SPARSE_FETCH_WORKERS
+    client = get_github_client()
+
+    try:
+        response = client.get(
+            f"/repos/{owner}/{repo}/git/trees/{ref}",
+            params={'recursive': '1'},
+            headers=headers
+        )
+    except Exception as e:
+        return None, f"Failed to list repository tree: {e}"
+    if response.status_code != 200:
+        return None, f"Failed to list repository tree: {response.status_code}"
+
+    listing = response.json()
+    if listing.get('truncated'):
+        print(f"⚠️ Tree listing for {owner}/{repo} was truncated by GitHub; analyzing the returned part")
+
+    blob_headers = {**headers, 'Accept': 'application/vnd.github.raw'}
+
+    def fetch_blob(entry: dict) -> Tuple[str, Optional[bytes]]:
+        try:
+            blob = client.get(f"/repos/{owner}/{repo}/git/blobs/{entry['sha']}", headers=blob_headers)
+            if blob.status_code == 200:
+                return entry['path'], blob.content
+            print(f"⚠️ Could not fetch {entry['path']}: {blob.status_code}")
+        except Exception as e:
+            print(f"⚠️ Could not fetch {entry['path']}: {e}")
+        return entry['path'], None
+
+    tree = listing.get('tree', [])
+    member_filter = MemberFilter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # The repository's ignore files come first: their rules decide which blobs are worth fetching
+        ignore_entries = sorted((entry for entry in tree if entry.get('type') == 'blob'
+                                 and member_filter.wants_ignore_file(entry['path'], entry.get('size', 0))),
+                                key=lambda entry: entry['path'].count('/'))[:MAX_IGNORE_FILES]
+        ignore_blobs = dict(pool.map(fetch_blob, ignore_entries))
+        member_filter.load_ignore_files(((entry['path'], entry.get('size', 0)) for entry in ignore_entries),
+                                        lambda path: ignore_blobs[path] or b'')
+
+        fetch, listed = select_paths(tree, member_filter)
+        # Source files whose analysis is already cached under their tree SHA are listed, not downloaded
+        cached = cached_source_paths(fetch, baseline)
+        print(f"🌲 Sparse fetch: {len(fetch) - len(cached)} blobs "
+              f"({format_bytes(sum(e.get('size', 0) for e in fetch if e['path'] not in cached))}), "
+              f"{len(cached)} cached, {len(listed)} listed only")
+        blobs: Dict[str, Optional[bytes]] = dict(pool.map(fetch_blob, [entry for entry in fetch if entry['path'] not in cached]))
+
+    repo_view = MemoryRepository(f"{owner}-{repo}-{ref[:7]}")
+    repo_view.blob_shas = {entry['path']: entry['sha'] for entry in fetch if entry.get('sha')}
+
+    # Insert in tree order so walk() matches the zipball view
+    entries = [(entry['path'], entry.get('size', 0), True) for entry in fetch]
+    entries += [(entry['path'], entry.get('size', 0), False) for entry in listed]
+    for path, size, fetched in sorted(entries):
+        if not fetched or path in cached:
+            repo_view.add_entry(path, size)
+        elif blobs.get(path) is not None:
+            repo_view.add_file(path, blobs[path])
+
+    print(f"🧹 Sparse filter: {member_filter.summary()}")
+    if not repo_view.list_files():
+        return None, "Failed to fetch repository files"
+    return repo_view, None
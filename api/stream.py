@@ -2,11 +2,6 @@ from http.server import BaseHTTPRequestHandler
 import json
 import urllib.parse
 import os
-import tempfile
-import shutil
-import requests
-import zipfile
-import ast
 import time
 from dotenv import load_dotenv
 
@@ -67,6 +62,8 @@ class handler(BaseHTTPRequestHandler):
         repo_url = query_params.get('repo_url', [''])[0]
         project_name = query_params.get('project_name', [''])[0]
         include_demo = query_params.get('include_demo', ['false'])[0].lower() == 'true'
+        # Bypass the cached README (the cached analysis is still reused)
+        refresh = query_params.get('refresh', ['false'])[0].lower() == 'true'
         
         try:
             num_screenshots = int(query_params.get('num_screenshots', ['0'])[0])
@@ -127,23 +124,79 @@ class handler(BaseHTTPRequestHandler):
             import traceback
             traceback.print_exc()
         
-        repo_path = None
+        repo = None
+        self.flight = None
         try:
-            # Step 1: Cloning
-            self.send_status_event("Cloning repository...")
-            time.sleep(0.5)  # Small delay for better UX
-            repo_path, error = self.download_repo(repo_url, access_token)
-            if error:
-                self.send_error_event(error)
-                return
+            from .repo_download import format_bytes, parse_github_repo, resolve_commit_sha
+            from .snapshot_cache import get_result_cache, analysis_cache_key, readme_cache_key
+            from .single_flight import get_single_flight
+            from .deep_analyzer import ANALYZER_VERSION, analysis_is_complete
+            from .incremental import load_baseline, save_snapshot
+
+            # Step 0: Resolve HEAD so an unchanged repository can skip the pipeline
+            owner_repo = parse_github_repo(repo_url)
+            auth_headers = {'Authorization': f'token {access_token}'} if access_token else {}
+            commit_sha = resolve_commit_sha(*owner_repo, headers=auth_headers) if owner_repo else None
+            results = get_result_cache() if commit_sha else None
+            analysis_key = readme_key = None
+            if results:
+                analysis_key = analysis_cache_key(*owner_repo, commit_sha, ANALYZER_VERSION)
+                readme_key = readme_cache_key(
+                    *owner_repo, commit_sha, ANALYZER_VERSION,
+                    project_name=project_name, include_demo=include_demo,
+                    num_screenshots=num_screenshots, num_videos=num_videos
+                )
+                cached_readme = None if refresh else results.get('readme', readme_key)
+                if cached_readme:
+                    print(f"⚡ README cache hit for {owner_repo[0]}/{owner_repo[1]}@{commit_sha[:7]}")
+                    self.send_success_event(cached_readme)
+                    return
+                
+                # Identical generations already running: follow the leader instead of repeating its work
+                coordinator = get_single_flight()
+                if coordinator:
+                    flight, is_leader = coordinator.begin(readme_key)
+                    if is_leader:
+                        self.flight = flight
+                    else:
+                        print(f"🛬 Following in-flight generation for {owner_repo[0]}/{owner_repo[1]}@{commit_sha[:7]}")
+                        self.send_status_event("Same repository is already being processed, joining in...")
+                        if self.follow_flight(flight):
+                            return
+                        print("⚠️ In-flight generation ended without a result, generating independently")
             
-            # Step 2: Analyzing
-            self.send_status_event("Analyzing codebase...")
-            time.sleep(0.5)
-            analysis, error = self.analyze_codebase(repo_path)
-            if error:
-                self.send_error_event(error)
-                return
+            analysis = results.get('analysis', analysis_key) if results else None
+            if analysis:
+                print(f"⚡ Analysis cache hit for {owner_repo[0]}/{owner_repo[1]}@{commit_sha[:7]}")
+                self.send_status_event("Repository unchanged, reusing previous analysis...")
+            else:
+                # Files unchanged since the last analyzed commit keep their earlier records
+                baseline = load_baseline(*owner_repo, commit_sha, headers=auth_headers) if results else None
+                
+                # Step 1: Cloning
+                self.send_status_event("Cloning repository...")
+                time.sleep(0.5)  # Small delay for better UX
+                repo, error = self.download_repo(
+                    repo_url, access_token,
+                    on_progress=lambda size: self.send_status_event(f"Cloning repository... ({format_bytes(size)} received)"),
+                    commit_sha=commit_sha, baseline=baseline
+                )
+                if error:
+                    self.send_error_event(error)
+                    return
+                
+                # Step 2: Analyzing
+                self.send_status_event("Analyzing codebase...")
+                time.sleep(0.5)
+                analysis, error = self.analyze_codebase(repo, baseline)
+                if error:
+                    self.send_error_event(error)
+                    return
+                file_records = analysis.pop('file_records', None)
+                # Budget-limited (partial) analyses serve this request but are never cached
+                if results and analysis_is_complete(analysis):
+                    results.put('analysis', analysis_key, analysis)
+                    save_snapshot(*owner_repo, commit_sha, file_records)
             
             # Step 3: Building prompt
             self.send_status_event("Building prompt for AI...")
@@ -158,6 +211,8 @@ class handler(BaseHTTPRequestHandler):
             if error:
                 self.send_error_event(error)
                 return
+            if results and analysis_is_complete(analysis):
+                results.put('readme', readme_key, readme_content)
             
             # Step 5: Send success (history will be saved by frontend)
             print("📝 History will be saved by frontend after generation completes")
@@ -168,30 +223,48 @@ class handler(BaseHTTPRequestHandler):
             print(f"❌ Stream error: {str(e)}")
             self.send_error_event(str(e))
         finally:
-            # Clean up temporary files
-            if repo_path and os.path.exists(repo_path):
+            # Release followers waiting on this generation
+            if self.flight:
+                self.flight.close()
+            # Release the archive (in-memory buffer or spooled temp file)
+            if repo:
                 try:
-                    shutil.rmtree(os.path.dirname(repo_path), ignore_errors=True)
+                    repo.close()
                 except:
                     pass
+            from .github_client import get_github_client
+            print(f"📊 GitHub API: {get_github_client().summary()}")
 
-    def send_status_event(self, status):
-        """Send a status update event"""
-        data = json.dumps({"status": status})
+    def send_event(self, event):
+        """Send one SSE event, mirroring it to requests following this generation"""
+        # Publish first so followers still get the event if this client has gone away
+        if getattr(self, 'flight', None):
+            self.flight.publish(event)
+        data = json.dumps(event)
         self.wfile.write(f"data: {data}\n\n".encode())
         self.wfile.flush()
 
+    def send_status_event(self, status):
+        """Send a status update event"""
+        self.send_event({"status": status})
+
     def send_success_event(self, readme_content):
         """Send the final success event with README content"""
-        data = json.dumps({"readme": readme_content})
-        self.wfile.write(f"data: {data}\n\n".encode())
-        self.wfile.flush()
+        self.send_event({"readme": readme_content})
 
     def send_error_event(self, error_message):
         """Send an error event"""
-        data = json.dumps({"error": error_message})
-        self.wfile.write(f"data: {data}\n\n".encode())
-        self.wfile.flush()
+        self.send_event({"error": error_message})
+
+    def follow_flight(self, flight):
+        """Relay a leader's events; returns False if it ended without a README or error"""
+        from .single_flight import is_terminal
+        for event in flight.follow():
+            # A JSON leader (generate.py) publishes its HTTP status with the result
+            self.send_event({key: value for key, value in event.items() if key != 'status_code'})
+            if is_terminal(event):
+                return True
+        return False
 
     def decode_jwt_auth(self, jwt_token: str):
         """Decode JWT token to extract user data and GitHub access token"""
@@ -223,14 +296,12 @@ class handler(BaseHTTPRequestHandler):
             print(f"⚠️ JWT decode error: {e}")
             return None, None
 
-    def download_repo(self, repo_url: str, access_token: str = None):
+    def download_repo(self, repo_url: str, access_token: str = None, on_progress=None, commit_sha: str = None, baseline=None):
+        from .repo_download import fetch_repository, parse_github_repo, RepositoryTooLargeError, format_bytes
+
         try:
-            if "github.com" in repo_url:
-                repo_url = repo_url.replace("github.com", "api.github.com/repos")
-                if repo_url.endswith("/"):
-                    repo_url = repo_url[:-1]
-                zip_url = repo_url + "/zipball"
-            else:
+            owner_repo = parse_github_repo(repo_url) if "github.com" in repo_url else None
+            if not owner_repo:
                 return None, "Invalid GitHub URL"
             
             # Prepare headers with authentication if token is provided
@@ -241,89 +312,66 @@ class handler(BaseHTTPRequestHandler):
             else:
                 print(f"🌐 Using public access for repository download")
             
-            response = requests.get(zip_url, headers=headers, timeout=30)
-            if response.status_code == 404:
-                if access_token:
-                    return None, "Repository not found or you don't have access to this private repository"
-                else:
-                    return None, "Repository not found. If this is a private repository, please make sure you're logged in"
-            elif response.status_code == 401:
-                return None, "Authentication failed. Please log in again to access private repositories"
-            elif response.status_code != 200:
-                return None, f"Failed to download repository: {response.status_code}"
-            
-            temp_dir = tempfile.mkdtemp()
-            zip_path = os.path.join(temp_dir, "repo.zip")
+            def check_response(response):
+                if response.status_code == 404:
+                    if access_token:
+                        return "Repository not found or you don't have access to this private repository"
+                    else:
+                        return "Repository not found. If this is a private repository, please make sure you're logged in"
+                elif response.status_code == 401:
+                    return "Authentication failed. Please log in again to access private repositories"
+                return None
             
-            with open(zip_path, 'wb') as f:
-                f.write(response.content)
-            
-            extract_dir = os.path.join(temp_dir, "extracted")
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
-            
-            extracted_items = os.listdir(extract_dir)
-            if extracted_items:
-                repo_dir = os.path.join(extract_dir, extracted_items[0])
-                return repo_dir, None
-            
-            return None, "Failed to extract repository"
+            # Consults the snapshot cache before downloading; members are read
+            # straight from the zip, nothing is extracted
+            return fetch_repository(
+                *owner_repo, headers=headers, check_response=check_response,
+                on_progress=on_progress, commit_sha=commit_sha, analyze=True, baseline=baseline
+            )
+        except RepositoryTooLargeError as e:
+            print(f"❌ Download aborted at {format_bytes(e.size)} (limit {format_bytes(e.limit)})")
+            return None, str(e)
         except Exception as e:
             return None, str(e)
 
-    def analyze_codebase(self, repo_path: str):
+    def analyze_codebase(self, repo, baseline=None):
         try:
             print("🔍 Starting enhanced deep code analysis...")
             
             # Import the enhanced analyzer
             from .deep_analyzer import enhance_analysis_context
+            from .python_extract import build_python_code_summary
+            from .repo_index import get_repo_index
+            from .source_loader import read_source_text
+            from .workspaces import dependency_manifests
             
             # Get enhanced analysis
-            enhanced_context = enhance_analysis_context(repo_path)
+            enhanced_context = enhance_analysis_context(repo, baseline=baseline)
             
-            # Create traditional file structure for compatibility
+            # Create traditional file structure for compatibility, from the index the analyzer already built
             context = {"file_structure": "", "dependencies": "No dependency file found.", "python_code_summary": {}}
-            ignore_list = ['.git', '__pycache__', 'node_modules', '.venv', 'venv', 'target', 'dist', 'build']
-            file_structure_list = []
+            index = get_repo_index(repo)
+            context["file_structure"] = index.render_tree()
             
-            for root, dirs, files in os.walk(repo_path, topdown=True):
-                dirs[:] = [d for d in dirs if d not in ignore_list]
-                level = root.replace(repo_path, '').count(os.sep)
-                indent = ' ' * 4 * level
-                file_structure_list.append(f"{indent}📂 {os.path.basename(root)}/")
-                sub_indent = ' ' * 4 * (level + 1)
-                
-                for f in files:
-                    file_structure_list.append(f"{sub_indent}📄 {f}")
-                    file_path = os.path.join(root, f)
-                    
-                    if f.endswith('.py'):
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as py_file:
-                                source_code = py_file.read()
-                                tree = ast.parse(source_code)
-                                summary = {"functions": [], "classes": []}
-                                for node in ast.walk(tree):
-                                    if isinstance(node, ast.FunctionDef):
-                                        docstring = ast.get_docstring(node) or "No docstring."
-                                        summary["functions"].append(f"def {node.name}(...): # {docstring[:80]}")
-                                    elif isinstance(node, ast.ClassDef):
-                                        docstring = ast.get_docstring(node) or "No docstring."
-                                        summary["classes"].append(f"class {node.name}: # {docstring[:80]}")
-                                if summary["functions"] or summary["classes"]:
-                                     context["python_code_summary"][f] = summary
-                        except Exception as e:
-                            print(f"Could not parse Python file {file_path}: {e}")
-                    elif f in ['requirements.txt', 'package.json', 'pyproject.toml', 'pom.xml']:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as file_content:
-                                context["dependencies"] = file_content.read()
-                        except Exception: pass
+            # Derived from the deep analyzer's per-file records instead of parsing every file again
+            # Popped so the per-file records are released once the prompt data is built
+            raw_analysis = enhanced_context.pop('raw_analysis', None) or {}
+            context["python_code_summary"] = build_python_code_summary(
+                index, raw_analysis.get('file_analysis', {}),
+                read_text=None if raw_analysis else (lambda path: read_source_text(repo, path))
+            )
             
-            context["file_structure"] = "\n".join(file_structure_list)
+            # The root manifest describes a monorepo as a whole, so the shallowest one wins
+            for entry in dependency_manifests(index, ('requirements.txt', 'package.json', 'pyproject.toml', 'pom.xml')):
+                try:
+                    context["dependencies"] = read_source_text(repo, entry.path)
+                    break
+                except Exception: pass
             
             # Add enhanced analysis to context
             context["enhanced_analysis"] = enhanced_context
+            # Per-file records for the repository's next incremental analysis; the caller pops them
+            context["file_records"] = enhanced_context.pop('file_records', None)
             
             print("✅ Enhanced deep code analysis completed")
             return context, None
@@ -0,0 +1,177 @@
+"""
+Monorepo workspace discovery
+Finds the packages of a repository from its workspace declarations (npm / yarn
+`workspaces`, pnpm-workspace.yaml, Cargo `[workspace]` members, go.work `use`
+directives) and from Python subprojects in the repository index, so each package can
+be analyzed on its own instead of the whole tree being treated as one project
+"""
+
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from .ignore_rules import compile_pattern
+
+# Workspace declarations read besides the dependency manifests
+WORKSPACE_FILES = {'pnpm-workspace.yaml', 'go.work'}
+
+# Upper bound on discovered packages, shallowest first
+MAX_WORKSPACE_PACKAGES = int(os.getenv("MAX_WORKSPACE_PACKAGES", "200"))
+
+# Manifest that makes a directory a package, per ecosystem
+PACKAGE_MANIFESTS = {'npm': 'package.json', 'cargo': 'Cargo.toml', 'go': 'go.mod', 'python': 'pyproject.toml'}
+
+# Files that make a directory below the root a Python subproject
+PYTHON_PROJECT_FILES = ('pyproject.toml', 'setup.py')
+
+TOML_STRING = re.compile(r'"([^"]*)"|\'([^\']*)\'')
+
+
+class WorkspacePackage(NamedTuple):
+    path: str       # package directory relative to the repository root
+    ecosystem: str  # npm, cargo, go or python
+
+
+def _expand(patterns: Iterable[str], index, manifest: str) -> List[str]:
+    """Directories matching workspace globs (`!` excludes) that hold `manifest`"""
+    include, exclude = [], []
+    for pattern in patterns:
+        if not isinstance(pattern, str):
+            continue
+        negated = pattern.startswith('!')
+        pattern = pattern.lstrip('!').strip()
+        if pattern.startswith('./'):
+            pattern = pattern[2:]
+        pattern = pattern.strip('/')
+        if not pattern or pattern == '.':
+            continue
+        # A leading slash anchors the glob at the repository root
+        compiled = compile_pattern('/' + pattern)
+        if compiled:
+            (exclude if negated else include).append(re.compile(compiled[0] + r'\Z', re.S))
+    return [directory for directory in index.dirs
+            if any(regex.match(directory) for regex in include)
+            and not any(regex.match(directory) for regex in exclude)
+            and index.exists(f"{directory}/{manifest}")]
+
+
+def _pnpm_patterns(text: str) -> List[str]:
+    """`packages:` globs of a pnpm-workspace.yaml (block or flow list)"""
+    patterns, in_packages = [], False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if not line[0].isspace():
+            key, _, inline = stripped.partition(':')
+            in_packages = key.strip() == 'packages'
+            inline = inline.strip()
+            if in_packages and inline.startswith('['):
+                patterns.extend(item.strip().strip('\'"') for item in inline.strip('[]').split(',') if item.strip())
+        elif in_packages and stripped.startswith('-'):
+            patterns.append(stripped[1:].split('#')[0].strip().strip('\'"'))
+    return patterns
+
+
+def _cargo_members(text: str) -> List[str]:
+    """`members` (and `!`-prefixed `exclude`) globs of a Cargo.toml `[workspace]` table"""
+    section = re.search(r'^\[workspace\]\s*$(.*?)(?=^\[|\Z)', text, re.M | re.S)
+    if not section:
+        return []
+    patterns = []
+    for key, prefix in (('members', ''), ('exclude', '!')):
+        array = re.search(rf'^\s*{key}\s*=\s*\[(.*?)\]', section.group(1), re.M | re.S)
+        if array:
+            patterns.extend(prefix + (double or single) for double, single in TOML_STRING.findall(array.group(1)))
+    return patterns
+
+
+def _go_work_dirs(text: str) -> List[str]:
+    """Module directories of a go.work file's `use` directives"""
+    dirs, in_block = [], False
+    for line in text.splitlines():
+        line = line.split('//')[0].strip()
+        if in_block:
+            if line.startswith(')'):
+                in_block = False
+            elif line:
+                dirs.append(line.strip('"'))
+        elif line.startswith('use'):
+            rest = line[3:].strip()
+            if rest.startswith('('):
+                in_block = True
+            elif rest:
+                dirs.append(rest.strip('"'))
+    return dirs
+
+
+def discover_packages(index, read_text: Callable[[str], str]) -> List[WorkspacePackage]:
+    """
+    Workspace packages below the repository root, shallowest first. A directory
+    claimed by several ecosystems keeps the first: npm, cargo, go, then python.
+    """
+    found: Dict[str, WorkspacePackage] = {}
+
+    def add(directories: Iterable[str], ecosystem: str):
+        for directory in directories:
+            found.setdefault(directory, WorkspacePackage(directory, ecosystem))
+
+    def declared(file_path: str, parse: Callable[[str], List[str]]) -> List[str]:
+        if not index.exists(file_path):
+            return []
+        try:
+            return parse(read_text(file_path))
+        except Exception as e:
+            print(f"⚠️ Could not read workspace declaration {file_path}: {e}")
+            return []
+
+    def npm_workspaces(text: str) -> List[str]:
+        workspaces = json.loads(text).get('workspaces')
+        # Yarn also accepts {"packages": [...], "nohoist": [...]}
+        if isinstance(workspaces, dict):
+            workspaces = workspaces.get('packages')
+        return workspaces if isinstance(workspaces, list) else []
+
+    add(_expand(declared('package.json', npm_workspaces) + declared('pnpm-workspace.yaml', _pnpm_patterns),
+                index, PACKAGE_MANIFESTS['npm']), 'npm')
+    add(_expand(declared('Cargo.toml', _cargo_members), index, PACKAGE_MANIFESTS['cargo']), 'cargo')
+    add(_expand(declared('go.work', _go_work_dirs), index, PACKAGE_MANIFESTS['go']), 'go')
+    # Python has no workspace file: every directory below the root with its own project file counts
+    add(dict.fromkeys(entry.path.rpartition('/')[0] for entry in index.named(*PYTHON_PROJECT_FILES) if '/' in entry.path),
+        'python')
+
+    packages = sorted(found.values(), key=lambda package: (package.path.count('/'), package.path))
+    if len(packages) > MAX_WORKSPACE_PACKAGES:
+        print(f"✂️ Workspace discovery: keeping {MAX_WORKSPACE_PACKAGES} of {len(packages)} packages")
+    return packages[:MAX_WORKSPACE_PACKAGES]
+
+
+def package_name(package: WorkspacePackage, read_text: Callable[[str], str]) -> Optional[str]:
+    """Declared name of a package (package.json / Cargo.toml / pyproject.toml name, go.mod module)"""
+    manifest = f"{package.path}/{PACKAGE_MANIFESTS[package.ecosystem]}"
+    try:
+        text = read_text(manifest)
+    except Exception:
+        return None
+    if package.ecosystem == 'npm':
+        try:
+            name = json.loads(text).get('name')
+        except (ValueError, AttributeError):
+            return None
+        return name if isinstance(name, str) else None
+    if package.ecosystem == 'go':
+        match = re.search(r'^module\s+(\S+)', text, re.M)
+    else:
+        # [package] (Cargo), [project] or [tool.poetry] (Python): the first `name =` of those tables
+        match = re.search(r'^\[(?:package|project|tool\.poetry)\]\s*$(?:(?!^\[).)*?^name\s*=\s*["\']([^"\']+)', text, re.M | re.S)
+    return match.group(1) if match else None
+
+
+def dependency_manifests(index, filenames: Iterable[str]) -> List:
+    """
+    Index entries of the given manifests, the ones describing the repository as a
+    whole first: root level before nested, shallow before deep, then `filenames` order
+    """
+    order = {name: position for position, name in enumerate(filenames)}
+    return sorted(index.named(*order), key=lambda entry: (entry.path.count('/'), order[entry.path.rpartition('/')[2]]))
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Sparse fetch checks against a local fake GitHub
+Serves a small synthetic repository (metadata, HEAD, recursive tree, blobs and
+tarball) on localhost, points GITHUB_API_URL at it and checks how fetch_repository
+acquires it: the archive below SPARSE_FETCH_THRESHOLD_KB, trees and blobs above it,
+the archive again when the tree listing fails, and the snapshot cache on a repeat.
+Exits non-zero on the first failed check.
+
+Usage: python scripts/check_sparse_fetch.py
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+COMMIT_SHA = 'c0ffee' * 6 + 'c0ff'
+THRESHOLD_KB = 100
+MAX_BLOBS = 3
+
+# path -> content of the synthetic repository
+FILES = {
+    'README.md': b'# Demo\n',
+    'package.json': b'{"name": "demo", "dependencies": {"express": "^4.18.0"}}\n',
+    'requirements.txt': b'flask==3.0.0\n',
+    'app.py': b'from flask import Flask\napp = Flask(__name__)\n\n@app.route("/")\ndef index():\n    return "ok"\n',
+    'src/server.js': b'const express = require("express");\nconst app = express();\napp.get("/health", (req, res) => res.send("ok"));\n',
+    'src/util.py': b'def helper():\n    return 1\n',
+    'src/deep/nested/more.py': b'def more():\n    return 2\n',
+    'src/deep/nested/extra.py': b'def extra():\n    return 3\n',
+    'docs/guide.txt': b'Listed only: never fetched in sparse mode\n',
+}
+
+
+def blob_sha(data):
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def build_tarball(prefix):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for path, data in FILES.items():
+            info = tarfile.TarInfo(f"{prefix}/{path}")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """Answers the GitHub endpoints fetch_repository uses; `sizes` maps repo -> size in KB"""
+
+    protocol_version = 'HTTP/1.1'
+    sizes = {}
+    broken_trees = set()
+    calls = []
+    blobs = {blob_sha(data): data for data in FILES.values()}
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, body=b''):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        match = re.match(r'/repos/[^/]+/([^/]+)(/.*)?$', path)
+        if not match or match.group(1) not in self.sizes:
+            return self.send(404)
+        repo, rest = match.group(1), match.group(2) or ''
+        self.calls.append(f"{repo}:{rest or '/'}")
+        if not rest:
+            return self.send(200, json.dumps({'size': self.sizes[repo], 'default_branch': 'main'}).encode())
+        if rest == '/commits/HEAD':
+            return self.send(200, COMMIT_SHA.encode())
+        if rest.startswith('/git/trees/'):
+            if repo in self.broken_trees:
+                return self.send(404)
+            tree = [{'path': path, 'type': 'blob', 'sha': blob_sha(data), 'size': len(data)}
+                    for path, data in sorted(FILES.items())]
+            return self.send(200, json.dumps({'sha': COMMIT_SHA, 'tree': tree, 'truncated': False}).encode())
+        if rest.startswith('/git/blobs/'):
+            data = self.blobs.get(rest.rsplit('/', 1)[1])
+            return self.send(200, data) if data is not None else self.send(404)
+        if rest.startswith('/tarball'):
+            return self.send(200, build_tarball(f"owner-{repo}-{COMMIT_SHA[:7]}"))
+        self.send(404)
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGitHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def calls_for(repo):
+    return [call.split(':', 1)[1] for call in FakeGitHub.calls if call.split(':', 1)[0] == repo]
+
+
+def check(condition, message):
+    if not condition:
+        print(f"❌ {message}")
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def run_checks():
+    from api.repo_download import fetch_repository
+
+    FakeGitHub.sizes = {'small': THRESHOLD_KB - 1, 'huge': THRESHOLD_KB + 1, 'broken': THRESHOLD_KB + 1, 'known': THRESHOLD_KB + 1}
+    FakeGitHub.broken_trees = {'broken'}
+
+    # Below the threshold: the archive, with every file
+    view, error = fetch_repository('owner', 'small', commit_sha=COMMIT_SHA)
+    calls = calls_for('small')
+    check(view is not None and error is None, "small repository fetched")
+    check(not any(call.startswith(('/git/trees', '/git/blobs')) for call in calls), "small repository: no tree or blob requests")
+    check(any(call.startswith('/tarball') for call in calls), "small repository: archive downloaded")
+    check(sorted(view.list_files()) == sorted(FILES), "small repository: every file listed")
+    view.close()
+
+    # Above the threshold: trees and blobs, source files capped at SPARSE_MAX_BLOBS
+    view, error = fetch_repository('owner', 'huge', commit_sha=COMMIT_SHA)
+    calls = calls_for('huge')
+    check(view is not None and error is None, "huge repository fetched")
+    check(not any(call.startswith('/tarball') for call in calls), "huge repository: no archive download")
+    check(sum(call.startswith('/git/trees') for call in calls) == 1, "huge repository: one tree listing")
+    fetched = [path for path in view.list_files() if path.endswith(('.py', '.js'))]
+    check(len(fetched) == MAX_BLOBS, f"huge repository: {MAX_BLOBS} source files fetched")
+    check(all(view.read_bytes(path) == FILES[path] for path in fetched), "huge repository: blob contents match")
+    check(view.exists('docs/guide.txt') and len([call for call in calls if call.startswith('/git/blobs')]) == len(fetched) + 3,
+          "huge repository: other files listed without content")
+    files, blob_shas = sorted(view.list_files()), dict(view.blob_shas)
+    view.close()
+
+    # A repeat of the same commit comes from the snapshot cache with the same listing
+    del FakeGitHub.calls[:]
+    view, error = fetch_repository('owner', 'huge', commit_sha=COMMIT_SHA)
+    calls = calls_for('huge')
+    check(view is not None and not calls, "huge repository: repeat served by the snapshot cache")
+    check(sorted(view.list_files()) == files, "huge repository: cached snapshot lists the same files")
+    check(view.blob_shas == blob_shas, "huge repository: cached snapshot keeps the blob SHAs")
+    view.close()
+
+    # Metadata the caller already has is not fetched again
+    view, error = fetch_repository('owner', 'known', commit_sha=COMMIT_SHA, metadata={'size': THRESHOLD_KB + 1})
+    check(view is not None and '/' not in calls_for('known'), "metadata passed in: no metadata request")
+    view.close()
+
+    # A failed tree listing falls back to the archive
+    view, error = fetch_repository('owner', 'broken', commit_sha=COMMIT_SHA)
+    calls = calls_for('broken')
+    check(view is not None and error is None, "broken tree: repository still fetched")
+    check(any(call.startswith('/tarball') for call in calls), "broken tree: fell back to the archive")
+    check(sorted(view.list_files()) == sorted(FILES), "broken tree: every file listed")
+    view.close()
+
+
+if __name__ == "__main__":
+    server = start_server()
+    scratch = tempfile.mkdtemp(prefix='sparse_check_')
+    # Read at import time by the api modules, so set before run_checks imports them
+    os.environ.update({
+        'GITHUB_API_URL': f"http://127.0.0.1:{server.server_address[1]}",
+        'GITHUB_BACKOFF_SECONDS': '0',
+        'SPARSE_FETCH_THRESHOLD_KB': str(THRESHOLD_KB),
+        'SPARSE_MAX_BLOBS': str(MAX_BLOBS),
+        'REPO_SNAPSHOT_CACHE_DIR': os.path.join(scratch, 'snapshots'),
+        'FILE_ANALYSIS_CACHE_BYTES': '0'
+    })
+    try:
+        run_checks()
+    finally:
+        server.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+    print("🎉 All sparse fetch checks passed")